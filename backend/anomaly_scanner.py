@@ -0,0 +1,257 @@
+# anomaly_scanner.py
+# Streaming jump and pump/dump detection on every tick of every symbol.
+#
+# Each symbol owns one row of preallocated arrays: its last price, an EWMA
+# of squared log returns and a ring of the last ANOMALY_WINDOW returns with
+# their running sum / sum of squares. A tick costs O(1) per symbol, and all
+# ticks that arrive in one event-loop turn (a REST poll, a burst of stream
+# frames) are scanned together as one vectorized pass over their rows.
+#
+# Alerts:
+#   jump        one return beyond ANOMALY_JUMP_SIGMAS EWMA standard deviations
+#   pump/dump   a move of at least ANOMALY_PUMP_MOVE over the window that is
+#               also ANOMALY_PUMP_Z rolling standard deviations from flat
+import asyncio
+import math
+import os
+import time
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from .metrics import anomaly_alerts_total, anomaly_scan_seconds
+
+# Ticks of returns behind the rolling z-scores and the pump/dump move
+ANOMALY_WINDOW = int(os.environ.get("ANOMALY_WINDOW", "60"))
+# Half-life in ticks of the EWMA volatility
+ANOMALY_HALFLIFE = float(os.environ.get("ANOMALY_HALFLIFE", "30"))
+ANOMALY_JUMP_SIGMAS = float(os.environ.get("ANOMALY_JUMP_SIGMAS", "6"))
+ANOMALY_PUMP_MOVE = float(os.environ.get("ANOMALY_PUMP_MOVE", "0.05"))
+ANOMALY_PUMP_Z = float(os.environ.get("ANOMALY_PUMP_Z", "4"))
+# Returns seen before a symbol may alert
+ANOMALY_WARMUP = int(os.environ.get("ANOMALY_WARMUP", "30"))
+# Seconds before the same symbol raises the same kind of alert again
+ANOMALY_COOLDOWN = float(os.environ.get("ANOMALY_COOLDOWN", "30"))
+
+KINDS = ("jump", "pump", "dump")
+
+# Floor on the return variance (a 1bp standard deviation) so flat tapes don't divide by zero
+MIN_VARIANCE = 1e-8
+
+AlertCallback = Callable[[List[dict]], None]
+
+
+class AnomalyScanner:
+    """Rolling return statistics per symbol, scanned for outliers as ticks arrive."""
+
+    def __init__(self, window: int = ANOMALY_WINDOW, halflife: float = ANOMALY_HALFLIFE,
+                 jump_sigmas: float = ANOMALY_JUMP_SIGMAS, pump_move: float = ANOMALY_PUMP_MOVE,
+                 pump_z: float = ANOMALY_PUMP_Z, warmup: int = ANOMALY_WARMUP,
+                 cooldown: float = ANOMALY_COOLDOWN, on_alerts: Optional[AlertCallback] = None,
+                 capacity: int = 64):
+        self.window = window
+        self.decay = 0.5 ** (1.0 / halflife)
+        self.jump_sigmas = jump_sigmas
+        self.pump_move = math.log1p(pump_move)
+        self.pump_z = pump_z
+        self.warmup = warmup
+        self.cooldown = cooldown
+        self.on_alerts = on_alerts
+        self._slots: Dict[str, int] = {}
+        self._coins: List[Optional[str]] = []
+        self._free: List[int] = []
+        self._pending = []  # (coin, price, timestamp) waiting for the next scan
+        self._scheduled = False
+        self._allocate(capacity)
+
+    def _allocate(self, capacity: int):
+        """Grow every per-symbol array to ``capacity`` rows, keeping the rows in use."""
+        old = len(self._coins)
+
+        def grow(name, shape=(), fill=0.0):
+            array = np.full((capacity,) + shape, fill, dtype=np.float64)
+            if old:
+                array[:old] = getattr(self, name)
+            setattr(self, name, array)
+
+        for name in ("last", "variance", "count", "total", "squares", "head"):
+            grow(name)
+        grow("returns", (self.window,))
+        grow("alerted", (len(KINDS),), -np.inf)  # timestamp of the latest alert per kind
+        self._coins.extend([None] * (capacity - old))
+        self._free.extend(range(capacity - 1, old - 1, -1))
+
+    def _slot(self, coin: str) -> int:
+        slot = self._slots.get(coin)
+        if slot is None:
+            if not self._free:
+                self._allocate(2 * len(self._coins))
+            slot = self._slots[coin] = self._free.pop()
+            self._coins[slot] = coin
+        return slot
+
+    def forget(self, coin: str):
+        slot = self._slots.pop(coin, None)
+        if slot is None:
+            return
+        for array in (self.last, self.variance, self.count, self.total, self.squares, self.head, self.returns):
+            array[slot] = 0.0
+        self.alerted[slot] = -np.inf
+        self._coins[slot] = None
+        self._free.append(slot)
+
+    def prime(self, coin: str, prices):
+        """Fold a stored price series into one symbol's statistics in a single pass, without alerting.
+
+        Leaves the row exactly as scanning the prices tick by tick would (warm start).
+        """
+        slot = self._slot(coin)
+        prices = np.asarray(prices, dtype=np.float64)
+        prices = prices[prices > 0]
+        if self.last[slot] > 0:
+            prices = np.concatenate([[self.last[slot]], prices])
+        if len(prices) == 0:
+            return
+        self.last[slot] = prices[-1]
+        r = np.log(prices[1:] / prices[:-1])
+        if len(r) == 0:
+            return
+
+        weights = self.decay ** np.arange(len(r) - 1, -1, -1, dtype=np.float64)
+        self.variance[slot] = self.decay ** len(r) * self.variance[slot] + (1.0 - self.decay) * (weights @ (r * r))
+
+        # Rewrite the ring oldest-first from index 0 so ``head`` still marks the oldest entry
+        seen = int(self.count[slot])
+        head = int(self.head[slot])
+        held = self.returns[slot, :head] if seen < self.window else np.roll(self.returns[slot], -head)
+        ring = np.concatenate([held, r])[-self.window:]
+        self.returns[slot] = 0.0
+        self.returns[slot, :len(ring)] = ring
+        self.head[slot] = len(ring) % self.window
+        self.count[slot] = seen + len(r)
+        self.total[slot] = ring.sum()
+        self.squares[slot] = (ring * ring).sum()
+
+    def push(self, coin: str, price: float, timestamp: float):
+        """Queue one tick; queued ticks are scanned together once the current loop turn ends."""
+        self._pending.append((coin, price, timestamp))
+        if self._scheduled:
+            return
+        try:
+            asyncio.get_running_loop().call_soon(self.flush)
+            self._scheduled = True
+        except RuntimeError:
+            self.flush()  # no loop (scripts, backtests): scan right away
+
+    def flush(self) -> List[dict]:
+        self._scheduled = False
+        pending, self._pending = self._pending, []
+        if not pending:
+            return []
+        started = time.perf_counter()
+        coins, prices, timestamps = zip(*pending)
+        alerts = self.scan(coins, prices, timestamps)
+        anomaly_scan_seconds.observe(time.perf_counter() - started)
+        for alert in alerts:
+            anomaly_alerts_total.labels(alert["kind"]).inc()
+        if alerts and self.on_alerts is not None:
+            self.on_alerts(alerts)
+        return alerts
+
+    def scan(self, coins, prices, timestamps) -> List[dict]:
+        """Advance every symbol by its ticks (in order) and return the alerts they raise."""
+        slots = np.fromiter((self._slot(coin) for coin in coins), dtype=np.intp, count=len(coins))
+        prices = np.asarray(prices, dtype=np.float64)
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        if len(set(coins)) == len(slots):
+            return self._step(slots, prices, timestamps)
+        alerts = []
+        # A row can only be advanced once per vectorized step: repeated symbols go in later rounds
+        while len(slots):
+            _, first = np.unique(slots, return_index=True)
+            first.sort()
+            alerts.extend(self._step(slots[first], prices[first], timestamps[first]))
+            rest = np.ones(len(slots), dtype=bool)
+            rest[first] = False
+            slots, prices, timestamps = slots[rest], prices[rest], timestamps[rest]
+        return alerts
+
+    def _step(self, slots, prices, timestamps) -> List[dict]:
+        last = self.last[slots]
+        self.last[slots] = np.where(prices > 0, prices, last)
+        # A symbol's first price (or a bad one) carries no return
+        valid = (last > 0) & (prices > 0)
+        slots, prices, timestamps, last = slots[valid], prices[valid], timestamps[valid], last[valid]
+        if not len(slots):
+            return []
+        r = np.log(prices / last)
+
+        # Statistics before this return: the EWMA (bias-corrected for short histories) and the window
+        seen = self.count[slots]
+        variance = self.variance[slots] / np.maximum(1.0 - self.decay ** seen, 1e-12)
+        sigma = np.sqrt(np.maximum(variance, MIN_VARIANCE))
+        held = np.minimum(seen, self.window)
+        total, squares = self.total[slots], self.squares[slots]
+        mean = total / np.maximum(held, 1.0)
+        rolling_sd = np.sqrt(np.maximum(squares / np.maximum(held, 1.0) - mean * mean, MIN_VARIANCE))
+        jump_z = r / sigma
+        z = (r - mean) / rolling_sd
+
+        # Fold the return in: EWMA, ring slot, running sums
+        head = self.head[slots].astype(np.intp)
+        evicted = np.where(seen >= self.window, self.returns[slots, head], 0.0)
+        self.returns[slots, head] = r
+        self.head[slots] = (head + 1) % self.window
+        self.variance[slots] = self.decay * self.variance[slots] + (1.0 - self.decay) * r * r
+        seen = seen + 1
+        self.count[slots] = seen
+        total = total + r - evicted
+        squares = squares + r * r - evicted * evicted
+        # Re-sum a row each time its ring wraps so float drift never builds up
+        wrapped = head == self.window - 1
+        if wrapped.any():
+            rows = self.returns[slots[wrapped]]
+            total[wrapped], squares[wrapped] = rows.sum(axis=1), (rows * rows).sum(axis=1)
+        self.total[slots], self.squares[slots] = total, squares
+
+        # The window move (log return over the held ticks) against its own volatility
+        held = np.minimum(seen, self.window)
+        mean = total / held
+        window_sd = np.sqrt(np.maximum(squares / held - mean * mean, MIN_VARIANCE))
+        move_z = total / (window_sd * np.sqrt(held))
+
+        ready = seen > self.warmup
+        flags = np.stack([
+            ready & (np.abs(jump_z) >= self.jump_sigmas),
+            ready & (total >= self.pump_move) & (move_z >= self.pump_z),
+            ready & (total <= -self.pump_move) & (move_z <= -self.pump_z),
+        ], axis=1)
+        flags &= timestamps[:, None] - self.alerted[slots] >= self.cooldown
+        if not flags.any():
+            return []
+
+        alerts = []
+        for row, kind in zip(*np.nonzero(flags)):
+            slot = slots[row]
+            self.alerted[slot, kind] = timestamps[row]
+            alerts.append({
+                "coin": self._coins[slot],
+                "kind": KINDS[kind],
+                "direction": "up" if (r[row] if kind == 0 else total[row]) > 0 else "down",
+                "price": float(prices[row]),
+                "timestamp": float(timestamps[row]),
+                "return": round(float(math.expm1(r[row])), 6),
+                "move": round(float(math.expm1(total[row])), 6),
+                "window": int(held[row]),
+                "sigma": round(float(sigma[row]), 6),
+                "jump_z": round(float(jump_z[row]), 2),
+                "z": round(float(z[row]), 2),
+                "move_z": round(float(move_z[row]), 2),
+            })
+        return alerts
+
+    def stats(self) -> dict:
+        return {
+            "symbols": len(self._slots),
+            "capacity": len(self._coins),
+        }
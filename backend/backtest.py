@@ -0,0 +1,229 @@
+# backtest.py
+# Offline backtests: replay recorded ticks through AdvancedTrendPredictor.predict_trends_batch.
+#
+#   python backend/backtest.py run data/BTC.csv data/ETH.ticks --horizon 60 --stride 5 --workers 4
+#   python backend/backtest.py convert data/BTC.csv data/BTC.ticks
+#
+# Each symbol gets a fresh predictor, and every prediction runs the same
+# predict_trends_batch pipeline the live prediction scheduler uses (stateful
+# trend_memory and confidence_history included). The windows of a chunk are
+# strided rows of one sliding view and are predicted in batches, so the
+# pipeline overhead is paid per batch, not per tick.
+# Every prediction is scored against the realized return ``horizon`` ticks
+# later; files are streamed in chunks and pending predictions are resolved
+# on the fly, so memory stays O(horizon).
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.indicator_engine import WINDOW  # noqa: E402
+from backend.tick_files import DEFAULT_CHUNK, convert_to_ticks, read_chunks, symbol_from_path  # noqa: E402
+from backend.trend_predictor_ai import AdvancedTrendPredictor  # noqa: E402
+
+DIRECTIONS = {"bullish": 1, "bearish": -1, "neutral": 0}
+CALIBRATION_BINS = 10
+# The trend loop only predicts windows of at least this many ticks
+MIN_WINDOW = 15
+# Windows per predict_trends_batch call (bounds the per-call feature arrays)
+PREDICT_BATCH = 4096
+
+
+class BacktestStats:
+    """Hit rate and confidence calibration accumulated one prediction at a time."""
+
+    def __init__(self, symbol, horizon):
+        self.symbol = symbol
+        self.horizon = horizon
+        self.ticks = 0
+        self.trend_counts = {trend: 0 for trend in DIRECTIONS}
+        self.forward_return_sum = {trend: 0.0 for trend in DIRECTIONS}
+        self.directional = 0
+        self.hits = 0
+        self.brier_sum = 0.0
+        self.bin_count = np.zeros(CALIBRATION_BINS, dtype=np.int64)
+        self.bin_confidence = np.zeros(CALIBRATION_BINS)
+        self.bin_hits = np.zeros(CALIBRATION_BINS, dtype=np.int64)
+
+    def record(self, trend, confidence, forward_return):
+        self.trend_counts[trend] += 1
+        self.forward_return_sum[trend] += forward_return
+        direction = DIRECTIONS[trend]
+        if direction == 0:
+            return
+        hit = int(direction * forward_return > 0)
+        self.directional += 1
+        self.hits += hit
+        self.brier_sum += (confidence - hit) ** 2
+        b = min(int(confidence * CALIBRATION_BINS), CALIBRATION_BINS - 1)
+        self.bin_count[b] += 1
+        self.bin_confidence[b] += confidence
+        self.bin_hits[b] += hit
+
+    def merge(self, other):
+        self.ticks += other.ticks
+        for trend in DIRECTIONS:
+            self.trend_counts[trend] += other.trend_counts[trend]
+            self.forward_return_sum[trend] += other.forward_return_sum[trend]
+        self.directional += other.directional
+        self.hits += other.hits
+        self.brier_sum += other.brier_sum
+        self.bin_count += other.bin_count
+        self.bin_confidence += other.bin_confidence
+        self.bin_hits += other.bin_hits
+        return self
+
+    def to_dict(self):
+        calibration = []
+        ece = 0.0
+        for b in range(CALIBRATION_BINS):
+            n = int(self.bin_count[b])
+            if n == 0:
+                continue
+            mean_confidence = self.bin_confidence[b] / n
+            hit_rate = self.bin_hits[b] / n
+            ece += n * abs(mean_confidence - hit_rate)
+            calibration.append({
+                "bin": [b / CALIBRATION_BINS, (b + 1) / CALIBRATION_BINS],
+                "count": n,
+                "mean_confidence": float(mean_confidence),
+                "hit_rate": float(hit_rate),
+            })
+        directional = self.directional
+        return {
+            "symbol": self.symbol,
+            "horizon": self.horizon,
+            "ticks": self.ticks,
+            "predictions": dict(self.trend_counts),
+            "mean_forward_return": {
+                trend: self.forward_return_sum[trend] / count if count else None
+                for trend, count in self.trend_counts.items()
+            },
+            "hit_rate": self.hits / directional if directional else None,
+            "brier_score": self.brier_sum / directional if directional else None,
+            "expected_calibration_error": ece / directional if directional else None,
+            "calibration": calibration,
+        }
+
+
+def backtest_symbol(path, horizon=60, stride=1, window=WINDOW, chunk_size=DEFAULT_CHUNK, verbose=False):
+    """Replay one tick file; returns a BacktestStats.
+
+    The strided windows of each chunk go through predict_trends_batch
+    together as rows of one coin, which applies confidence history and trend
+    memory row by row in tick order, exactly as one call per tick would.
+    """
+    coin = symbol_from_path(path)
+    predictor = AdvancedTrendPredictor()
+    stats = BacktestStats(coin, horizon)
+    pending = deque()  # (due tick index, entry price, trend, confidence)
+    history = np.zeros(0)  # the last window - 1 prices before the chunk
+
+    # The predictor reports pump/dump detections with print(); keep runs quiet
+    sink = open(os.devnull, "w") if not verbose else None
+    with contextlib.redirect_stdout(sink) if sink else contextlib.nullcontext():
+        start = 0  # tick index of the chunk's first price
+        for _, prices in read_chunks(path, chunk_size):
+            series = np.concatenate([history, prices])
+            offset = start - len(history)  # tick index of series[0]
+            entries = series.tolist()
+
+            # Until the ring fills, windows grow by one tick: predict those one at a time
+            first = max(start, MIN_WINDOW - 1)
+            first += -first % stride
+            while first < min(start + len(prices), window - 1):
+                (trend, _, confidence), = predictor.predict_trends_batch(series[None, :first - offset + 1], [coin])
+                pending.append((first + horizon, entries[first - offset], trend, confidence))
+                first += stride
+
+            # Full windows: strided rows of one sliding view, PREDICT_BATCH at a time
+            ends = np.arange(first, start + len(prices), stride)
+            if len(ends):
+                windows = sliding_window_view(series, window)[ends[0] - offset - window + 1::stride]
+                for b in range(0, len(ends), PREDICT_BATCH):
+                    rows = windows[b:b + PREDICT_BATCH]
+                    predictions = predictor.predict_trends_batch(rows, [coin] * len(rows))
+                    for i, (trend, _, confidence) in zip(ends[b:b + PREDICT_BATCH].tolist(), predictions):
+                        pending.append((i + horizon, entries[i - offset], trend, confidence))
+
+            end = start + len(prices)
+            while pending and pending[0][0] < end:
+                due, entry, trend, confidence = pending.popleft()
+                stats.record(trend, confidence, entries[due - offset] / entry - 1.0)
+            history = series[max(0, len(series) - window + 1):].copy()
+            start = end
+        stats.ticks = start
+    if sink:
+        sink.close()
+    return stats
+
+
+def run_backtests(paths, horizon=60, stride=1, window=WINDOW, workers=None, chunk_size=DEFAULT_CHUNK):
+    """Backtest every file, in parallel across symbols; returns per-symbol stats."""
+    job = partial(backtest_symbol, horizon=horizon, stride=stride, window=window, chunk_size=chunk_size)
+    workers = min(workers or os.cpu_count() or 1, len(paths))
+    if workers <= 1:
+        return [job(path) for path in paths]
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        return list(executor.map(job, paths))
+
+
+def _format_rate(value):
+    return "    n/a" if value is None else f"{value:7.2%}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay recorded ticks through the trend predictor")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="backtest one or more tick files (one symbol per file)")
+    run.add_argument("paths", nargs="+", help="CSV (timestamp,price) or .ticks files")
+    run.add_argument("--horizon", type=int, default=60, help="forward-return horizon in ticks")
+    run.add_argument("--stride", type=int, default=1, help="predict every N ticks")
+    run.add_argument("--window", type=int, default=WINDOW, help="price window length (as in production)")
+    run.add_argument("--workers", type=int, default=None)
+    run.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK)
+    run.add_argument("--json", dest="json_path", help="write the full report to this file")
+
+    convert = commands.add_parser("convert", help="convert a CSV tick file to the .ticks format")
+    convert.add_argument("src")
+    convert.add_argument("dst")
+
+    args = parser.parse_args(argv)
+    if args.command == "convert":
+        written = convert_to_ticks(args.src, args.dst)
+        print(f"Wrote {written} ticks to {args.dst}")
+        return
+
+    results = run_backtests(args.paths, args.horizon, args.stride, args.window, args.workers, args.chunk_size)
+    total = BacktestStats("ALL", args.horizon)
+    for stats in results:
+        total.merge(stats)
+
+    reports = [stats.to_dict() for stats in results + [total]]
+    print(f"{'symbol':>8} {'ticks':>10} {'bull':>8} {'bear':>8} {'neutral':>8} {'hit rate':>9} {'ECE':>7}")
+    for report in reports:
+        counts = report["predictions"]
+        ece = report["expected_calibration_error"]
+        print(f"{report['symbol']:>8} {report['ticks']:>10} {counts['bullish']:>8} {counts['bearish']:>8} "
+              f"{counts['neutral']:>8} {_format_rate(report['hit_rate']):>9} "
+              f"{'n/a' if ece is None else f'{ece:.3f}':>7}")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(reports, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
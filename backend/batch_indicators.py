@@ -0,0 +1,185 @@
+# batch_indicators.py
+# Vectorized indicators over a 2D (symbols x time) price array.
+#
+# Every function mirrors the matching AdvancedTrendPredictor / IndicatorState
+# computation replayed over the window, but evaluates all rows at once with
+# axis-wise NumPy operations instead of per-symbol Python calls.
+from functools import lru_cache
+
+import numpy as np
+
+
+@lru_cache(maxsize=64)
+def _ema_matrix(span, length):
+    """(length x length) weights so that ``prices @ W.T`` is the EMA series.
+
+    Matches EMA(adjust=False) seeded with the first value:
+    ema[t] = beta**t * p[0] + alpha * sum_{j=1..t} beta**(t-j) * p[j]
+    """
+    alpha = 2.0 / (span + 1.0)
+    beta = 1.0 - alpha
+    t = np.arange(length)
+    exponents = t[:, None] - t[None, :]
+    weights = np.where(exponents >= 0, alpha * beta ** np.maximum(exponents, 0), 0.0)
+    weights[:, 0] = beta ** t
+    weights.setflags(write=False)
+    return weights
+
+
+def ema_series(prices, span):
+    return prices @ _ema_matrix(span, prices.shape[1]).T
+
+
+@lru_cache(maxsize=64)
+def wilder_weights(period, deltas):
+    """Weights so that ``gains @ w`` is Wilder's average over ``deltas`` deltas.
+
+    The simple mean of the first ``period`` deltas seeds the smoothing, which
+    then decays by (period - 1) / period per delta.
+    """
+    beta = (period - 1) / period
+    rest = deltas - period
+    weights = np.empty(deltas)
+    weights[:period] = beta ** rest / period
+    weights[period:] = beta ** np.arange(rest - 1, -1, -1) / period
+    weights.setflags(write=False)
+    return weights
+
+
+@lru_cache(maxsize=64)
+def macd_weights(length):
+    """(line, signal) weights so that ``prices @ w`` is the last MACD line / signal value."""
+    line = _ema_matrix(12, length) - _ema_matrix(26, length)
+    signal = _ema_matrix(9, length)[-1] @ line
+    line = line[-1].copy()
+    line.setflags(write=False)
+    signal.setflags(write=False)
+    return line, signal
+
+
+def rsi(prices, period=14):
+    """Wilder RSI of the last column, shape (N,)"""
+    n, length = prices.shape
+    if length < period + 1:
+        return np.full(n, 50.0)
+
+    deltas = np.diff(prices, axis=1)
+    weights = wilder_weights(period, length - 1)
+    avg_gain = np.maximum(deltas, 0.0) @ weights
+    avg_loss = np.maximum(-deltas, 0.0) @ weights
+
+    # 100 - 100 / (1 + gain / loss), which is 100 with no losses; a flat window is neutral
+    moved = avg_gain + avg_loss
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(moved > 0, 100 * avg_gain / moved, 50.0)
+
+
+def macd(prices):
+    """(macd_line, signal_line, histogram), each shape (N,)"""
+    n, length = prices.shape
+    if length < 26:
+        zeros = np.zeros(n)
+        return zeros, zeros, zeros
+
+    line_weights, signal_weights = macd_weights(length)
+    line = prices @ line_weights
+    signal = prices @ signal_weights
+    return line, signal, line - signal
+
+
+def bollinger_bands(prices, period=20):
+    """(upper, middle, lower, bandwidth), each shape (N,)"""
+    if prices.shape[1] < period:
+        last = prices[:, -1]
+        return last, last, last, np.zeros(prices.shape[0])
+
+    window = prices[:, -period:]
+    sma = window.mean(axis=1)
+    std = window.std(axis=1)
+    upper = sma + std * 2
+    lower = sma - std * 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        bandwidth = np.where(sma != 0, (upper - lower) / sma * 100, 0.0)
+    return upper, sma, lower, bandwidth
+
+
+def support_resistance(prices, window=10):
+    if prices.shape[1] < window * 2:
+        last = prices[:, -1]
+        return last, last
+    recent = prices[:, -window:]
+    return recent.min(axis=1), recent.max(axis=1)
+
+
+def log_returns(prices):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.diff(np.log(prices), axis=1)
+
+
+def market_regime(returns, length):
+    """Regime labels as an object array of strings, shape (N,)"""
+    n = returns.shape[0]
+    if length < 20:
+        return np.full(n, "unknown", dtype=object)
+
+    recent = returns[:, -19:]
+    volatility = recent.std(axis=1) * np.sqrt(365)
+    trend_strength = np.abs(recent.mean(axis=1))
+    regime = np.full(n, "ranging", dtype=object)
+    regime[trend_strength > 0.02] = "trending"
+    regime[volatility > 0.8] = "high_volatility"
+    return regime
+
+
+# Column names of ml_features (and of IndicatorState.ml_features)
+ML_FEATURE_NAMES = (
+    "return_5", "return_10", "volatility_10", "volatility_20", "distance_mean_10",
+    "rsi", "macd", "macd_histogram", "slope_5", "slope_15",
+)
+
+
+def ml_features(prices, rsi_values, macd_line, histogram):
+    """The 10 machine_learning_features columns, shape (N, 10)"""
+    n, length = prices.shape
+    if length < 30:
+        return np.zeros((n, 10))
+
+    last = prices[:, -1]
+    p5, p10, p15 = prices[:, -5], prices[:, -10], prices[:, -15]
+    mean_10 = prices[:, -10:].mean(axis=1)
+    mean_20 = prices[:, -20:].mean(axis=1)
+    safe_last = np.where(last != 0, last, 1.0)
+    nonzero = last != 0
+
+    return np.column_stack([
+        (last - p5) / p5,
+        (last - p10) / p10,
+        prices[:, -10:].std(axis=1) / mean_10,
+        prices[:, -20:].std(axis=1) / mean_20,
+        (last - mean_10) / mean_10,
+        (rsi_values - 50) / 50,
+        np.where(nonzero, macd_line / safe_last, 0.0),
+        np.where(nonzero, histogram / safe_last, 0.0),
+        np.where(nonzero, (last - p5) / 5 / safe_last, 0.0),
+        np.where(nonzero, (last - p15) / 15 / safe_last, 0.0),
+    ])
+
+
+def snapshots(prices):
+    """IndicatorState.snapshot() of every row (as if replayed from its first price), as a list of dicts"""
+    length = prices.shape[1]
+    rsi_values = rsi(prices)
+    line, signal, histogram = macd(prices)
+    upper, middle, lower, width = bollinger_bands(prices)
+    regime = market_regime(log_returns(prices), length)
+    features = ml_features(prices, rsi_values, line, histogram)
+    columns = zip(rsi_values.tolist(), line.tolist(), signal.tolist(), histogram.tolist(), upper.tolist(),
+                  middle.tolist(), lower.tolist(), width.tolist(), regime.tolist(), features.tolist())
+    return [
+        {
+            "rsi": r, "macd": m, "macd_signal": s, "macd_histogram": h,
+            "bb_upper": u, "bb_middle": mid, "bb_lower": lo, "bb_width": w,
+            "regime": g, "ml_features": f,
+        }
+        for r, m, s, h, u, mid, lo, w, g, f in columns
+    ]
@@ -0,0 +1,114 @@
+# bench_fanout.py
+# Load test for the broadcaster: N simulated clients, a fraction of them slow.
+#
+#   python backend/benchmarks/bench_fanout.py [--slow-fraction 0.1] [--slow-delay 0.5]
+#
+# Reports p50/p99 delivery latency (publish -> send completed) for the fast
+# clients, alongside the old sequential `await send_text` loop as a baseline.
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.broadcaster import Broadcaster  # noqa: E402
+
+CLIENT_COUNTS = [10, 100, 1000, 5000]
+
+
+# message -> publish time; looked up by the fake sockets instead of parsing JSON
+published = {}
+
+
+def stamp(i):
+    message = json.dumps({"i": i})
+    published[message] = time.perf_counter()
+    return message
+
+
+class FakeWebSocket:
+    """Records delivery latency of every frame; slow clients stall on send."""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.latencies = []
+
+    async def send_text(self, message):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        else:
+            await asyncio.sleep(0)  # yield like a real socket write
+        self.latencies.append(time.perf_counter() - published[message])
+
+    async def send_bytes(self, message):
+        await self.send_text(message.decode())
+
+    async def close(self):
+        pass
+
+
+def make_clients(n, slow_fraction, slow_delay):
+    slow = int(n * slow_fraction)
+    return [FakeWebSocket(slow_delay if i < slow else 0.0) for i in range(n)]
+
+
+def percentiles(clients):
+    latencies = [x for c in clients if not c.delay for x in c.latencies]
+    if not latencies:
+        return float("nan"), float("nan")
+    return np.percentile(latencies, 50) * 1e3, np.percentile(latencies, 99) * 1e3
+
+
+async def run_queued(n, args):
+    clients = make_clients(n, args.slow_fraction, args.slow_delay)
+    broadcaster = Broadcaster(set())
+    for ws in clients:
+        broadcaster.register(ws)
+    for i in range(args.frames):
+        broadcaster.publish(stamp(i), droppable=(i % 5 != 0))
+        await asyncio.sleep(args.interval)
+    await asyncio.sleep(args.interval * 2)
+    for ws in clients:
+        await broadcaster.unregister(ws)
+    return percentiles(clients)
+
+
+async def run_sequential(n, args):
+    clients = make_clients(n, args.slow_fraction, args.slow_delay)
+    deadline = time.perf_counter() + args.frames * args.interval * 4
+    for i in range(args.frames):
+        message = stamp(i)
+        for ws in clients:
+            await ws.send_text(message)
+        if time.perf_counter() > deadline:
+            break
+        await asyncio.sleep(args.interval)
+    return percentiles(clients)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Broadcaster fan-out load test")
+    parser.add_argument("--frames", type=int, default=20)
+    parser.add_argument("--interval", type=float, default=0.1)
+    parser.add_argument("--slow-fraction", type=float, default=0.1)
+    parser.add_argument("--slow-delay", type=float, default=0.5)
+    parser.add_argument("--skip-sequential", action="store_true")
+    args = parser.parse_args()
+
+    print(f"{'clients':>8} {'queued p50':>11} {'queued p99':>11} {'seq p50':>9} {'seq p99':>9}  (ms)")
+    for n in CLIENT_COUNTS:
+        q50, q99 = asyncio.run(run_queued(n, args))
+        if args.skip_sequential or n > 100:
+            s50 = s99 = float("nan")  # sequential baseline takes minutes beyond this
+        else:
+            s50, s99 = asyncio.run(run_sequential(n, args))
+        print(f"{n:>8} {q50:>11.2f} {q99:>11.2f} {s50:>9.1f} {s99:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# bench_startup.py
+# Cold-start cost of a backend worker: imports, app construction and the first prediction.
+#
+#   python backend/benchmarks/bench_startup.py [--repeat 5] [--json]
+#
+# Every measurement runs in a fresh interpreter, so nothing is already
+# imported or cached. "first_predict.cold" is what the first trend cycle
+# paid before workers were warmed at startup; "first_predict.warm" is what
+# it pays now that the leader warms them while it loads the tick store.
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# name -> code run in a fresh interpreter; it prints the seconds it measured
+PROBES = {
+    "import.interpreter": "import time; t = time.perf_counter(); print(time.perf_counter() - t)",
+    "import.candles": "import time; t = time.perf_counter(); import backend.candles; print(time.perf_counter() - t)",
+    "import.trend_predictor_ai": (
+        "import time; t = time.perf_counter(); import backend.trend_predictor_ai; print(time.perf_counter() - t)"
+    ),
+    "import.main": "import time; t = time.perf_counter(); import backend.main; print(time.perf_counter() - t)",
+    "create_app": (
+        "import time, backend.main as m; t = time.perf_counter(); m.create_app(); print(time.perf_counter() - t)"
+    ),
+}
+
+FIRST_PREDICT = """
+import asyncio, sys, time
+import numpy as np
+from backend.prediction_scheduler import PredictionScheduler
+
+async def main(warm, mode):
+    scheduler = PredictionScheduler(mode=mode, workers=1)
+    windows = {"BTC": 100.0 + np.cumsum(np.random.default_rng(0).normal(0, 0.1, 60))}
+    if warm:
+        await scheduler.warm(60)
+    started = time.perf_counter()
+    await scheduler.predict(windows)
+    print(time.perf_counter() - started)
+    scheduler.shutdown()
+
+asyncio.run(main(sys.argv[1] == "warm", sys.argv[2]))
+"""
+
+
+def probe(code, *args):
+    env = dict(os.environ, TICK_STORE_DIR="")
+    output = subprocess.check_output([sys.executable, "-c", code, *args], cwd=ROOT, env=env, text=True)
+    return float(output.strip().splitlines()[-1])
+
+
+def run(repeat=5, mode="process"):
+    """Best-of-``repeat`` seconds for every probe, keyed by metric name."""
+    results = {}
+    for name, code in PROBES.items():
+        results[name] = min(probe(code) for _ in range(repeat))
+    for state in ("cold", "warm"):
+        results[f"first_predict.{state}"] = min(probe(FIRST_PREDICT, state, mode) for _ in range(repeat))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backend cold-start benchmark")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--mode", choices=["process", "thread", "inline"], default="process",
+                        help="PREDICTION_EXECUTOR for the first-prediction probes")
+    parser.add_argument("--json", action="store_true", help="print {metric: seconds} JSON only")
+    args = parser.parse_args()
+
+    results = run(args.repeat, args.mode)
+    if args.json:
+        print(json.dumps(results))
+        return
+    for name, seconds in results.items():
+        print(f"{name:<28} {seconds * 1e3:>10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+# bench_suite.py
+# Benchmark suite for the indicators, the predictor and the broadcast path.
+#
+#   python backend/benchmarks/bench_suite.py --output bench.json
+#   python backend/benchmarks/bench_suite.py --only indicators predict --compare bench.json
+#
+# Results are written as flat {metric: {"value", "unit", "better"}} JSON
+# together with the git commit, so two runs can be diffed with --compare.
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(BACKEND))
+
+from backend.anomaly_scanner import AnomalyScanner  # noqa: E402
+from backend.backtest import backtest_symbol  # noqa: E402
+from backend.tick_files import append_ticks  # noqa: E402
+from backend.trend_predictor_ai import AdvancedTrendPredictor  # noqa: E402
+
+WINDOWS = [30, 60, 240, 1000]
+SYMBOL_COUNTS = [4, 100, 1000, 10000]
+CLIENT_COUNTS = [10, 100, 500]
+BACKTEST_TICKS = 200_000
+
+
+def random_walks(n, window, seed=0):
+    rng = np.random.default_rng(seed)
+    return 100.0 * np.exp(np.cumsum(rng.normal(0, 0.002, size=(n, window)), axis=1))
+
+
+def time_call(fn, min_time=0.05, repeat=5):
+    """Best-of-``repeat`` seconds per call, auto-scaling the loop count."""
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or loops >= 1 << 20:
+            break
+        loops *= 2
+    best = elapsed / loops
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        best = min(best, (time.perf_counter() - start) / loops)
+    return best
+
+
+def metric(results, name, value, unit, better="lower"):
+    results[name] = {"value": float(value), "unit": unit, "better": better}
+
+
+def bench_indicators(results, args):
+    """Per-method cost of AdvancedTrendPredictor across window sizes."""
+    predictor = AdvancedTrendPredictor()
+    for window in WINDOWS:
+        prices = random_walks(1, window)[0]
+        price_list = prices.tolist()
+        state_methods = {
+            "calculate_rsi": lambda: predictor.calculate_rsi(prices),
+            "calculate_macd": lambda: predictor.calculate_macd(prices),
+            "calculate_bollinger_bands": lambda: predictor.calculate_bollinger_bands(prices),
+            "calculate_support_resistance": lambda: predictor.calculate_support_resistance(prices),
+            "calculate_volume_profile": lambda: predictor.calculate_volume_profile(prices),
+            "market_regime_detection": lambda: predictor.market_regime_detection(prices),
+            "machine_learning_features": lambda: predictor.machine_learning_features(prices),
+        }
+        for name, fn in state_methods.items():
+            metric(results, f"indicators.{name}.w{window}", time_call(fn) * 1e6, "us/call")
+
+        def replay_ensemble():
+            # Indicator state rebuilt from the window (no streamed ticks)
+            predictor.indicator_states.pop("BTC", None)
+            predictor.crypto_ensemble_prediction(prices, "BTC")
+
+        predictor.get_indicator_state("BTC", prices)
+
+        def streamed_ensemble():
+            # Indicator state already in sync: the live path after update_price
+            predictor.crypto_ensemble_prediction(prices, "BTC")
+
+        def list_predict():
+            predictor.predict_trend(price_list, "BTC")
+
+        metric(results, f"indicators.crypto_ensemble_prediction.replay.w{window}", time_call(replay_ensemble) * 1e6, "us/call")
+        metric(results, f"indicators.crypto_ensemble_prediction.streamed.w{window}", time_call(streamed_ensemble) * 1e6, "us/call")
+        metric(results, f"indicators.predict_trend.list_input.w{window}", time_call(list_predict) * 1e6, "us/call")
+
+        state = predictor.get_indicator_state("BTC", prices)
+        metric(results, f"indicators.update_price.w{window}", time_call(lambda: state.update(prices[-1])) * 1e6, "us/call")
+
+
+def bench_predict(results, args):
+    """End-to-end predictions per second for 4 .. 10k symbols."""
+    window = 60
+    for n in SYMBOL_COUNTS:
+        histories = random_walks(n, window + 1)
+        coins = [f"C{i}" for i in range(n)]
+
+        # Streaming path: one new tick per symbol, then predict_trend on the ring window
+        predictor = AdvancedTrendPredictor()
+        for coin, row in zip(coins, histories):
+            for price in row[:-1].tolist():
+                predictor.update_price(coin, price)
+        start = time.perf_counter()
+        for coin, row in zip(coins, histories):
+            predictor.update_price(coin, row[-1])
+            predictor.predict_trend(row[1:], coin)
+        streamed = time.perf_counter() - start
+
+        # Every repeat predicts the same windows: keep the stage cache out of the timings
+        batch_predictor = AdvancedTrendPredictor(cache_size=0)
+        batch = time_call(lambda: batch_predictor.predict_trends_batch(histories[:, 1:], coins), repeat=3)
+
+        metric(results, f"predict.streamed.n{n}", n / streamed, "symbols/s", "higher")
+        metric(results, f"predict.batch.n{n}", n / batch, "symbols/s", "higher")
+
+
+async def _fanout_round(n_clients, frames, interval):
+    """Real WebSocket fan-out: in-process uvicorn server + N websockets clients."""
+    import uvicorn
+    import websockets
+    from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+
+    from backend.broadcaster import Broadcaster
+    from backend.frames import Frame
+
+    broadcaster = Broadcaster(set())
+    app = FastAPI()
+
+    @app.websocket("/ws")
+    async def endpoint(websocket: WebSocket):
+        await websocket.accept()
+        broadcaster.register(websocket)
+        try:
+            while True:
+                await websocket.receive_text()
+        except WebSocketDisconnect:
+            pass
+        finally:
+            await broadcaster.unregister(websocket)
+
+    config = uvicorn.Config(app, host="127.0.0.1", port=0, log_level="error", ws_max_queue=frames * 2)
+    server = uvicorn.Server(config)
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    port = server.servers[0].sockets[0].getsockname()[1]
+
+    latencies = []
+
+    async def client():
+        async with websockets.connect(f"ws://127.0.0.1:{port}/ws", max_queue=None) as ws:
+            for _ in range(frames):
+                sent_at = json.loads(await ws.recv())["t"]
+                latencies.append(time.perf_counter() - sent_at)
+
+    clients = [asyncio.create_task(client()) for _ in range(n_clients)]
+    while len(broadcaster) < n_clients:
+        await asyncio.sleep(0.01)
+
+    # Fake price source: one snapshot frame per interval
+    for i in range(frames):
+        broadcaster.publish(Frame({"type": "prices", "t": time.perf_counter(), "i": i}), droppable=False)
+        await asyncio.sleep(interval)
+
+    await asyncio.wait_for(asyncio.gather(*clients), timeout=60)
+    server.should_exit = True
+    await server_task
+    return np.asarray(latencies)
+
+
+def bench_fanout(results, args):
+    for n in CLIENT_COUNTS:
+        latencies = asyncio.run(_fanout_round(n, frames=args.frames, interval=0.1)) * 1e3
+        metric(results, f"fanout.p50_ms.c{n}", np.percentile(latencies, 50), "ms")
+        metric(results, f"fanout.p99_ms.c{n}", np.percentile(latencies, 99), "ms")
+
+
+def bench_anomaly(results, args):
+    """One anomaly scan over a tick for every symbol, 4 .. 10k symbols."""
+    for n in SYMBOL_COUNTS:
+        scanner = AnomalyScanner()
+        coins = [f"C{i}" for i in range(n)]
+        paths = random_walks(n, 240, seed=n)
+        step = iter(range(1 << 30))
+
+        def scan():
+            i = next(step)
+            scanner.scan(coins, paths[:, i % 240], np.full(n, float(i)))
+
+        for _ in range(scanner.warmup + 1):
+            scan()
+        seconds = time_call(scan)
+        metric(results, f"anomaly.scan_us.n{n}", seconds * 1e6, "us/scan")
+        metric(results, f"anomaly.ticks_per_s.n{n}", n / seconds, "ticks/s", "higher")
+
+
+def bench_backtest(results, args):
+    """Backtest replay throughput over one recorded symbol, every tick and every 5th."""
+    prices = random_walks(1, BACKTEST_TICKS)[0]
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "BTC.ticks")
+        append_ticks(path, [(np.arange(len(prices), dtype=np.float64), prices)])
+        for stride in (1, 5):
+            started = time.perf_counter()
+            backtest_symbol(path, stride=stride)
+            seconds = time.perf_counter() - started
+            metric(results, f"backtest.ticks_per_s.s{stride}", len(prices) / seconds, "ticks/s", "higher")
+
+
+def bench_startup(results, args):
+    """Cold-start imports, app factory and first prediction (bench_startup.py)."""
+    script = os.path.join(BACKEND, "benchmarks", "bench_startup.py")
+    output = subprocess.check_output([sys.executable, script, "--json", "--repeat", "3"], text=True)
+    for name, seconds in json.loads(output).items():
+        metric(results, f"startup.{name}", seconds * 1e3, "ms")
+
+
+SUITES = {"indicators": bench_indicators, "predict": bench_predict, "fanout": bench_fanout, "anomaly": bench_anomaly,
+          "backtest": bench_backtest, "startup": bench_startup}
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=BACKEND, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)["results"]
+    print(f"\n{'metric':<56} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, current in results.items():
+        base = baseline.get(name)
+        if base is None or base["value"] == 0:
+            continue
+        ratio = current["value"] / base["value"]
+        worse = ratio > 1 if current["better"] == "lower" else ratio < 1
+        flag = "  !" if worse and abs(ratio - 1) > 0.1 else ""
+        print(f"{name:<56} {base['value']:>12.3f} {current['value']:>12.3f} {ratio - 1:>+7.1%}{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Trend predictor / broadcast benchmark suite")
+    parser.add_argument("--only", nargs="+", choices=sorted(SUITES), default=list(SUITES))
+    parser.add_argument("--frames", type=int, default=20, help="frames per fan-out round")
+    parser.add_argument("--output", help="write results JSON to this path")
+    parser.add_argument("--compare", help="baseline results JSON to diff against")
+    args = parser.parse_args()
+
+    # The predictor print()s pump/dump warnings; keep benchmark output readable
+    results = {}
+    for name in args.only:
+        started = time.perf_counter()
+        with open(os.devnull, "w") as sink:
+            stdout, sys.stdout = sys.stdout, sink
+            try:
+                SUITES[name](results, args)
+            finally:
+                sys.stdout = stdout
+        print(f"{name}: {time.perf_counter() - started:.1f}s")
+
+    width = max(len(name) for name in results)
+    for name, entry in results.items():
+        print(f"{name:<{width}} {entry['value']:>14.3f} {entry['unit']}")
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+# binance_ingest.py
+# Streaming Binance ingest: combined WebSocket feed with a pooled REST fallback.
+#
+# REST polling is budgeted against the exchange's request-weight limit (see
+# ingest_budget.py): as the budget fills, the poll interval stretches and
+# low-priority symbols are polled only every LOW_PRIORITY_EVERY cycles, and
+# not at all once it is nearly spent.
+import asyncio
+import json
+import os
+import random
+import time
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, Set
+
+# httpx / websockets (pip install httpx websockets) are imported on first use:
+# only the bus leader ingests, so follower workers never pay for them
+if TYPE_CHECKING:
+    import httpx
+
+from .ingest_budget import BULK_WEIGHT, SINGLE_WEIGHT, Cadence, RateLimited, WeightBudget
+from .metrics import (ingest_errors_total, ingest_fetch_seconds, ingest_shed_total, ingest_stage_seconds,
+                      ingest_ticks_total, ingest_weight_pressure, ingest_weight_used, stage_timer)
+from .symbols import coin_of
+
+# Base URLs are configurable so the ingest can run against fake_binance.py
+BINANCE_REST_URL = os.environ.get("BINANCE_REST_URL", "https://api.binance.com")
+BINANCE_WS_URL = os.environ.get("BINANCE_WS_URL", "wss://stream.binance.com:9443")
+
+# "websocket" (default, REST while reconnecting) or "rest" (bulk polling only)
+INGEST_MODE = os.environ.get("INGEST_MODE", "websocket")
+
+# Budget pressure above which low-priority symbols are polled every LOW_PRIORITY_EVERY cycles...
+SHED_PRESSURE = float(os.environ.get("INGEST_SHED_PRESSURE", "0.5"))
+LOW_PRIORITY_EVERY = int(os.environ.get("INGEST_LOW_PRIORITY_EVERY", "5"))
+# ...and above which they are not polled at all
+DROP_PRESSURE = 0.9
+# Poll interval multiplier when the budget is exhausted (1x up to SHED_PRESSURE)
+MAX_STRETCH = float(os.environ.get("INGEST_MAX_STRETCH", "5"))
+
+# Seconds a pair the exchange rejected is left out of the bulk request
+REJECT_RETRY = 60.0
+
+TickCallback = Callable[[str, float, float], None]
+
+
+class BinanceIngest:
+    """Feeds ticks for ``symbols`` into ``on_tick(coin, price, timestamp)``."""
+
+    def __init__(
+        self,
+        symbols: Iterable[str],
+        on_tick: TickCallback,
+        rest_url: str = BINANCE_REST_URL,
+        ws_url: str = BINANCE_WS_URL,
+        poll_interval: float = 1.0,
+        min_backoff: float = 1.0,
+        max_backoff: float = 30.0,
+        low_priority: Iterable[str] = (),
+        budget: Optional[WeightBudget] = None,
+    ):
+        self.symbols = list(symbols)
+        self._tracked = set(self.symbols)
+        self.low_priority: Set[str] = set(low_priority)
+        self.on_tick = on_tick
+        self.rest_url = rest_url.rstrip("/")
+        self.ws_url = ws_url.rstrip("/")
+        self.poll_interval = poll_interval
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self._client: Optional["httpx.AsyncClient"] = None
+        self._ws = None
+        self._request_id = 0
+        self.budget = budget or WeightBudget()
+        self._rejected: Dict[str, float] = {}  # symbol -> monotonic time it may be bulk-requested again
+        self._cycle = 0
+        ingest_weight_used.set_function(lambda: self.budget.used)
+        ingest_weight_pressure.set_function(self.budget.pressure)
+
+    def set_symbols(self, symbols: Iterable[str], low_priority: Optional[Iterable[str]] = None):
+        """Change the tracked pairs; a live stream is (un)subscribed in place."""
+        old = self._tracked
+        self.symbols = list(symbols)
+        self._tracked = set(self.symbols)
+        if low_priority is not None:
+            self.low_priority = set(low_priority)
+        if self._ws is not None:
+            asyncio.ensure_future(self._resubscribe(self._tracked - old, old - self._tracked))
+
+    async def _resubscribe(self, added, removed):
+        ws = self._ws
+        try:
+            for method, symbols in (("SUBSCRIBE", added), ("UNSUBSCRIBE", removed)):
+                if symbols:
+                    self._request_id += 1
+                    params = [f"{s.lower()}@miniTicker" for s in sorted(symbols)]
+                    await ws.send(json.dumps({"method": method, "params": params, "id": self._request_id}))
+        except Exception as e:
+            # The reconnect that follows uses the new stream URL anyway
+            print(f"⚠️ Binance resubscribe error: {e}")
+
+    @property
+    def stream_url(self) -> str:
+        streams = "/".join(f"{s.lower()}@miniTicker" for s in self.symbols)
+        return f"{self.ws_url}/stream?streams={streams}"
+
+    def client(self) -> "httpx.AsyncClient":
+        # One persistent, pooled client: TLS is negotiated once, not every cycle
+        if self._client is None or self._client.is_closed:
+            import httpx
+            self._client = httpx.AsyncClient(base_url=self.rest_url, timeout=10.0)
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _get(self, weight: int, **params) -> "httpx.Response":
+        """One ``ticker/price`` request charged to the weight budget.
+
+        Raises RateLimited instead of sending when the budget or a Retry-After
+        says wait, and when the exchange answers 429 / 418.
+        """
+        delay = self.budget.wait(weight)
+        if delay > 0:
+            raise RateLimited(delay)
+        self.budget.spend(weight)
+        with stage_timer(ingest_stage_seconds, "binance_ingest", "request"):
+            resp = await self.client().get("/api/v3/ticker/price", params=params)
+        self.budget.observe(resp.status_code, resp.headers)
+        if resp.status_code in (418, 429):
+            raise RateLimited(self.budget.wait(weight))
+        return resp
+
+    async def fetch_price(self, symbol: str) -> float:
+        """One symbol's price; raises for pairs the exchange doesn't know."""
+        resp = await self._get(SINGLE_WEIGHT, symbol=symbol)
+        resp.raise_for_status()
+        return float(resp.json()["price"])
+
+    async def fetch_prices(self, symbols: Optional[List[str]] = None) -> Dict[str, float]:
+        """Prices for ``symbols`` (default: all) by coin, in one bulk ``ticker/price`` request.
+
+        Pairs that fail on their own are left out; the rest are still returned.
+        """
+        symbols = self.symbols if symbols is None else symbols
+        now = time.monotonic()
+        bulk = [s for s in symbols if self._rejected.get(s, 0.0) <= now]
+        if not bulk:
+            return {}
+        resp = await self._get(BULK_WEIGHT, symbols=json.dumps(bulk, separators=(",", ":")))
+        if resp.status_code != 400:
+            resp.raise_for_status()
+            with stage_timer(ingest_stage_seconds, "binance_ingest", "parse"):
+                return {coin_of(item["symbol"]): float(item["price"]) for item in resp.json()}
+        # One unknown or delisted pair fails the whole bulk request: ask per symbol and keep the rest
+        return await self._fetch_each(bulk)
+
+    async def _fetch_each(self, symbols: List[str]) -> Dict[str, float]:
+        affordable = [s for i, s in enumerate(symbols) if not self.budget.wait(SINGLE_WEIGHT * (i + 1))]
+        results = await asyncio.gather(*(self.fetch_price(s) for s in affordable), return_exceptions=True)
+        prices = {}
+        for symbol, result in zip(affordable, results):
+            if not isinstance(result, Exception):
+                prices[coin_of(symbol)] = result
+                continue
+            response = getattr(result, "response", None)
+            if response is not None and response.status_code == 400:
+                self._rejected[symbol] = time.monotonic() + REJECT_RETRY
+                print(f"⚠️ Binance rejected {symbol}; left out of the bulk request for {REJECT_RETRY:.0f}s")
+            else:
+                ingest_errors_total.labels("rest").inc()
+        return prices
+
+    def due_symbols(self) -> List[str]:
+        """This cycle's pairs: all of them, minus low-priority ones as the budget fills."""
+        self._cycle += 1
+        pressure = self.budget.pressure()
+        if pressure < SHED_PRESSURE or not self.low_priority:
+            return list(self.symbols)
+        if pressure < DROP_PRESSURE and self._cycle % LOW_PRIORITY_EVERY == 0:
+            return list(self.symbols)
+        due = [s for s in self.symbols if s not in self.low_priority]
+        ingest_shed_total.inc(len(self.symbols) - len(due))
+        return due
+
+    def stretch(self) -> float:
+        """Poll interval multiplier: 1 up to SHED_PRESSURE, MAX_STRETCH with the budget spent."""
+        over = max(0.0, self.budget.pressure() - SHED_PRESSURE) / (1.0 - SHED_PRESSURE)
+        return 1.0 + over * (MAX_STRETCH - 1.0)
+
+    async def poll_once(self) -> Dict[str, float]:
+        started = time.perf_counter()
+        prices = await self.fetch_prices(self.due_symbols())
+        # One bulk request serves every symbol: each one waited the full round trip
+        elapsed = time.perf_counter() - started
+        now = time.time()
+        with stage_timer(ingest_stage_seconds, "binance_ingest", "dispatch"):
+            for coin, price in prices.items():
+                ingest_fetch_seconds.labels("rest", coin).observe(elapsed)
+                self.on_tick(coin, price, now)
+        ingest_ticks_total.labels("rest").inc(len(prices))
+        return prices
+
+    async def run_rest(self, until: Optional[float] = None):
+        """Poll on a steady ``poll_interval`` cadence (optionally until a deadline).
+
+        The fetch time comes out of the interval, the interval stretches with
+        budget pressure, and a Retry-After pauses polling altogether.
+        """
+        cadence = Cadence(self.poll_interval, "rest")
+        while until is None or time.monotonic() < until:
+            try:
+                await self.poll_once()
+            except RateLimited as e:
+                pause = e.retry_after if until is None else min(e.retry_after, max(0.0, until - time.monotonic()))
+                await asyncio.sleep(pause)
+                cadence.reset()
+                continue
+            except Exception as e:
+                ingest_errors_total.labels("rest").inc()
+                print(f"⚠️ Binance REST fetch error: {e}")
+            await cadence.wait(self.poll_interval * self.stretch())
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            "symbols": len(self.symbols),
+            "low_priority": len(self.low_priority & self._tracked),
+            "rejected": sorted(s for s, until in self._rejected.items() if until > now),
+            "weight": self.budget.stats(),
+        }
+
+    def handle_message(self, raw) -> bool:
+        """Parse one combined-stream frame; returns True if it carried a tick."""
+        with stage_timer(ingest_stage_seconds, "binance_ingest", "parse"):
+            payload = json.loads(raw)
+        data = payload.get("data", payload)
+        symbol, price = data.get("s"), data.get("c")
+        if not symbol or price is None or symbol not in self._tracked:
+            return False
+        now = time.time()
+        event_time = data.get("E")
+        timestamp = event_time / 1000.0 if event_time else now
+        coin = coin_of(symbol)
+        # Exchange event time -> receipt (includes clock skew against Binance)
+        ingest_fetch_seconds.labels("websocket", coin).observe(max(0.0, now - timestamp))
+        ingest_ticks_total.labels("websocket").inc()
+        with stage_timer(ingest_stage_seconds, "binance_ingest", "dispatch"):
+            self.on_tick(coin, float(price), timestamp)
+        return True
+
+    async def run_websocket(self):
+        """Read the combined stream, reconnecting with exponential backoff.
+
+        While disconnected the REST fallback keeps the history moving.
+        """
+        import websockets
+
+        backoff = self.min_backoff
+        while True:
+            if not self.symbols:
+                await asyncio.sleep(self.poll_interval)
+                continue
+            try:
+                async with websockets.connect(self.stream_url, ping_interval=20) as ws:
+                    print("📡 Binance stream connected")
+                    self._ws = ws
+                    async for raw in ws:
+                        if self.handle_message(raw):
+                            backoff = self.min_backoff
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                ingest_errors_total.labels("websocket").inc()
+                print(f"⚠️ Binance stream error: {e}")
+            finally:
+                self._ws = None
+
+            # Full jitter so many workers don't reconnect in lockstep
+            delay = random.uniform(self.min_backoff, backoff)
+            print(f"🔁 Reconnecting Binance stream in {delay:.1f}s (REST fallback active)")
+            await self.run_rest(until=time.monotonic() + delay)
+            backoff = min(backoff * 2, self.max_backoff)
+
+    async def run(self, mode: str = INGEST_MODE):
+        try:
+            if mode == "rest":
+                await self.run_rest()
+            else:
+                await self.run_websocket()
+        finally:
+            await self.close()
@@ -0,0 +1,228 @@
+# broadcaster.py
+# Non-blocking WebSocket fan-out: one bounded outbound queue + writer task per client.
+import asyncio
+from collections import deque
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+from .frames import JSON, Frame, encode
+from .metrics import bytes_sent_total, clients_evicted_total, frames_dropped_total, frames_sent_total
+from .subscriptions import ALL_SYMBOLS, Subscription
+
+# Shared set of live websockets (kept in sync by the Broadcaster)
+connected_clients = set()
+
+
+class ClientConnection:
+    """Outbound state for one websocket.
+
+    Droppable frames (prices) are coalesced: only the newest pending one is
+    kept, so a slow client skips stale prices instead of falling behind.
+    Non-droppable frames (trends) are queued in order and always delivered,
+    up to ``max_queue``; a client that far behind is evicted.
+
+    Once a client subscribes it stops receiving the shared snapshot frames
+    and instead gets per-client delta frames for the (stream, symbol) pairs
+    it watches, built from the broadcaster's latest state at send time.
+    """
+
+    def __init__(self, websocket, broadcaster, max_queue: int, send_timeout: float, fmt: str = JSON):
+        self.websocket = websocket
+        self.fmt = fmt
+        self.broadcaster = broadcaster
+        self.max_queue = max_queue
+        self.send_timeout = send_timeout
+        self.queue = deque()
+        self.latest = None  # newest pending droppable frame
+        self.subscription: Optional[Subscription] = None
+        self.dirty = set()  # (stream, symbol) pairs updated since the last delta
+        self.dropped = 0
+        self.sent = 0
+        self.closed = False
+        self._wakeup = asyncio.Event()
+        self.task = asyncio.create_task(self._writer())
+
+    @property
+    def depth(self) -> int:
+        return len(self.queue) + (self.latest is not None) + bool(self.dirty)
+
+    def subscribe(self, message):
+        """Apply a subscribe/unsubscribe message and push current state for new pairs."""
+        if self.subscription is None:
+            self.subscription = Subscription()
+            self.latest = None
+        added = self.subscription.apply(message)
+        for stream, symbol in added:
+            symbols = self.broadcaster.latest.get(stream, {}) if symbol == ALL_SYMBOLS else [symbol]
+            self.dirty.update((stream, s) for s in symbols)
+        self.offer(Frame({"type": "subscribed", "streams": self.subscription.describe()}), droppable=False)
+
+    def mark(self, stream: str, symbol: str):
+        if not self.closed and self.subscription is not None and self.subscription.wants(stream, symbol):
+            self.dirty.add((stream, symbol))
+            self._wakeup.set()
+
+    def _delta_frame(self):
+        pairs, self.dirty = self.dirty, set()
+        streams = {}
+        for stream, symbol in pairs:
+            fields = self.broadcaster.latest.get(stream, {}).get(symbol)
+            if fields is None:
+                continue
+            changed = self.subscription.delta(stream, symbol, fields)
+            if changed:
+                streams.setdefault(stream, {})[symbol] = changed
+        if not streams:
+            return None
+        payload = {"type": "delta", "timestamp": datetime.now().isoformat(), **streams}
+        # Deltas are per client, so they are encoded per client
+        return encode(payload, self.fmt)
+
+    def offer(self, message, droppable: bool) -> bool:
+        """Queue a frame without blocking; returns False if the client was evicted."""
+        if self.closed:
+            return False
+        if droppable:
+            if self.latest is not None:
+                self.dropped += 1
+                frames_dropped_total.labels("coalesced").inc()
+            self.latest = message
+        else:
+            if len(self.queue) >= self.max_queue:
+                print("Removing slow client: outbound queue full")
+                self.broadcaster.evict(self, "queue_full")
+                return False
+            self.queue.append(message)
+        self._wakeup.set()
+        return True
+
+    async def _send(self, message):
+        if isinstance(message, Frame):
+            # Shared frames are serialized once per format, not once per client
+            message = message.encoded(self.fmt)
+        if isinstance(message, bytes):
+            await self.websocket.send_bytes(message)
+        else:
+            await self.websocket.send_text(message)
+        frames_sent_total.labels(self.fmt).inc()
+        bytes_sent_total.labels(self.fmt).inc(len(message))
+
+    async def _writer(self):
+        try:
+            # ``closed`` is checked as well as relying on cancellation: wait_for swallows
+            # a cancel that lands just as the send completes (Python < 3.12)
+            while not self.closed:
+                await self._wakeup.wait()
+                self._wakeup.clear()
+                while not self.closed and (self.queue or self.dirty or self.latest is not None):
+                    if self.queue:
+                        message = self.queue.popleft()
+                    elif self.dirty:
+                        message = self._delta_frame()
+                        if message is None:
+                            continue
+                    else:
+                        message, self.latest = self.latest, None
+                    await asyncio.wait_for(self._send(message), self.send_timeout)
+                    self.sent += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print("Removing dead client:", e)
+            self.broadcaster.evict(self, "send_error")
+
+
+class Broadcaster:
+    """Registry of client connections; ``publish`` never awaits a socket."""
+
+    def __init__(self, clients: Optional[set] = None, max_queue: int = 256, send_timeout: float = 10.0):
+        self.clients = connected_clients if clients is None else clients
+        self.max_queue = max_queue
+        self.send_timeout = send_timeout
+        self.connections: Dict[object, ClientConnection] = {}
+        # stream -> symbol -> latest fields, the source for subscriber deltas
+        self.latest: Dict[str, Dict[str, dict]] = {}
+        # Set on the bus leader: every publish/update is mirrored to follower workers
+        self.relay: Optional[Callable[[dict], None]] = None
+
+    def register(self, websocket, fmt: str = JSON) -> ClientConnection:
+        connection = ClientConnection(websocket, self, self.max_queue, self.send_timeout, fmt)
+        self.connections[websocket] = connection
+        self.clients.add(websocket)
+        return connection
+
+    def evict(self, connection: ClientConnection, reason: str = "other"):
+        """Drop a connection from the registry and stop its writer (idempotent)."""
+        if connection.closed:
+            return
+        connection.closed = True
+        clients_evicted_total.labels(reason).inc()
+        # Everything still queued for the client is lost with it
+        frames_dropped_total.labels("evicted").inc(connection.depth)
+        self.connections.pop(connection.websocket, None)
+        self.clients.discard(connection.websocket)
+        if connection.task is not asyncio.current_task():
+            connection.task.cancel()
+        asyncio.ensure_future(self._close(connection.websocket))
+
+    async def _close(self, websocket):
+        try:
+            await websocket.close()
+        except Exception:
+            pass
+
+    async def unregister(self, websocket):
+        connection = self.connections.get(websocket)
+        if connection is not None:
+            connection.closed = True
+            self.connections.pop(websocket, None)
+            self.clients.discard(websocket)
+            connection.task.cancel()
+            try:
+                await connection.task
+            except (asyncio.CancelledError, Exception):
+                pass
+
+    def publish(self, message, droppable: bool = False) -> int:
+        """Hand ``message`` to every unsubscribed client's queue; returns the recipient count."""
+        if self.relay is not None and isinstance(message, Frame):
+            self.relay({"kind": "publish", "payload": message.payload, "droppable": droppable})
+        delivered = 0
+        for connection in list(self.connections.values()):
+            if connection.subscription is not None:
+                continue  # subscribed clients get deltas instead of snapshots
+            if connection.offer(message, droppable):
+                delivered += 1
+        return delivered
+
+    def update(self, stream: str, symbol: str, fields: dict, sequence: Optional[int] = None):
+        """Record the latest fields for (stream, symbol) and wake its subscribers.
+
+        ``sequence`` (the tick sequence the fields were computed at) is only relayed.
+        """
+        self.latest.setdefault(stream, {})[symbol] = fields
+        if self.relay is not None:
+            self.relay({"kind": "update", "stream": stream, "symbol": symbol, "fields": fields, "sequence": sequence})
+        for connection in self.connections.values():
+            connection.mark(stream, symbol)
+
+    def forget(self, symbol: str):
+        """Drop a removed symbol's latest state (followers do the same)."""
+        for symbols in self.latest.values():
+            symbols.pop(symbol, None)
+        self.forward({"kind": "forget", "coin": symbol})
+
+    def forward(self, event: dict):
+        """Relay a non-frame event (e.g. a raw tick) to followers, if any."""
+        if self.relay is not None:
+            self.relay(event)
+
+    def queue_depths(self):
+        return [connection.depth for connection in self.connections.values()]
+
+    def __len__(self):
+        return len(self.connections)
+
+
+# Process-wide broadcaster used by the price and trend loops
+broadcaster = Broadcaster(connected_clients)
@@ -0,0 +1,297 @@
+# bus.py
+# Leader/follower event bus for running several backend workers.
+#
+# Exactly one process is the leader: it ingests ticks, runs predictions and
+# relays every broadcaster event onto the bus. All other workers are
+# stateless followers that mirror those events into their own broadcaster
+# and only serve client connections.
+#
+#   BUS_URL=memory://                      single process (default)
+#   BUS_URL=unix:///tmp/cryptic-bus.sock   local socket hub, hosted by the leader
+#                                          (elected by a flock on <path>.lock)
+#   BUS_URL=tcp://127.0.0.1:7070           same over TCP (several hosts)
+#   BUS_URL=redis://localhost:6379/0       Redis pub/sub + lease lock (pip install redis)
+#
+# Events are JSON objects, one per line on the socket backends.
+import asyncio
+import json
+import os
+import random
+import uuid
+from typing import Awaitable, Callable, List, Optional
+from urllib.parse import urlparse
+
+BUS_URL = os.environ.get("BUS_URL", "memory://")
+
+Event = dict
+EventHandler = Callable[[Event], None]
+Callback = Callable[[], Awaitable[None]]
+SnapshotProvider = Callable[[], List[Event]]
+
+# A follower further behind than this many buffered bytes is disconnected
+MAX_FOLLOWER_BUFFER = 8 * 1024 * 1024
+
+
+def _encode(event: Event) -> bytes:
+    return json.dumps(event, separators=(",", ":")).encode() + b"\n"
+
+
+class Bus:
+    """Base class: election plus leader -> follower event delivery."""
+
+    def __init__(self):
+        self.is_leader = False
+        # Leader side: events a newly joined follower needs before the live stream
+        self.snapshot: SnapshotProvider = lambda: []
+
+    def send(self, event: Event):
+        """Leader only: deliver ``event`` to every follower without blocking."""
+        raise NotImplementedError
+
+    async def run(self, on_event: EventHandler, on_leader: Callback, on_demote: Callback):
+        """Campaign for leadership forever; follow the current leader meanwhile."""
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        return {"backend": type(self).__name__, "leader": self.is_leader}
+
+
+class MemoryBus(Bus):
+    """In-process bus: this process is always the leader.
+
+    ``listen`` attaches in-process followers, which is how the
+    leader/follower wiring is exercised without any network.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.listeners: List[EventHandler] = []
+
+    def listen(self, handler: EventHandler):
+        for event in self.snapshot():
+            handler(event)
+        self.listeners.append(handler)
+
+    def send(self, event: Event):
+        for handler in self.listeners:
+            handler(event)
+
+    async def run(self, on_event, on_leader, on_demote):
+        self.is_leader = True
+        await on_leader()
+        await asyncio.Event().wait()
+
+
+class SocketBus(Bus):
+    """Local-socket hub: whoever binds the address leads, everyone else connects.
+
+    When the leader goes away its followers reconnect; the first one that
+    finds the address free binds it and takes over ingest.
+    """
+
+    def __init__(self, url: str, retry: float = 1.0):
+        super().__init__()
+        parsed = urlparse(url)
+        self.scheme = parsed.scheme
+        self.path = parsed.path
+        self.host = parsed.hostname
+        self.port = parsed.port
+        self.retry = retry
+        self.followers = set()
+        self.server = None
+        self._lock: Optional[int] = None  # leader lock file descriptor (unix only)
+
+    async def _connect(self):
+        if self.scheme == "unix":
+            return await asyncio.open_unix_connection(self.path)
+        return await asyncio.open_connection(self.host, self.port)
+
+    async def _bind(self):
+        if self.scheme == "unix":
+            # A failed connect doesn't prove the socket is stale (the leader may be busy or
+            # another follower may have just bound it): only the lock holder may replace it
+            self._lock = self._acquire_lock()
+            try:
+                if os.path.exists(self.path):
+                    os.unlink(self.path)
+                return await asyncio.start_unix_server(self._on_follower, self.path)
+            except OSError:
+                self._release_lock()
+                raise
+        return await asyncio.start_server(self._on_follower, self.host, self.port)
+
+    def _acquire_lock(self) -> int:
+        """Take the leader lock file next to the socket; raises OSError while another worker holds it."""
+        import fcntl  # unix sockets only
+        fd = os.open(self.path + ".lock", os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            raise
+        return fd
+
+    def _release_lock(self):
+        if self._lock is not None:
+            os.close(self._lock)  # closing the descriptor drops the flock
+            self._lock = None
+
+    async def _on_follower(self, reader, writer):
+        for event in self.snapshot():
+            writer.write(_encode(event))
+        self.followers.add(writer)
+        try:
+            await reader.read()  # followers never send; EOF means they left
+        finally:
+            self.followers.discard(writer)
+            writer.close()
+
+    def send(self, event: Event):
+        if not self.followers:
+            return
+        line = _encode(event)
+        for writer in list(self.followers):
+            if writer.transport.get_write_buffer_size() > MAX_FOLLOWER_BUFFER:
+                print("Dropping slow bus follower")
+                self.followers.discard(writer)
+                writer.close()
+            else:
+                writer.write(line)
+
+    async def _follow(self, reader, writer, on_event):
+        print(f"🛰️ Following bus leader at {self.scheme}://{self.path or f'{self.host}:{self.port}'}")
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    return
+                try:
+                    on_event(json.loads(line))
+                except Exception as e:
+                    print("Bus event error:", e)
+        finally:
+            writer.close()
+
+    async def run(self, on_event, on_leader, on_demote):
+        while True:
+            try:
+                reader, writer = await self._connect()
+            except OSError:
+                try:
+                    self.server = await self._bind()
+                except OSError:
+                    # Someone else bound it first: follow them on the next pass
+                    await asyncio.sleep(random.uniform(0, self.retry))
+                    continue
+                self.is_leader = True
+                print("👑 Bus leader: this worker runs ingest and predictions")
+                try:
+                    await on_leader()
+                    await asyncio.Event().wait()
+                finally:
+                    self.server.close()
+                    # Hang up on followers too so they re-elect right away
+                    for writer in list(self.followers):
+                        writer.close()
+                    self._release_lock()
+            await self._follow(reader, writer, on_event)
+            await asyncio.sleep(random.uniform(0, self.retry))
+
+    def stats(self) -> dict:
+        return {**super().stats(), "followers": len(self.followers)}
+
+
+class RedisBus(Bus):
+    """Redis pub/sub for events plus a renewed lease key for leader election.
+
+    A follower that joins publishes a hello on the control channel; the
+    leader answers by re-publishing its snapshot (snapshot events are
+    idempotent, so other followers just re-apply them).
+    """
+
+    RENEW_SCRIPT = (
+        "if redis.call('get', KEYS[1]) == ARGV[1] then "
+        "return redis.call('pexpire', KEYS[1], ARGV[2]) else return 0 end"
+    )
+
+    def __init__(self, url: str, prefix: str = "cryptic", lease: float = 10.0):
+        super().__init__()
+        try:
+            import redis.asyncio as aioredis  # optional: pip install redis
+        except ImportError:
+            raise RuntimeError("BUS_URL=redis://... needs the redis package (pip install redis)") from None
+        self.redis = aioredis.from_url(url)
+        self.channel = f"{prefix}:events"
+        self.control = f"{prefix}:control"
+        self.lock_key = f"{prefix}:leader"
+        self.lease = lease
+        self.identity = uuid.uuid4().hex
+        self._outbox: Optional[asyncio.Queue] = None
+
+    def send(self, event: Event):
+        if self._outbox is not None:
+            self._outbox.put_nowait(_encode(event))
+
+    async def _publisher(self):
+        while True:
+            line = await self._outbox.get()
+            await self.redis.publish(self.channel, line)
+
+    async def _answer_hellos(self):
+        pubsub = self.redis.pubsub()
+        await pubsub.subscribe(self.control)
+        async for message in pubsub.listen():
+            if message["type"] == "message":
+                for event in self.snapshot():
+                    self.send(event)
+
+    async def _lead(self, on_leader, on_demote):
+        self.is_leader = True
+        self._outbox = asyncio.Queue()
+        print("👑 Bus leader: this worker runs ingest and predictions")
+        tasks = [asyncio.create_task(self._publisher()), asyncio.create_task(self._answer_hellos())]
+        await on_leader()
+        try:
+            lease_ms = int(self.lease * 1000)
+            while True:
+                await asyncio.sleep(self.lease / 3)
+                if not await self.redis.eval(self.RENEW_SCRIPT, 1, self.lock_key, self.identity, lease_ms):
+                    print("⚠️ Bus leadership lost")
+                    return
+        finally:
+            for task in tasks:
+                task.cancel()
+            self.is_leader = False
+            self._outbox = None
+            await on_demote()
+
+    async def run(self, on_event, on_leader, on_demote):
+        pubsub = self.redis.pubsub()
+        await pubsub.subscribe(self.channel)
+        await self.redis.publish(self.control, self.identity)
+        while True:
+            if await self.redis.set(self.lock_key, self.identity, nx=True, px=int(self.lease * 1000)):
+                await pubsub.unsubscribe(self.channel)
+                await self._lead(on_leader, on_demote)
+                await pubsub.subscribe(self.channel)
+                continue
+            # Follow until the lease could have expired, then campaign again
+            deadline = asyncio.get_running_loop().time() + self.lease / 3
+            while asyncio.get_running_loop().time() < deadline:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=0.5)
+                if message is not None:
+                    try:
+                        on_event(json.loads(message["data"]))
+                    except Exception as e:
+                        print("Bus event error:", e)
+
+
+def make_bus(url: str = BUS_URL) -> Bus:
+    scheme = urlparse(url).scheme
+    if scheme in ("", "memory"):
+        return MemoryBus()
+    if scheme in ("unix", "tcp"):
+        return SocketBus(url)
+    if scheme in ("redis", "rediss"):
+        return RedisBus(url)
+    raise ValueError(f"Unsupported BUS_URL scheme: {scheme!r}")
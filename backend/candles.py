@@ -0,0 +1,185 @@
+# candles.py
+# Incremental multi-timeframe OHLC aggregation of the tick stream.
+#
+# Each (symbol, timeframe) keeps a fixed number of bars in one preallocated
+# float64 array, so a 1h series costs the same memory as a 1m series and a
+# tick is folded into every timeframe in O(1).
+import os
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+# Bars kept per symbol and timeframe
+CANDLE_CAPACITY = int(os.environ.get("CANDLE_CAPACITY", "240"))
+
+# Columns of a bar row
+TIME, OPEN, HIGH, LOW, CLOSE, TICKS = range(6)
+COLUMNS = ("time", "open", "high", "low", "close", "ticks")
+
+
+def timeframe_seconds(timeframe: str) -> float:
+    """``"15m"`` -> 900.0; units are s, m, h and d."""
+    units = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+    try:
+        return float(timeframe[:-1]) * units[timeframe[-1]]
+    except (KeyError, ValueError, IndexError):
+        raise ValueError(f"Unknown timeframe: {timeframe!r}") from None
+
+
+# Bar length in seconds per timeframe name (defaults to the dashboard's chart timeframes)
+TIMEFRAMES = {
+    tf.strip(): timeframe_seconds(tf.strip())
+    for tf in os.environ.get("CANDLE_TIMEFRAMES", "1m,15m,1h").split(",")
+    if tf.strip()
+}
+
+
+def format_duration(seconds: float) -> str:
+    """900 -> ``"15m"``, 86400 -> ``"24h"`` (largest unit that divides evenly)."""
+    for unit, size in (("h", 3600), ("m", 60)):
+        if seconds >= size and seconds % size == 0:
+            return f"{int(seconds // size)}{unit}"
+    return f"{seconds:g}s"
+
+
+class CandleSeries:
+    """Fixed-capacity OHLC bars for one symbol at one bar length.
+
+    Bars live in a (2 * capacity, 6) array written twice, like PriceRing, so
+    the last ``n`` bars are always one contiguous read-only view. The newest
+    bar is the one still forming; gaps with no ticks produce no bars.
+    """
+
+    __slots__ = ("seconds", "capacity", "size", "count", "_head", "_bars")
+
+    def __init__(self, seconds: float, capacity: int = CANDLE_CAPACITY):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.seconds = float(seconds)
+        self.capacity = capacity
+        self.size = 0  # bars currently held (<= capacity)
+        self.count = 0  # bars ever opened
+        self._head = 0  # next write position in [0, capacity)
+        self._bars = np.zeros((2 * capacity, len(COLUMNS)), dtype=np.float64)
+
+    def _last_index(self) -> int:
+        return self._head + self.capacity - 1
+
+    def update(self, price: float, timestamp: float) -> bool:
+        """Fold one tick in; returns True if it opened a new bar.
+
+        Ticks older than the forming bar are ignored (the bar already closed).
+        """
+        start = timestamp - timestamp % self.seconds
+        if self.size:
+            i = self._last_index()
+            bar = self._bars[i]
+            if start == bar[TIME]:
+                high = bar[HIGH] if bar[HIGH] >= price else price
+                low = bar[LOW] if bar[LOW] <= price else price
+                for j in (i, i - self.capacity if i >= self.capacity else i + self.capacity):
+                    row = self._bars[j]
+                    row[HIGH] = high
+                    row[LOW] = low
+                    row[CLOSE] = price
+                    row[TICKS] += 1
+                return False
+            if start < bar[TIME]:
+                return False
+        i, cap = self._head, self.capacity
+        self._bars[i] = self._bars[i + cap] = (start, price, price, price, price, 1)
+        self._head = i + 1 if i + 1 < cap else 0
+        if self.size < cap:
+            self.size += 1
+        self.count += 1
+        return True
+
+    def load(self, rows: np.ndarray):
+        """Append already-aggregated (n, 6) bar rows, e.g. from the tick store"""
+        for row in rows[-self.capacity:]:
+            if self.size and row[TIME] <= self._bars[self._last_index()][TIME]:
+                continue
+            i, cap = self._head, self.capacity
+            self._bars[i] = self._bars[i + cap] = row
+            self._head = i + 1 if i + 1 < cap else 0
+            if self.size < cap:
+                self.size += 1
+            self.count += 1
+
+    def bars(self, n: Optional[int] = None) -> np.ndarray:
+        """Last ``n`` bars (oldest first) as an (n, 6) view; valid until the next update"""
+        n = self.size if n is None else max(0, min(n, self.size))
+        end = self._head + self.capacity
+        view = self._bars[end - n:end]
+        view.flags.writeable = False
+        return view
+
+    def closes(self, n: Optional[int] = None) -> np.ndarray:
+        return self.bars(n)[:, CLOSE]
+
+    @property
+    def last(self) -> Optional[np.ndarray]:
+        return self._bars[self._last_index()] if self.size else None
+
+    def rows(self, n: Optional[int] = None) -> list:
+        """``[[time, open, high, low, close], ...]`` for JSON/msgpack frames"""
+        return self.bars(n)[:, :CLOSE + 1].tolist()
+
+    def __len__(self):
+        return self.size
+
+
+class CandleAggregator:
+    """Candle series for every symbol at every timeframe, fed tick by tick."""
+
+    def __init__(self, timeframes: Dict[str, float] = None, capacity: int = CANDLE_CAPACITY):
+        self.timeframes = dict(TIMEFRAMES if timeframes is None else timeframes)
+        self.capacity = capacity
+        self._series: Dict[str, Dict[str, CandleSeries]] = {}
+
+    def add_symbol(self, symbol: str) -> Dict[str, CandleSeries]:
+        series = self._series.get(symbol)
+        if series is None:
+            series = self._series[symbol] = {
+                tf: CandleSeries(seconds, self.capacity) for tf, seconds in self.timeframes.items()
+            }
+        return series
+
+    def remove_symbol(self, symbol: str):
+        self._series.pop(symbol, None)
+
+    def update(self, symbol: str, price: float, timestamp: float) -> list:
+        """Fold a tick into every timeframe; returns [(timeframe, bar row)] for bars it closed."""
+        closed = []
+        for tf, series in self.add_symbol(symbol).items():
+            if series.update(price, timestamp) and series.size > 1:
+                closed.append((tf, series.bars(2)[0]))
+        return closed
+
+    def series(self, symbol: str, timeframe: str) -> CandleSeries:
+        return self._series[symbol][timeframe]
+
+    def closes(self, symbol: str, timeframe: str, n: Optional[int] = None) -> np.ndarray:
+        return self._series[symbol][timeframe].closes(n)
+
+    def latest(self, symbol: str) -> Dict[str, list]:
+        """Forming bar per timeframe as ``[time, open, high, low, close]``"""
+        return {
+            tf: series.last[:CLOSE + 1].tolist()
+            for tf, series in self._series.get(symbol, {}).items()
+            if series.size
+        }
+
+    def history(self, timeframes: Iterable[str] = None, n: Optional[int] = None) -> Dict[str, Dict[str, list]]:
+        """``{timeframe: {symbol: rows}}`` for a client catching up on connect"""
+        timeframes = list(self.timeframes) if timeframes is None else list(timeframes)
+        return {
+            tf: {symbol: series[tf].rows(n) for symbol, series in self._series.items() if tf in series}
+            for tf in timeframes
+        }
+
+    def __contains__(self, symbol: str):
+        return symbol in self._series
+
+    def __iter__(self):
+        return iter(self._series)
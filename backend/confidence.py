@@ -0,0 +1,7 @@
+# confidence.py
+# Confidence display buckets shared by the predictor and the /ws protocol.
+
+
+def confidence_level(confidence):
+    """Display bucket for a 0-1 confidence value"""
+    return "High" if confidence > 0.6 else "Medium" if confidence > 0.3 else "Low"
@@ -0,0 +1,140 @@
+# fake_binance.py
+# Local stand-in for the Binance endpoints used by binance_ingest.py.
+#
+#   uvicorn backend.fake_binance:app --port 9001
+#   BINANCE_REST_URL=http://127.0.0.1:9001 BINANCE_WS_URL=ws://127.0.0.1:9001 uvicorn backend.main:app
+#
+# REST requests are metered like Binance: each one is charged its weight,
+# the minute's total comes back in X-MBX-USED-WEIGHT-1M, going over the
+# limit answers 429 with Retry-After and a request during that window 418.
+# Latency and spurious 429s can be injected to exercise the ingest budget:
+#
+#   FAKE_BINANCE_LATENCY=0.3 FAKE_BINANCE_429_RATE=0.05 FAKE_BINANCE_WEIGHT_LIMIT=200 uvicorn ...
+import asyncio
+import json
+import math
+import os
+import random
+import re
+import time
+
+from fastapi import FastAPI, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
+
+# Seconds between miniTicker frames per symbol
+TICK_INTERVAL = float(os.environ.get("FAKE_BINANCE_INTERVAL", "1.0"))
+# Mean REST response delay in seconds (uniform jitter of +-50%)
+LATENCY = float(os.environ.get("FAKE_BINANCE_LATENCY", "0"))
+# Share of REST requests answered 429 regardless of weight, and their Retry-After
+ERROR_RATE = float(os.environ.get("FAKE_BINANCE_429_RATE", "0"))
+RETRY_AFTER = int(os.environ.get("FAKE_BINANCE_RETRY_AFTER", "2"))
+# REQUEST_WEIGHT per minute
+WEIGHT_LIMIT = int(os.environ.get("FAKE_BINANCE_WEIGHT_LIMIT", "6000"))
+
+STARTING_PRICES = {"BTCUSDT": 60000.0, "ETHUSDT": 3000.0, "DOTUSDT": 7.0, "ENAUSDT": 0.8}
+
+app = FastAPI()
+prices = dict(STARTING_PRICES)
+
+# Weight used in the current minute, and the end of the latest Retry-After
+meter = {"minute": 0, "used": 0, "retry_until": 0.0}
+
+# Anything shaped like a USDT pair "exists"; the rest gets Binance's -1121 error
+VALID_SYMBOL = re.compile(r"^[A-Z0-9]{2,16}USDT$")
+
+
+def check_symbols(symbols):
+    for symbol in symbols:
+        if not VALID_SYMBOL.match(symbol):
+            raise HTTPException(status_code=400, detail={"code": -1121, "msg": "Invalid symbol."})
+
+
+def price_of(symbol: str) -> float:
+    if symbol not in prices:
+        prices[symbol] = random.uniform(1.0, 100.0)
+    return prices[symbol]
+
+
+def step(symbol: str) -> float:
+    """Advance one symbol by a small geometric random-walk step."""
+    prices[symbol] = price_of(symbol) * math.exp(random.gauss(0.0, 0.001))
+    return prices[symbol]
+
+
+def charge(weight: int):
+    """Meter one request; raises 429 over the limit (or at random) and 418 inside a Retry-After."""
+    now = time.time()
+    minute = int(now // 60)
+    if minute != meter["minute"]:
+        meter.update(minute=minute, used=0)
+    if now < meter["retry_until"]:
+        retry = math.ceil(meter["retry_until"] - now)
+        raise HTTPException(status_code=418, detail={"code": -1003, "msg": "Way too many requests; IP banned."},
+                            headers={"Retry-After": str(retry)})
+    meter["used"] += weight
+    if meter["used"] > WEIGHT_LIMIT:
+        retry = math.ceil(60 - now % 60)
+    elif random.random() < ERROR_RATE:
+        retry = RETRY_AFTER
+    else:
+        return
+    meter["retry_until"] = now + retry
+    raise HTTPException(status_code=429, detail={"code": -1003, "msg": "Too many requests."},
+                        headers={"Retry-After": str(retry)})
+
+
+@app.middleware("http")
+async def metered(request: Request, call_next):
+    if LATENCY:
+        await asyncio.sleep(random.uniform(0.5, 1.5) * LATENCY)
+    response = await call_next(request)
+    if request.url.path.startswith("/api/"):
+        response.headers["X-MBX-USED-WEIGHT-1M"] = str(meter["used"])
+    return response
+
+
+@app.get("/api/v3/ticker/price")
+async def ticker_price(symbol: str = None, symbols: str = None):
+    # Binance weights: 2 for one symbol, 4 for a list or all of them
+    charge(2 if symbol else 4)
+    if symbol:
+        check_symbols([symbol])
+        return {"symbol": symbol, "price": f"{price_of(symbol):.8f}"}
+    if symbols:
+        try:
+            requested = json.loads(symbols)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid symbols parameter")
+        check_symbols(requested)
+        return [{"symbol": s, "price": f"{price_of(s):.8f}"} for s in requested]
+    return [{"symbol": s, "price": f"{p:.8f}"} for s, p in prices.items()]
+
+
+@app.websocket("/stream")
+async def combined_stream(websocket: WebSocket, streams: str = Query("")):
+    await websocket.accept()
+    names = [name for name in streams.split("/") if name]
+
+    async def control():
+        # Live SUBSCRIBE / UNSUBSCRIBE requests, answered like Binance ({"result": null, "id": n})
+        while True:
+            request = json.loads(await websocket.receive_text())
+            params = request.get("params", [])
+            if request.get("method") == "SUBSCRIBE":
+                names.extend(p for p in params if p not in names)
+            elif request.get("method") == "UNSUBSCRIBE":
+                names[:] = [n for n in names if n not in params]
+            await websocket.send_text(json.dumps({"result": None, "id": request.get("id")}))
+
+    control_task = asyncio.create_task(control())
+    try:
+        while not control_task.done():
+            now_ms = int(time.time() * 1000)
+            for name in list(names):
+                symbol = name.split("@")[0].upper()
+                frame = {"stream": name, "data": {"e": "24hrMiniTicker", "E": now_ms, "s": symbol, "c": f"{step(symbol):.8f}"}}
+                await websocket.send_text(json.dumps(frame))
+            await asyncio.sleep(TICK_INTERVAL)
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        control_task.cancel()
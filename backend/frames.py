@@ -0,0 +1,71 @@
+# frames.py
+# Encode-once broadcast frames: one snapshot per cycle, serialized once per format.
+import json
+
+try:
+    import orjson  # optional: pip install orjson (faster JSON encoding)
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack  # optional: pip install msgpack (binary frames)
+except ImportError:
+    msgpack = None
+
+JSON = "json"
+MSGPACK = "msgpack"
+
+
+def available_formats():
+    return [JSON, MSGPACK] if msgpack is not None else [JSON]
+
+
+def negotiate(requested):
+    """Pick the wire format for a client; unknown/unavailable formats fall back to JSON."""
+    fmt = (requested or JSON).lower()
+    return fmt if fmt in available_formats() else JSON
+
+
+def encode(payload, fmt=JSON):
+    """JSON is returned as str (sent as a text frame), MessagePack as bytes."""
+    if fmt == MSGPACK:
+        return msgpack.packb(payload, use_bin_type=True)
+    if orjson is not None:
+        return orjson.dumps(payload).decode()
+    return json.dumps(payload, separators=(",", ":"))
+
+
+class Frame:
+    """A payload shared by every recipient; each format is encoded at most once."""
+
+    __slots__ = ("payload", "_encoded")
+
+    def __init__(self, payload):
+        self.payload = payload
+        self._encoded = {}
+
+    def encoded(self, fmt=JSON):
+        data = self._encoded.get(fmt)
+        if data is None:
+            data = self._encoded[fmt] = encode(self.payload, fmt)
+        return data
+
+
+def price_snapshot(prices, timestamp):
+    """All coins' latest prices in one frame."""
+    return Frame({"type": "prices", "timestamp": timestamp, "prices": prices})
+
+
+def candle_history(history, timestamp):
+    """``history`` is ``{timeframe: {coin: [[time, open, high, low, close], ...]}}``"""
+    return Frame({"type": "candles", "timestamp": timestamp, "candles": history})
+
+
+def alert_frame(alerts, timestamp):
+    """Anomaly alerts raised by one scan (see anomaly_scanner.py)."""
+    return Frame({"type": "alerts", "timestamp": timestamp, "alerts": alerts})
+
+
+def trend_snapshot(trends, timestamp):
+    """All coins' trends for one prediction cycle in one frame."""
+    return Frame({"type": "trends", "timestamp": timestamp, "trends": trends})
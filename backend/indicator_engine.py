@@ -0,0 +1,250 @@
+# indicator_engine.py
+# Streaming indicator state used by AdvancedTrendPredictor.
+#
+# Rolling moments, lags and returns are updated in O(1) per tick. RSI and
+# MACD are recursions seeded at the start of the window, so they are not
+# advanced per tick: a read evaluates them over the last ``window`` prices
+# as four dot products with batch_indicators' weights (~5us, cached until
+# the next tick), on rings of prices and gains / losses kept per tick.
+import math
+from collections import deque
+
+import numpy as np
+
+from . import batch_indicators
+
+# Exact recomputation interval for the rolling moments, bounds float drift
+RESYNC_INTERVAL = 4096
+
+# Prices the RSI / MACD recursions are replayed over; price_streamer keeps
+# exactly this many per coin (HISTORY_CAPACITY), so streamed and batch values agree
+WINDOW = 60
+
+
+class RollingWindow:
+    """Fixed-size window with O(1) running mean / population variance."""
+
+    __slots__ = ("window", "values", "mean", "_m2", "_updates")
+
+    def __init__(self, window):
+        self.window = window
+        self.values = deque(maxlen=window)
+        self.mean = 0.0
+        self._m2 = 0.0
+        self._updates = 0
+
+    def push(self, x):
+        n = len(self.values)
+        if n < self.window:
+            # Welford insert while the window is filling up
+            self.values.append(x)
+            n += 1
+            delta = x - self.mean
+            self.mean += delta / n
+            self._m2 += delta * (x - self.mean)
+        else:
+            # Replace the oldest value in a single update
+            old = self.values[0]
+            self.values.append(x)
+            old_mean = self.mean
+            self.mean += (x - old) / n
+            self._m2 += (x - old) * (x - self.mean + old - old_mean)
+
+        self._updates += 1
+        if self._updates >= RESYNC_INTERVAL:
+            self._resync()
+
+    def _resync(self):
+        n = len(self.values)
+        self.mean = math.fsum(self.values) / n
+        self._m2 = math.fsum((v - self.mean) ** 2 for v in self.values)
+        self._updates = 0
+
+    def __len__(self):
+        return len(self.values)
+
+    @property
+    def variance(self):
+        n = len(self.values)
+        if n == 0:
+            return 0.0
+        return max(self._m2 / n, 0.0)
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+
+class IndicatorState:
+    """Per-symbol indicator state, updated in O(1) for every new price.
+
+    The windows mirror the array-based methods of AdvancedTrendPredictor:
+    Bollinger / volatility over 20 prices, regime over 20 prices (19 returns),
+    regime adaptation over 30 prices and crypto uncertainty over 50 prices.
+    RSI and MACD are evaluated over the last ``window`` prices when read.
+    """
+
+    # Longest price lag read by the predictor (adapt_to_crypto_regime)
+    HISTORY = 50
+
+    def __init__(self, window=WINDOW):
+        self.window = window
+        self.count = 0
+        self.prices = deque(maxlen=max(window, self.HISTORY))
+        self._oscillators = None  # (rsi, macd tuple) over the window, until the next price
+        # Prices and per-tick gains / losses, written twice (as in PriceRing) so
+        # the last ``window`` values are always one contiguous slice
+        self._head = 0
+        self._window_prices = np.zeros(2 * window)
+        self._gains = np.zeros(2 * window)
+        self._losses = np.zeros(2 * window)
+        self.price_10 = RollingWindow(10)
+        self.price_20 = RollingWindow(20)
+        self.returns_19 = RollingWindow(19)
+        self.returns_29 = RollingWindow(29)
+        self.returns_49 = RollingWindow(49)
+        self.recent_returns = deque(maxlen=9)
+
+    @classmethod
+    def from_prices(cls, prices, window=WINDOW):
+        state = cls(window)
+        values = prices.tolist() if hasattr(prices, "tolist") else prices
+        for p in values:
+            state.update(p)
+        return state
+
+    def update(self, price):
+        price = float(price)
+        delta = 0.0
+        if self.prices:
+            delta = price - self.prices[-1]
+            if price > 0 and self.prices[-1] > 0:
+                log_return = math.log(price / self.prices[-1])
+                self.returns_19.push(log_return)
+                self.returns_29.push(log_return)
+                self.returns_49.push(log_return)
+                self.recent_returns.append(log_return)
+
+        self.count += 1
+        self.prices.append(price)
+        self._oscillators = None
+        i, n = self._head, self.window
+        self._window_prices[i] = self._window_prices[i + n] = price
+        self._gains[i] = self._gains[i + n] = delta if delta > 0 else 0.0
+        self._losses[i] = self._losses[i + n] = -delta if delta < 0 else 0.0
+        self._head = i + 1 if i + 1 < n else 0
+        self.price_10.push(price)
+        self.price_20.push(price)
+
+    def matches(self, prices):
+        """True if this state covers exactly ``prices``: the same window and the same tail."""
+        if len(prices) == 0 or min(self.count, self.window) != len(prices):
+            return False
+        tail = min(len(prices), 5, len(self.prices))
+        return all(self.prices[-i] == prices[-i] for i in range(1, tail + 1))
+
+    def _window_oscillators(self):
+        if self._oscillators is None:
+            n = min(self.count, self.window)
+            end = self._head + self.window
+            # Same weights and guards as batch_indicators.rsi / macd over these n prices
+            rsi = 50.0
+            if n > 14:
+                weights = batch_indicators.wilder_weights(14, n - 1)
+                gain = float(np.dot(self._gains[end - n + 1:end], weights))
+                loss = float(np.dot(self._losses[end - n + 1:end], weights))
+                moved = gain + loss
+                rsi = 100 * gain / moved if moved > 0 else 50.0
+            macd = (0.0, 0.0, 0.0)
+            if n >= 26:
+                line_weights, signal_weights = batch_indicators.macd_weights(n)
+                prices = self._window_prices[end - n:end]
+                line = float(np.dot(prices, line_weights))
+                signal = float(np.dot(prices, signal_weights))
+                macd = (line, signal, line - signal)
+            self._oscillators = (rsi, macd)
+        return self._oscillators
+
+    def rsi(self):
+        return self._window_oscillators()[0]
+
+    def macd(self):
+        """(macd_line, signal_line, histogram) over the window"""
+        return self._window_oscillators()[1]
+
+    @property
+    def last_price(self):
+        return self.prices[-1]
+
+    def lag(self, n):
+        """Price ``n`` ticks back, i.e. ``prices[-n]`` of the full history."""
+        return self.prices[-n]
+
+    def bollinger_bands(self):
+        window = self.price_20
+        if self.count < window.window:
+            last_price = self.prices[-1] if self.prices else 0.0
+            return last_price, last_price, last_price, 0.0
+        sma = window.mean
+        std = window.std
+        upper_band = sma + (std * 2)
+        lower_band = sma - (std * 2)
+        bandwidth = ((upper_band - lower_band) / sma * 100) if sma != 0 else 0.0
+        return upper_band, sma, lower_band, bandwidth
+
+    def support_resistance(self):
+        if self.count < 20:
+            return self.last_price, self.last_price
+        return min(self.price_10.values), max(self.price_10.values)
+
+    def market_regime(self):
+        if self.count < 20:
+            return "unknown"
+        volatility = self.returns_19.std * math.sqrt(365)
+        # mean(up_moves) - mean(down_moves) over the same returns == mean(returns)
+        trend_strength = abs(self.returns_19.mean)
+
+        if volatility > 0.8:
+            return "high_volatility"
+        elif trend_strength > 0.02:
+            return "trending"
+        else:
+            return "ranging"
+
+    def ml_features(self):
+        if self.count < 30:
+            return [0.0] * 10
+
+        last = self.prices[-1]
+        p5, p10, p15 = self.prices[-5], self.prices[-10], self.prices[-15]
+        mean_10 = self.price_10.mean
+        macd, _, hist = self.macd()
+        return [
+            (last - p5) / p5,
+            (last - p10) / p10,
+            self.price_10.std / mean_10,
+            self.price_20.std / self.price_20.mean,
+            (last - mean_10) / mean_10,
+            (self.rsi() - 50) / 50,
+            macd / last if last != 0 else 0.0,
+            hist / last if last != 0 else 0.0,
+            (last - p5) / 5 / last if last != 0 else 0.0,
+            (last - p15) / 15 / last if last != 0 else 0.0,
+        ]
+
+    def snapshot(self):
+        """Current indicator values as a plain dict (for clients / caching)."""
+        macd, signal, histogram = self.macd()
+        upper, middle, lower, width = self.bollinger_bands()
+        return {
+            "rsi": self.rsi(),
+            "macd": macd,
+            "macd_signal": signal,
+            "macd_histogram": histogram,
+            "bb_upper": float(upper),
+            "bb_middle": float(middle),
+            "bb_lower": float(lower),
+            "bb_width": float(width),
+            "regime": self.market_regime(),
+            "ml_features": [float(f) for f in self.ml_features()],
+        }
@@ -0,0 +1,121 @@
+# ingest_budget.py
+# Exchange rate-limit budgeting and steady pacing for the REST ingest.
+#
+# Binance meters REST calls by request weight per minute (REQUEST_WEIGHT,
+# 6000 on spot) and reports the IP's usage in X-MBX-USED-WEIGHT-1M on every
+# response. Going over answers 429 with Retry-After; carrying on after a 429
+# gets the IP banned (418). The budget keeps the ingest under a share of the
+# limit, and its pressure (0 idle .. 1 exhausted or blocked) is what the
+# REST loop uses to stretch its interval and shed low-priority symbols.
+import asyncio
+import os
+import time
+from typing import Mapping, Optional
+
+from .metrics import cadence_missed_cycles_total, ingest_throttled_total
+
+# The exchange's REQUEST_WEIGHT limit per minute, and the share of it the ingest may use
+WEIGHT_LIMIT = int(os.environ.get("BINANCE_WEIGHT_LIMIT", "6000"))
+WEIGHT_SHARE = float(os.environ.get("INGEST_WEIGHT_SHARE", "0.5"))
+
+# ticker/price weights: one symbol, or a ``symbols`` list of any length
+SINGLE_WEIGHT = 2
+BULK_WEIGHT = 4
+
+
+class RateLimited(Exception):
+    """The exchange (or our own budget) says wait ``retry_after`` seconds."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"rate limited for {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+class WeightBudget:
+    """Request weight spent in the current minute against the allowed share."""
+
+    def __init__(self, limit: int = WEIGHT_LIMIT, share: float = WEIGHT_SHARE):
+        self.limit = limit
+        self.allowed = max(BULK_WEIGHT, int(limit * share))
+        self.used = 0
+        self.blocked_until = 0.0  # wall-clock end of a 429 / 418 Retry-After
+        self._minute = int(time.time() // 60)
+
+    def _roll(self, now: float):
+        # The exchange counter resets on the minute, so ours does too
+        minute = int(now // 60)
+        if minute != self._minute:
+            self._minute = minute
+            self.used = 0
+
+    def wait(self, weight: int) -> float:
+        """Seconds until ``weight`` may be spent (0 if it fits now)."""
+        now = time.time()
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        self._roll(now)
+        if self.used + weight > self.allowed:
+            return 60.0 - now % 60.0
+        return 0.0
+
+    def spend(self, weight: int):
+        self._roll(time.time())
+        self.used += weight
+
+    def observe(self, status: int, headers: Mapping[str, str]):
+        """Take the exchange's own count (it includes other clients on this IP) and any Retry-After."""
+        now = time.time()
+        used = headers.get("x-mbx-used-weight-1m")
+        if used is not None:
+            self._roll(now)
+            self.used = int(used)
+        if status in (418, 429):
+            ingest_throttled_total.labels(str(status)).inc()
+            retry_after = headers.get("retry-after")
+            delay = float(retry_after) if retry_after else 60.0 - now % 60.0
+            self.blocked_until = max(self.blocked_until, now + delay)
+            print(f"🚦 Binance returned {status}: backing off for {delay:.0f}s")
+
+    def pressure(self) -> float:
+        now = time.time()
+        if now < self.blocked_until:
+            return 1.0
+        self._roll(now)
+        return min(1.0, self.used / self.allowed)
+
+    def stats(self) -> dict:
+        return {
+            "used": self.used,
+            "allowed": self.allowed,
+            "limit": self.limit,
+            "pressure": round(self.pressure(), 3),
+            "blocked_for": round(max(0.0, self.blocked_until - time.time()), 1),
+        }
+
+
+class Cadence:
+    """Fixed-rate ticks: each slot is counted from the previous one, not from when the work ended.
+
+    Work that overruns its slot skips the missed slots instead of bursting to catch up.
+    """
+
+    def __init__(self, interval: float, name: str = ""):
+        self.interval = interval
+        self.name = name
+        self.missed = 0
+        self._next: Optional[float] = None
+
+    async def wait(self, interval: Optional[float] = None):
+        interval = interval or self.interval
+        now = time.monotonic()
+        self._next = (self._next or now) + interval
+        if self._next < now:
+            skipped = int((now - self._next) // interval) + 1
+            self.missed += skipped
+            cadence_missed_cycles_total.labels(self.name).inc(skipped)
+            self._next += skipped * interval
+        await asyncio.sleep(self._next - now)
+
+    def reset(self):
+        """Restart counting from the next wait (after a deliberate pause, e.g. a Retry-After)."""
+        self._next = None
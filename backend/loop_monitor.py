@@ -0,0 +1,47 @@
+# loop_monitor.py
+# Event-loop lag probe: how late a periodic sleep wakes up.
+import asyncio
+from collections import deque
+
+import numpy as np
+
+from .metrics import event_loop_lag_seconds
+
+
+class LoopLagMonitor:
+    """Samples event-loop lag every ``interval`` seconds."""
+
+    def __init__(self, interval: float = 0.25, window: int = 240):
+        self.interval = interval
+        self.samples = deque(maxlen=window)  # seconds, most recent last
+        self.max_lag = 0.0
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - expected)
+            self.samples.append(lag)
+            event_loop_lag_seconds.observe(lag)
+            self.max_lag = max(self.max_lag, lag)
+
+    @property
+    def last(self) -> float:
+        return self.samples[-1] if self.samples else 0.0
+
+    def stats(self) -> dict:
+        """Lag summary in milliseconds over the recent window."""
+        if not self.samples:
+            return {"last_ms": 0.0, "p50_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+        recent = np.fromiter(self.samples, dtype=np.float64) * 1e3
+        return {
+            "last_ms": float(recent[-1]),
+            "p50_ms": float(np.percentile(recent, 50)),
+            "p99_ms": float(np.percentile(recent, 99)),
+            "max_ms": self.max_lag * 1e3,
+        }
+
+
+# Process-wide monitor started with the app
+loop_monitor = LoopLagMonitor()
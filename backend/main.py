@@ -1,31 +1,141 @@
 # main.py
-from fastapi import FastAPI, WebSocket
+# ASGI entry point. The app is built by create_app() on first access:
+#
+#   uvicorn backend.main:app                  (from the repository root)
+#   uvicorn --factory backend.main:create_app
+#
+# Importing this module defines the routes only; ingest, predictor workers
+# and the bus start on the app's startup event.
+from fastapi import APIRouter, Body, FastAPI, Header, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
 import asyncio
+import json
+import os
+import time
 from fastapi.middleware.cors import CORSMiddleware
-from price_streamer import connected_clients, broadcast_prices, price_history
-from trend_predictor_ai import predict_trend
+from .price_streamer import (HISTORY_CAPACITY, anomaly_scanner, apply_event, broadcaster, broadcast_prices, bus_snapshot,
+                             candles, ingest, price_history, release_symbol, snapshot_cache, symbol_registry,
+                             open_tick_store, warm_start)
+from . import price_streamer
+from .bus import make_bus
+from .trend_predictor_ai import indicator_snapshot
+from . import batch_indicators
+import numpy as np
 from datetime import datetime
-import json
+from .frames import Frame, candle_history, negotiate, trend_snapshot
+from .subscriptions import SubscriptionError
+from .ingest_budget import RateLimited
+from .loop_monitor import loop_monitor
+from .metrics import (client_queue_depth_max, client_queue_depth_total, connected_clients_gauge,
+                     ingest_to_broadcast_seconds, registry)
+from .prediction_scheduler import PredictionScheduler
+from .tick_events import tick_events
+from .tick_store import records_to_rows
+from .symbols import IDLE_TIMEOUT, normalize
+
+router = APIRouter()
+
+# Predictions run on a pinned worker pool, never on the event loop
+scheduler = PredictionScheduler()
+
+# Only the bus leader ingests and predicts; other workers mirror its events (BUS_URL)
+bus = make_bus()
+bus.snapshot = bus_snapshot
+LEADER_TASKS = ["persist_task", "price_task", "trend_task", "idle_task", "warm_task"]
+
+# Background tasks by name (process-wide, like the subsystems they drive)
+tasks = {}
+
+# Required in the X-Admin-Token header of /admin requests when set
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+
+# Connection gauges are read from the broadcaster at scrape time
+connected_clients_gauge.set_function(lambda: len(broadcaster))
+client_queue_depth_max.set_function(lambda: max(broadcaster.queue_depths(), default=0))
+client_queue_depth_total.set_function(lambda: sum(broadcaster.queue_depths()))
 
-app = FastAPI()
+# A coin's trend is recomputed after new ticks, at most once per TREND_MIN_INTERVAL
+TREND_MIN_INTERVAL = float(os.environ.get("TREND_MIN_INTERVAL", "1.0"))
+# Short pause after the first tick so a burst of ticks becomes one recompute
+TREND_DEBOUNCE = float(os.environ.get("TREND_DEBOUNCE", "0.05"))
+# Series the predictor runs on: "tick" (raw 1s history) or a candle timeframe ("1m", "15m", "1h")
+TREND_TIMEFRAME = os.environ.get("TREND_TIMEFRAME", "tick")
+if TREND_TIMEFRAME != "tick" and TREND_TIMEFRAME not in candles.timeframes:
+    raise ValueError(f"TREND_TIMEFRAME must be 'tick' or one of {sorted(candles.timeframes)}")
+# Bars per timeframe sent to a client on connect (override with ?candles=N, 0 to skip)
+CANDLES_ON_CONNECT = int(os.environ.get("CANDLES_ON_CONNECT", "120"))
+# Send the cached per-coin snapshot (price, indicators, trend) on connect (override with ?snapshot=0)
+SNAPSHOT_ON_CONNECT = os.environ.get("SNAPSHOT_ON_CONNECT", "1") != "0"
+# Tick store: buffered ticks are written every TICK_FLUSH_INTERVAL seconds,
+# predictor state (trend_memory / confidence_history) every STATE_SNAPSHOT_INTERVAL
+TICK_FLUSH_INTERVAL = float(os.environ.get("TICK_FLUSH_INTERVAL", "1.0"))
+STATE_SNAPSHOT_INTERVAL = float(os.environ.get("STATE_SNAPSHOT_INTERVAL", "30.0"))
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+def create_app() -> FastAPI:
+    """Build the ASGI app; nothing heavy starts until its startup event."""
+    app = FastAPI()
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    app.include_router(router)
+    app.router.on_startup.append(start_background_tasks)
+    app.router.on_shutdown.append(shutdown_background_tasks)
+    return app
+
+_app = None
+
+def __getattr__(name):
+    # ``backend.main:app`` builds the default app on first access
+    global _app
+    if name == "app":
+        if _app is None:
+            _app = create_app()
+        return _app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-@app.on_event("startup")
 async def start_background_tasks():
-    app.state.price_task = asyncio.create_task(broadcast_prices())
-    app.state.trend_task = asyncio.create_task(broadcast_trends())
+    tasks["bus_task"] = asyncio.create_task(bus.run(apply_event, start_leader, stop_leader))
+    tasks["loop_monitor_task"] = asyncio.create_task(loop_monitor.run())
 
-@app.on_event("shutdown")
-async def shutdown_background_tasks():
-    for task_name in ["price_task", "trend_task"]:
-        task = getattr(app.state, task_name, None)
+async def warm_predictor():
+    """Spawn prediction workers and load the predictor before the first trend cycle."""
+    length = HISTORY_CAPACITY if TREND_TIMEFRAME == "tick" else candles.capacity
+    started = time.perf_counter()
+    try:
+        await scheduler.warm(length)
+    except Exception as e:
+        print("Predictor warm-up error:", e)
+        return
+    print(f"🔥 Prediction workers warm in {(time.perf_counter() - started) * 1e3:.0f}ms")
+
+async def start_leader():
+    """Called once this worker wins the bus election."""
+    broadcaster.relay = bus.send
+    # Overlaps worker start-up with the warm start below
+    tasks["warm_task"] = asyncio.create_task(warm_predictor())
+    # Built here, not at import: followers and tooling never hold (or create) the store
+    tick_store = open_tick_store()
+    if tick_store is not None:
+        # Warm start: recent history straight from the memory-mapped store
+        started = time.perf_counter()
+        loaded = warm_start()
+        state = tick_store.load_state()
+        if state:
+            await scheduler.import_state(state.get("predictor", {}))
+        print(f"💾 Warm start: {loaded} ticks{' + predictor state' if state else ''} "
+              f"in {(time.perf_counter() - started) * 1e3:.0f}ms")
+        tasks["persist_task"] = asyncio.create_task(persist_store())
+    tasks["price_task"] = asyncio.create_task(broadcast_prices())
+    tasks["trend_task"] = asyncio.create_task(broadcast_trends())
+    tasks["idle_task"] = asyncio.create_task(evict_idle_symbols())
+
+async def cancel_tasks(task_names):
+    for task_name in task_names:
+        task = tasks.pop(task_name, None)
         if task:
             task.cancel()
             try:
@@ -33,54 +143,294 @@ async def shutdown_background_tasks():
             except asyncio.CancelledError:
                 pass
 
-@app.websocket("/ws")
+async def stop_leader():
+    """Called when leadership is lost: stop ingest/prediction, keep serving clients."""
+    broadcaster.relay = None
+    await cancel_tasks(LEADER_TASKS)
+    if price_streamer.tick_store is not None:
+        await save_predictor_state()
+        price_streamer.tick_store.flush()
+
+async def shutdown_background_tasks():
+    await cancel_tasks(["bus_task", "loop_monitor_task"] + LEADER_TASKS)
+    if bus.is_leader and price_streamer.tick_store is not None:
+        await save_predictor_state()
+        price_streamer.tick_store.close()
+    scheduler.shutdown()
+
+async def save_predictor_state():
+    try:
+        price_streamer.tick_store.save_state({"predictor": await scheduler.export_state()})
+    except Exception as e:
+        print("Predictor state snapshot error:", e)
+
+async def persist_store():
+    """Flush buffered ticks/candles and periodically snapshot predictor state."""
+    last_snapshot = time.monotonic()
+    while True:
+        await asyncio.sleep(TICK_FLUSH_INTERVAL)
+        try:
+            price_streamer.tick_store.flush()
+        except OSError as e:
+            print("Tick store flush error:", e)
+        if time.monotonic() - last_snapshot >= STATE_SNAPSHOT_INTERVAL:
+            last_snapshot = time.monotonic()
+            await save_predictor_state()
+
+async def evict_idle_symbols():
+    """Release state of symbols that stopped ticking; it is rebuilt if ticks resume."""
+    while True:
+        await asyncio.sleep(max(1.0, min(IDLE_TIMEOUT / 4, 60.0)))
+        idle = symbol_registry.idle()
+        if idle:
+            print(f"🧹 Evicting idle symbols: {', '.join(idle)}")
+            for coin in idle:
+                release_symbol(coin)
+            await scheduler.forget(idle)
+
+def check_admin(token):
+    if ADMIN_TOKEN and token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+    if not bus.is_leader:
+        raise HTTPException(status_code=409, detail="Symbols are managed by the bus leader")
+
+@router.get("/symbols")
+async def list_symbols():
+    return {
+        "symbols": symbol_registry.symbols,
+        # Coins currently holding in-memory state
+        "active": sorted(price_history.keys()),
+    }
+
+@router.post("/admin/symbols")
+async def add_symbols(symbols: list = Body(..., embed=True), low_priority: bool = Body(False, embed=True),
+                      x_admin_token: str = Header(None)):
+    """Start tracking pairs; each one is checked against the exchange first.
+
+    ``low_priority`` pairs are the first to be polled less often when the
+    exchange's rate-limit budget runs low.
+    """
+    check_admin(x_admin_token)
+    try:
+        requested = [normalize(s) for s in symbols]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    rejected = []
+    for symbol in requested:
+        try:
+            await ingest.fetch_price(symbol)
+        except RateLimited as e:
+            raise HTTPException(status_code=503, detail="Exchange rate limit reached, try again later",
+                                headers={"Retry-After": str(int(e.retry_after) + 1)})
+        except Exception:
+            rejected.append(symbol)
+    if rejected:
+        raise HTTPException(status_code=400, detail=f"Unknown on the exchange: {', '.join(rejected)}")
+    added = symbol_registry.add(requested, low_priority)
+    print(f"➕ Symbols added: {', '.join(added) or 'none'}")
+    return {"added": added, "symbols": symbol_registry.symbols}
+
+@router.delete("/admin/symbols/{coin}")
+async def remove_symbol(coin: str, x_admin_token: str = Header(None)):
+    check_admin(x_admin_token)
+    removed = symbol_registry.remove([coin])
+    if not removed:
+        raise HTTPException(status_code=404, detail=f"{coin.upper()} is not tracked")
+    await scheduler.forget(removed)
+    print(f"➖ Symbols removed: {', '.join(removed)}")
+    return {"removed": removed, "symbols": symbol_registry.symbols}
+
+@router.get("/health")
+async def health():
+    return {
+        "clients": len(broadcaster),
+        "bus": bus.stats(),
+        "event_loop_lag": loop_monitor.stats(),
+        "prediction": scheduler.stats(),
+        "ingest": ingest.stats(),
+        "anomalies": anomaly_scanner.stats(),
+    }
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus text exposition of the ingest, prediction and fan-out metrics."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+def conditional(request: Request, payload, etag: str):
+    """200 with an ETag, or an empty 304 when the client already has this version."""
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag in request.headers.get("if-none-match", "").replace(" ", "").split(","):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(payload, headers=headers)
+
+@router.get("/alerts")
+async def get_alerts():
+    """Latest anomaly alert per coin, newest first (live alerts arrive on /ws)."""
+    latest = broadcaster.latest.get("alerts", {}).values()
+    return {"alerts": sorted(latest, key=lambda alert: alert["timestamp"], reverse=True)}
+
+@router.get("/snapshot")
+async def get_snapshot(request: Request):
+    """Latest price, indicators and trend for every coin; supports If-None-Match."""
+    entries, etag = snapshot_cache.all()
+    return conditional(request, {"version": etag.strip('"'), "symbols": entries}, etag)
+
+@router.get("/snapshot/{coin}")
+async def get_coin_snapshot(coin: str, request: Request):
+    coin = coin.upper()
+    entry, etag = snapshot_cache.get(coin)
+    if entry is None:
+        raise HTTPException(status_code=404, detail=f"No snapshot for {coin}")
+    return conditional(request, entry, etag)
+
+@router.get("/candles/{coin}")
+async def get_candles(coin: str, timeframe: str = "1m", limit: int = 120):
+    """OHLC history for one coin; the last bar is still forming."""
+    coin = coin.upper()
+    if coin not in candles or timeframe not in candles.timeframes:
+        raise HTTPException(status_code=404, detail=f"No {timeframe} candles for {coin}")
+    return {
+        "coin": coin,
+        "timeframe": timeframe,
+        "columns": ["time", "open", "high", "low", "close"],
+        "candles": candles.series(coin, timeframe).rows(max(0, limit)),
+    }
+
+@router.get("/history/{coin}")
+async def get_history(coin: str, timeframe: str = "tick", start: float = None, end: float = None,
+                      limit: int = 1000):
+    """Stored ticks (or closed candles) from the tick store, oldest first."""
+    coin = coin.upper()
+    # Followers open it on their first history request and only ever read from it
+    tick_store = open_tick_store()
+    if tick_store is None:
+        raise HTTPException(status_code=404, detail="Tick store is disabled")
+    if timeframe != "tick" and timeframe not in candles.timeframes:
+        raise HTTPException(status_code=404, detail=f"Unknown timeframe {timeframe}")
+    records = tick_store.query(coin, timeframe, start, end, max(0, min(limit, 100_000)))
+    return {
+        "coin": coin,
+        "timeframe": timeframe,
+        "columns": list(records.dtype.names),
+        "rows": records_to_rows(records).tolist(),
+    }
+
+@router.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     await websocket.accept()
-    print("🔌 Client connected")
-    connected_clients.add(websocket)
+    # ?format=msgpack selects binary frames; JSON text frames are the default
+    fmt = negotiate(websocket.query_params.get("format"))
+    print(f"🔌 Client connected ({fmt})")
+    # Frames are sent by the connection's own writer task
+    connection = broadcaster.register(websocket, fmt)
+    # Candle history up front, so the client doesn't rebuild charts from live ticks
+    try:
+        bars = int(websocket.query_params.get("candles", CANDLES_ON_CONNECT))
+    except ValueError:
+        bars = CANDLES_ON_CONNECT
+    if bars > 0:
+        connection.offer(candle_history(candles.history(n=bars), datetime.now().isoformat()), droppable=False)
+    # Latest indicators and trends from the cache, so the dashboard isn't blank until the next cycle
+    if SNAPSHOT_ON_CONNECT and websocket.query_params.get("snapshot") != "0":
+        connection.offer(snapshot_cache.frame(), droppable=False)
     try:
         while True:
-            await asyncio.sleep(1)
+            # Subscribe/unsubscribe messages; reading also surfaces disconnects immediately
+            raw = await websocket.receive_text()
+            try:
+                connection.subscribe(json.loads(raw))
+            except (ValueError, SubscriptionError) as e:
+                connection.offer(Frame({"type": "error", "message": str(e)}), droppable=False)
+    except WebSocketDisconnect:
+        pass
     except Exception as e:
         print("Websocket handler error:", e)
     finally:
-        try:
-            connected_clients.remove(websocket)
-        except KeyError:
-            pass
+        await broadcaster.unregister(websocket)
         print("❌ Client disconnected")
 
 
-# Broadcast trends based on shared price_history
-# main.py (updated broadcast_trends function)
+def trend_window(coin):
+    """Price series the predictor sees for ``coin`` at TREND_TIMEFRAME."""
+    if TREND_TIMEFRAME == "tick":
+        return price_history[coin] if coin in price_history else None
+    return candles.closes(coin, TREND_TIMEFRAME) if coin in candles else None
+
+
+def window_indicators(windows):
+    """Indicators over exactly the windows about to be predicted, so they match the trend.
+
+    Tick windows are what the streamed indicator state covers; candle closes
+    are evaluated in one batch per window length.
+    """
+    if TREND_TIMEFRAME == "tick":
+        return {coin: indicator_snapshot(coin) for coin in windows}
+    by_length = {}
+    for coin, window in windows.items():
+        by_length.setdefault(len(window), []).append(coin)
+    indicators = {}
+    for coins in by_length.values():
+        rows = np.stack([windows[coin] for coin in coins])
+        indicators.update(zip(coins, batch_indicators.snapshots(rows)))
+    return indicators
+
+
+# Broadcast trends based on shared price_history, driven by new-tick events
 async def broadcast_trends():
+    bar_seconds = 1.0 if TREND_TIMEFRAME == "tick" else float(candles.timeframes[TREND_TIMEFRAME])
+    wait = None
     while True:
-        await asyncio.sleep(5)  # every 5s
+        await tick_events.wait(wait)
+        await asyncio.sleep(TREND_DEBOUNCE)
+        # First-tick arrival times (monotonic), for ingest-to-broadcast latency
+        arrivals = dict(tick_events.pending)
+        ready, wait = tick_events.due(TREND_MIN_INTERVAL)
         try:
-            for coin, history in price_history.items():
-                if len(history) < 15:  # Increased minimum data requirement
-                    continue
-                
-                trend, explanation, confidence = predict_trend(history, coin)
-                
+            windows = {}
+            for coin in ready:
+                window = trend_window(coin)
+                if window is not None and len(window) >= 15:  # Increased minimum data requirement
+                    windows[coin] = window
+            if not windows:
+                continue
+            tick_events.ran(windows)
+
+            # Vectorized per pinned worker on snapshots taken before the loop yields;
+            # results are stamped with the tick sequence of those snapshots
+            sequences = {coin: tick_events.sequence.get(coin) for coin in windows}
+            indicators = window_indicators(windows)
+            results = await scheduler.predict(windows, bar_seconds)
+
+            trends = []
+            for coin, (trend, explanation, confidence) in results.items():
                 # Ensure confidence is a float between 0-1
                 confidence_float = float(confidence) if confidence is not None else 0.0
                 confidence_float = max(0.0, min(confidence_float, 1.0))
                 
-                message = json.dumps({
+                trends.append({
                     "coin": coin,
                     "trend": trend,
                     "explanation": explanation,
                     "confidence": confidence_float,  # Send as float, not percentage
-                    "timestamp": datetime.now().isoformat()
                 })
-                
-                # Send trend to all clients
-                for client in list(connected_clients):
-                    try:
-                        await client.send_text(message)
-                    except Exception as e:
-                        print("Removing dead client:", e)
-                        connected_clients.discard(client)
+
+                # Latest state for delta subscribers and the snapshot cache
+                fields = {
+                    "trend": trend,
+                    "confidence": confidence_float,
+                    "explanation": explanation,
+                }
+                broadcaster.update("trends", coin, fields, sequences[coin])
+                snapshot_cache.on_stream("trends", coin, fields, sequences[coin])
+                if indicators.get(coin) is not None:
+                    broadcaster.update("indicators", coin, indicators[coin], sequences[coin])
+                    snapshot_cache.on_stream("indicators", coin, indicators[coin], sequences[coin])
+
+            if trends:
+                # One snapshot frame per cycle; never dropped for a live client
+                broadcaster.publish(trend_snapshot(trends, datetime.now().isoformat()))
+                now = time.monotonic()
+                for item in trends:
+                    ingest_to_broadcast_seconds.labels("trends").observe(now - arrivals[item["coin"]])
         except Exception as e:
             print("Trend broadcast error:", e)
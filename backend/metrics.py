@@ -0,0 +1,283 @@
+# metrics.py
+# Minimal in-process Prometheus-style metrics (text exposition format 0.0.4).
+#
+# Observations only bump pre-aggregated counters/buckets, so the hooks are
+# cheap enough to leave on. Per-stage timing is opt-in per module:
+#   METRICS_STAGE_TIMING=trend_predictor_ai,binance_ingest   (or "all", "" = off)
+# trend_predictor_ai times its pipeline stages, binance_ingest its request /
+# parse / dispatch steps.
+import os
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._children: Dict[tuple, object] = {}
+
+    def labels(self, *values):
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            child = self._children[key] = self._new_child()
+        return child
+
+    def _default(self):
+        return self.labels()
+
+    def render(self):
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.kind}"
+        for key, child in list(self._children.items()):
+            yield from self._render_child(key, child)
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0):
+        self._default().inc(amount)
+
+    def _render_child(self, key, child):
+        yield f"{self.name}{_format_labels(self.label_names, key)} {_format_value(child.value)}"
+
+
+class _GaugeChild:
+    __slots__ = ("value", "function")
+
+    def __init__(self):
+        self.value = 0.0
+        self.function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float):
+        self.value = value
+
+    def set_function(self, function: Callable[[], float]):
+        """Evaluate ``function`` at scrape time instead of storing a value."""
+        self.function = function
+
+    def get(self) -> float:
+        return self.function() if self.function is not None else self.value
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float):
+        self._default().set(value)
+
+    def set_function(self, function: Callable[[], float]):
+        self._default().set_function(function)
+
+    def _render_child(self, key, child):
+        yield f"{self.name}{_format_labels(self.label_names, key)} {_format_value(child.get())}"
+
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def time(self):
+        return _Timer(self)
+
+
+class _Timer:
+    __slots__ = ("child", "start")
+
+    def __init__(self, child):
+        self.child = child
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.child.observe(time.perf_counter() - self.start)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self._default().observe(value)
+
+    def time(self):
+        return self._default().time()
+
+    def _render_child(self, key, child):
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), child.counts):
+            cumulative += count
+            le = f'le="{_format_value(bound)}"'
+            yield f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}"
+        labels = _format_labels(self.label_names, key)
+        yield f"{self.name}_sum{labels} {_format_value(child.sum)}"
+        yield f"{self.name}_count{labels} {child.count}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Duplicate metric {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labels=()) -> Counter:
+        return self.register(Counter(name, documentation, labels))
+
+    def gauge(self, name, documentation, labels=()) -> Gauge:
+        return self.register(Gauge(name, documentation, labels))
+
+    def histogram(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# ---- Stage timing switches -------------------------------------------------
+
+_stage_timing = {m.strip() for m in os.environ.get("METRICS_STAGE_TIMING", "").split(",") if m.strip()}
+
+
+def stage_timing_enabled(module: str) -> bool:
+    return module in _stage_timing or "all" in _stage_timing
+
+
+def set_stage_timing(module: str, enabled: bool):
+    """Toggle per-stage timing for one module at runtime."""
+    if enabled:
+        _stage_timing.add(module)
+    else:
+        _stage_timing.discard(module)
+
+
+def stage_timer(histogram: Histogram, module: str, *labels):
+    """Context manager timing a stage, or a no-op when the module is switched off."""
+    if not stage_timing_enabled(module):
+        return nullcontext()
+    return histogram.labels(*labels).time()
+
+
+class StageTimer:
+    """Accumulates named stage durations in plain floats.
+
+    Used where the registry is not reachable (prediction worker processes):
+    the totals travel back with the results and are observed by the caller.
+    """
+
+    __slots__ = ("enabled", "totals", "_last")
+
+    def __init__(self, enabled: bool):
+        self.enabled = enabled
+        self.totals: Dict[str, float] = {}
+        self._last = time.perf_counter() if enabled else 0.0
+
+    def mark(self, stage: str):
+        if self.enabled:
+            now = time.perf_counter()
+            self.totals[stage] = self.totals.get(stage, 0.0) + (now - self._last)
+            self._last = now
+
+
+# ---- Process-wide registry and the metrics the service exports -------------
+
+registry = Registry()
+
+ingest_fetch_seconds = registry.histogram(
+    "ingest_fetch_seconds", "Time to obtain a price per symbol (REST request / stream event delay)",
+    ("source", "symbol"))
+ingest_errors_total = registry.counter("ingest_errors_total", "Exchange fetch or stream errors", ("source",))
+ingest_ticks_total = registry.counter("ingest_ticks_total", "Ticks recorded", ("source",))
+ingest_stage_seconds = registry.histogram(
+    "ingest_stage_seconds", "Ingest duration per stage (request / parse / dispatch)", ("stage",))
+ingest_weight_used = registry.gauge("ingest_weight_used", "Exchange request weight used in the current minute")
+ingest_weight_pressure = registry.gauge(
+    "ingest_weight_pressure", "Share of the ingest's weight budget in use (1 while backing off)")
+ingest_throttled_total = registry.counter(
+    "ingest_throttled_total", "Rate-limit responses from the exchange", ("status",))
+ingest_shed_total = registry.counter(
+    "ingest_shed_total", "Low-priority symbol polls skipped under rate-limit pressure")
+anomaly_alerts_total = registry.counter("anomaly_alerts_total", "Anomaly alerts raised", ("kind",))
+anomaly_scan_seconds = registry.histogram("anomaly_scan_seconds", "Anomaly scan duration per batch of ticks")
+cadence_missed_cycles_total = registry.counter(
+    "cadence_missed_cycles_total", "Fixed-rate loop slots skipped because the work overran", ("loop",))
+ingest_to_broadcast_seconds = registry.histogram(
+    "ingest_to_broadcast_seconds", "Delay from tick arrival to the frame that carries it", ("stream",))
+prediction_seconds = registry.histogram("prediction_seconds", "Prediction job duration per worker", ("worker",))
+prediction_stage_seconds = registry.histogram(
+    "prediction_stage_seconds", "Prediction duration per pipeline stage", ("stage",))
+event_loop_lag_seconds = registry.histogram("event_loop_lag_seconds", "Event-loop wake-up lag")
+connected_clients_gauge = registry.gauge("connected_clients", "Open /ws connections")
+client_queue_depth_max = registry.gauge("client_queue_depth_max", "Deepest per-client outbound queue")
+client_queue_depth_total = registry.gauge("client_queue_depth_total", "Frames waiting in all client queues")
+frames_sent_total = registry.counter("broadcast_frames_sent_total", "Frames written to clients", ("format",))
+frames_dropped_total = registry.counter("broadcast_frames_dropped_total", "Frames not delivered", ("reason",))
+bytes_sent_total = registry.counter(
+    "broadcast_bytes_sent_total", "Payload bytes written to clients (characters for text frames)", ("format",))
+clients_evicted_total = registry.counter("clients_evicted_total", "Clients removed by the broadcaster", ("reason",))
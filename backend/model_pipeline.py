@@ -0,0 +1,230 @@
+# model_pipeline.py
+# Batch prediction as an ordered list of pluggable stages.
+#
+#   features -> scoring -> [model] -> confidence -> safeguards
+#
+# Every stage works on a whole batch (one row per coin) and is timed with
+# StageTimer under its own name. Stages whose outputs depend only on the
+# price window are ``cacheable``: with PIPELINE_CACHE_SIZE set, their per-row
+# results are kept in an LRU keyed by the window's bytes. It is off by
+# default: live windows shift on every tick, so their keys almost never
+# repeat and hashing each row would be pure overhead. It pays off when the
+# same windows are predicted again (re-running one history).
+#
+# The optional model stage scores the ML feature matrix with a small
+# linear / logistic model trained offline by train_model.py:
+#
+#   python backend/train_model.py backend/data/ticks/*.ticks --out backend/data/model.json
+#   MODEL_PATH=backend/data/model.json uvicorn backend.main:app
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from typing import Iterable, List, Optional
+
+import numpy as np
+
+# Trained model file (train_model.py output); "" disables the model stage
+MODEL_PATH = os.environ.get("MODEL_PATH", "")
+
+# How strongly the model's [-1, 1] signal moves the ensemble score
+MODEL_WEIGHT = float(os.environ.get("MODEL_WEIGHT", "0.3"))
+
+# Price windows whose cacheable stage outputs are kept (per worker); 0 (default) disables the cache
+PIPELINE_CACHE_SIZE = int(os.environ.get("PIPELINE_CACHE_SIZE", "0"))
+
+MODEL_TYPES = ("logistic", "linear")
+
+
+class Batch(dict):
+    """One prediction cycle: the price rows plus named per-row arrays set by stages."""
+
+    def __init__(self, prices: np.ndarray, coins: Iterable[str]):
+        super().__init__()
+        self.prices = prices
+        self.coins = list(coins)
+        self.explanations: List[List[str]] = [[] for _ in self.coins]
+
+    def __len__(self):
+        return len(self.coins)
+
+    def note(self, mask, text):
+        """Append an explanation to every row in ``mask`` (``text`` may be a function of the row)."""
+        for i in np.flatnonzero(mask):
+            self.explanations[i].append(text(i) if callable(text) else text)
+
+
+class Stage:
+    """One pipeline step; ``run`` reads and writes arrays on the batch."""
+
+    name = "stage"
+    # Outputs depend only on the price row (and add no explanations), so rows can be cached
+    cacheable = False
+    # Batch keys a cacheable stage produces, each an array with one entry per row
+    outputs = ()
+
+    def run(self, batch: Batch):
+        raise NotImplementedError
+
+
+class StageCache:
+    """LRU of cacheable stage outputs, keyed by (stage, price window)."""
+
+    def __init__(self, size: int = PIPELINE_CACHE_SIZE):
+        self.size = size
+        self.rows = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(stage: Stage, row: np.ndarray) -> bytes:
+        return stage.name.encode() + hashlib.blake2b(row.tobytes(), digest_size=16).digest()
+
+    def run(self, stage: Stage, batch: Batch):
+        keys = [self.key(stage, row) for row in batch.prices]
+        cached = [self.rows.get(key) for key in keys]
+        missing = [i for i, values in enumerate(cached) if values is None]
+        self.hits += len(keys) - len(missing)
+        self.misses += len(missing)
+
+        if missing:
+            sub = Batch(batch.prices[missing], [batch.coins[i] for i in missing])
+            stage.run(sub)
+            for j, i in enumerate(missing):
+                cached[i] = tuple(sub[name][j] for name in stage.outputs)
+                self.rows[keys[i]] = cached[i]
+        for key in keys:
+            self.rows.move_to_end(key)
+        while len(self.rows) > self.size:
+            self.rows.popitem(last=False)
+
+        for k, name in enumerate(stage.outputs):
+            batch[name] = np.array([values[k] for values in cached])
+
+    def stats(self) -> dict:
+        return {"rows": len(self.rows), "hits": self.hits, "misses": self.misses}
+
+
+class Pipeline:
+    """Runs its stages in order on a batch; ``timer`` gets one mark per stage."""
+
+    def __init__(self, stages: Iterable[Stage], cache_size: int = PIPELINE_CACHE_SIZE):
+        self.stages = list(stages)
+        self.cache = StageCache(cache_size) if cache_size > 0 else None
+
+    def insert(self, stage: Stage, before: Optional[str] = None):
+        """Add a stage before the one named ``before`` (or at the end)."""
+        names = [s.name for s in self.stages]
+        self.stages.insert(names.index(before) if before in names else len(names), stage)
+
+    def remove(self, name: str):
+        self.stages = [s for s in self.stages if s.name != name]
+
+    def stage(self, name: str) -> Optional[Stage]:
+        return next((s for s in self.stages if s.name == name), None)
+
+    def run(self, prices: np.ndarray, coins: Iterable[str], timer=None) -> Batch:
+        batch = Batch(prices, coins)
+        for stage in self.stages:
+            if stage.cacheable and self.cache is not None:
+                self.cache.run(stage, batch)
+            else:
+                stage.run(batch)
+            if timer is not None:
+                timer.mark(stage.name)
+        return batch
+
+
+class LinearModel:
+    """Standardized linear / logistic model over the ML feature vector.
+
+    ``signal`` maps a (N, features) matrix to [-1, 1] in one matrix-vector
+    product: 2p - 1 for logistic models, the clipped output for linear ones.
+    """
+
+    def __init__(self, kind, weights, bias, mean, scale, features=None, meta=None):
+        if kind not in MODEL_TYPES:
+            raise ValueError(f"Unknown model type {kind!r} (expected one of {MODEL_TYPES})")
+        self.kind = kind
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.bias = float(bias)
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        if not (len(self.weights) == len(self.mean) == len(self.scale)):
+            raise ValueError("weights, mean and scale must have the same length")
+        self.features = list(features or [])
+        self.meta = dict(meta or {})
+
+    def decision(self, features: np.ndarray) -> np.ndarray:
+        return (features - self.mean) / self.scale @ self.weights + self.bias
+
+    def signal(self, features: np.ndarray) -> np.ndarray:
+        z = self.decision(features)
+        if self.kind == "logistic":
+            return 2.0 / (1.0 + np.exp(-np.clip(z, -30, 30))) - 1.0
+        return np.clip(z, -1.0, 1.0)
+
+    @classmethod
+    def load(cls, path: str) -> "LinearModel":
+        with open(path) as f:
+            spec = json.load(f)
+        return cls(spec["type"], spec["weights"], spec["bias"], spec["mean"], spec["scale"],
+                   spec.get("features"), spec.get("meta"))
+
+    def save(self, path: str):
+        spec = {
+            "type": self.kind,
+            "features": self.features,
+            "weights": self.weights.tolist(),
+            "bias": self.bias,
+            "mean": self.mean.tolist(),
+            "scale": self.scale.tolist(),
+            "meta": self.meta,
+        }
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(spec, f, indent=2)
+        os.replace(tmp, path)
+
+
+class ModelStage(Stage):
+    """Nudges score and base confidence by a trained model's signal."""
+
+    name = "model"
+
+    def __init__(self, model: LinearModel, weight: float = MODEL_WEIGHT):
+        self.model = model
+        self.weight = weight
+
+    def adjust(self, score, base_confidence, features):
+        """Vectorized (score, base_confidence, signal) after the model's contribution."""
+        signal = self.model.signal(features)
+        score = score + signal * self.weight
+        base_confidence = base_confidence + np.minimum(np.abs(signal) * 0.15, 0.15)
+        return score, base_confidence, signal
+
+    @staticmethod
+    def describe(signal: float) -> Optional[str]:
+        if abs(signal) <= 0.2:
+            return None
+        return f"Model leans {'bullish' if signal > 0 else 'bearish'} ({signal:+.2f})"
+
+    def run(self, batch: Batch):
+        batch["score"], batch["base_confidence"], signal = self.adjust(
+            batch["score"], batch["base_confidence"], batch["ml_features"]
+        )
+        batch["model_signal"] = signal
+        batch.note(np.abs(signal) > 0.2, lambda i: self.describe(float(signal[i])))
+
+
+def load_model_stage(path: str = MODEL_PATH) -> Optional[ModelStage]:
+    """The configured model stage, or None when MODEL_PATH is unset or unreadable."""
+    if not path:
+        return None
+    try:
+        model = LinearModel.load(path)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"⚠️ Model stage disabled, could not load {path}: {e}")
+        return None
+    print(f"🧠 Model stage loaded: {model.kind} on {len(model.weights)} features from {path}")
+    return ModelStage(model)
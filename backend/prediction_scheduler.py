@@ -0,0 +1,341 @@
+# prediction_scheduler.py
+# Runs trend predictions off the event loop on a thread or process pool.
+#
+# Every coin is pinned to one single-threaded worker, so that worker's
+# predictor owns the coin's trend_memory / confidence_history and the
+# stateful smoothing stays consistent. Price windows reach process workers
+# through a per-worker shared-memory staging buffer, not pickled lists.
+#
+# A worker process that dies (OOM, segfault) is replaced on the next call
+# that hits it: the new process gets fresh staging memory and its share of
+# the last exported predictor state, and the call is retried once.
+import asyncio
+import multiprocessing
+import os
+import time
+import zlib
+from concurrent.futures import BrokenExecutor, Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .metrics import prediction_seconds, prediction_stage_seconds, set_stage_timing, stage_timing_enabled
+
+# "process" (default), "thread" or "inline" (run on the event loop, for debugging)
+PREDICTION_EXECUTOR = os.environ.get("PREDICTION_EXECUTOR", "process")
+PREDICTION_WORKERS = int(os.environ.get("PREDICTION_WORKERS", "2"))
+
+Prediction = Tuple[str, str, float]
+
+# Shared-memory blocks attached inside this (worker) process, by name
+_attached: Dict[str, shared_memory.SharedMemory] = {}
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    shm = _attached.get(name)
+    if shm is None:
+        # The scheduler grew its staging buffer: drop the stale mapping
+        for old in _attached.values():
+            old.close()
+        _attached.clear()
+        shm = _attached[name] = shared_memory.SharedMemory(name=name)
+    return shm
+
+
+def _predict_job(groups, shm_name: Optional[str], windows=None, stage_timing: bool = False,
+                 bar_seconds: float = 1.0):
+    """Worker entry point.
+
+    ``groups`` is a list of (coins, row_offset, window_length); rows are read
+    from the shared staging buffer ``shm_name`` (or from ``windows`` when
+    running in-process). Returns ([(coin, prediction)], {stage: seconds}).
+    """
+    from .trend_predictor_ai import predict_trends_batch, predictor
+
+    # The caller's switch wins: worker processes don't see set_stage_timing calls
+    set_stage_timing("trend_predictor_ai", stage_timing)
+
+    if shm_name is not None:
+        shm = _attach(shm_name)
+        buffer = np.ndarray((shm.size // 8,), dtype=np.float64, buffer=shm.buf)
+    else:
+        buffer = windows
+
+    results = []
+    for coins, offset, length in groups:
+        block = buffer[offset:offset + len(coins) * length].reshape(len(coins), length)
+        results.extend(zip(coins, predict_trends_batch(block, coins, bar_seconds)))
+    return results, predictor.take_stage_times()
+
+
+def _warm_job(length: int) -> float:
+    """Import the predictor and run it once so the first live cycle is not a cold start.
+
+    The warm-up coin's memory is forgotten again; returns the seconds it took.
+    """
+    started = time.perf_counter()
+    from .trend_predictor_ai import predictor
+
+    window = 100.0 + np.sin(np.arange(max(length, 30)) / 5.0)
+    predictor.predict_trends_batch(window[None, :], ["__warm__"])
+    predictor.forget("__warm__")
+    predictor.take_stage_times()
+    return time.perf_counter() - started
+
+
+def _export_state_job():
+    from .trend_predictor_ai import predictor
+    return predictor.export_state()
+
+
+def _import_state_job(state):
+    from .trend_predictor_ai import predictor
+    predictor.import_state(state)
+
+
+def _forget_job(coins):
+    from .trend_predictor_ai import predictor
+    for coin in coins:
+        predictor.forget(coin)
+
+
+def worker_for(coin: str, workers: int) -> int:
+    """Stable coin -> worker pinning (same answer in every process)."""
+    return zlib.crc32(coin.encode()) % workers
+
+
+class _Worker:
+    """One single-threaded executor plus its staging buffer."""
+
+    def __init__(self, executor: Executor, use_shm: bool):
+        self.executor = executor
+        self.use_shm = use_shm
+        self.shm: Optional[shared_memory.SharedMemory] = None
+        # One job at a time: the staging buffer is reused for the next job
+        self.lock = asyncio.Lock()
+
+    def staging(self, size: int) -> np.ndarray:
+        needed = max(size, 1) * 8
+        if self.shm is None or self.shm.size < needed:
+            self.release()
+            self.shm = shared_memory.SharedMemory(create=True, size=needed * 2)
+        return np.ndarray((self.shm.size // 8,), dtype=np.float64, buffer=self.shm.buf)
+
+    def release(self):
+        if self.shm is not None:
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+
+class PredictionScheduler:
+    """Fans prediction work out to pinned workers with bounded concurrency."""
+
+    def __init__(self, mode: str = PREDICTION_EXECUTOR, workers: int = PREDICTION_WORKERS,
+                 max_in_flight: Optional[int] = None):
+        self.mode = mode
+        self.workers_count = max(1, workers)
+        self.max_in_flight = max_in_flight or self.workers_count
+        self.in_flight = 0
+        self.completed = 0
+        self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        self.restarts = 0
+        self._workers: List[_Worker] = []
+        # Last exported / imported predictor state, re-imported into a replaced worker
+        self._last_state: dict = {}
+
+    def _executor(self) -> Executor:
+        if self.mode == "thread":
+            return ThreadPoolExecutor(max_workers=1, thread_name_prefix="predict")
+        # spawn: never fork a process that is running an event loop and threads
+        return ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+
+    def _start(self):
+        if self._workers or self.mode == "inline":
+            return
+        for _ in range(self.workers_count):
+            self._workers.append(_Worker(self._executor(), use_shm=self.mode != "thread"))
+
+    def _owned_state(self, index: int) -> dict:
+        """The part of the last exported state that belongs to worker ``index``."""
+        return {
+            name: {coin: values for coin, values in memory.items() if worker_for(coin, self.workers_count) == index}
+            for name, memory in self._last_state.items()
+        }
+
+    async def _restart(self, index: int):
+        """Replace a dead worker (caller holds its lock) and restore its coins' state."""
+        worker = self._workers[index]
+        broken, worker.executor = worker.executor, self._executor()
+        broken.shutdown(wait=False, cancel_futures=True)
+        worker.release()  # fresh staging memory on the next job
+        self.restarts += 1
+        state = self._owned_state(index)
+        if any(state.values()):
+            await asyncio.get_running_loop().run_in_executor(worker.executor, _import_state_job, state)
+
+    async def _run(self, index: int, fn, prepare=lambda worker: ()):
+        """``fn(*prepare(worker))`` on worker ``index`` (caller holds its lock).
+
+        ``prepare`` stages the job's arguments; if the worker has died it is
+        replaced and the job is staged and run once more.
+        """
+        worker = self._workers[index]
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(worker.executor, fn, *prepare(worker))
+        except BrokenExecutor as e:
+            print(f"⚠️ Prediction worker {index} died ({e}); restarting it")
+            await self._restart(index)
+            return await loop.run_in_executor(worker.executor, fn, *prepare(worker))
+
+    async def predict(self, windows: Dict[str, np.ndarray], bar_seconds: float = 1.0) -> Dict[str, Prediction]:
+        """Predict every coin in ``windows`` (coin -> price window) concurrently.
+
+        ``bar_seconds`` is the spacing of the window points (1 for raw ticks).
+        """
+        # Snapshot the ring-buffer views now: ingest may append while we wait for a worker
+        windows = {coin: np.array(window, dtype=np.float64) for coin, window in windows.items()}
+        if self.mode == "inline":
+            return dict(self._run_inline(windows, bar_seconds))
+        self._start()
+
+        by_worker: Dict[int, Dict[str, np.ndarray]] = {}
+        for coin, window in windows.items():
+            by_worker.setdefault(worker_for(coin, self.workers_count), {})[coin] = window
+
+        jobs = [self._submit(i, batch, bar_seconds) for i, batch in by_worker.items()]
+        results = {}
+        for pairs in await asyncio.gather(*jobs):
+            results.update(pairs)
+        return results
+
+    @staticmethod
+    def _observe(worker: str, started: float, output):
+        pairs, stage_times = output
+        prediction_seconds.labels(worker).observe(time.perf_counter() - started)
+        for stage, seconds in stage_times.items():
+            prediction_stage_seconds.labels(stage).observe(seconds)
+        return pairs
+
+    @staticmethod
+    def _layout(windows: Dict[str, np.ndarray]):
+        """Group coins by window length and assign contiguous row offsets."""
+        by_length: Dict[int, List[str]] = {}
+        for coin, window in windows.items():
+            by_length.setdefault(len(window), []).append(coin)
+        groups, offset = [], 0
+        for length, coins in by_length.items():
+            groups.append((coins, offset, length))
+            offset += len(coins) * length
+        return groups, offset
+
+    def _run_inline(self, windows, bar_seconds):
+        groups, size = self._layout(windows)
+        buffer = np.empty(size)
+        self._stage(buffer, groups, windows)
+        started = time.perf_counter()
+        output = _predict_job(groups, None, buffer, stage_timing_enabled("trend_predictor_ai"), bar_seconds)
+        return self._observe("inline", started, output)
+
+    @staticmethod
+    def _stage(buffer, groups, windows):
+        for coins, offset, length in groups:
+            block = buffer[offset:offset + len(coins) * length].reshape(len(coins), length)
+            for row, coin in zip(block, coins):
+                row[:] = windows[coin]
+
+    async def _submit(self, index: int, windows, bar_seconds: float):
+        worker = self._workers[index]
+        groups, size = self._layout(windows)
+        stage_timing = stage_timing_enabled("trend_predictor_ai")
+
+        def prepare(worker):
+            if worker.use_shm:
+                self._stage(worker.staging(size), groups, windows)
+                return groups, worker.shm.name, None, stage_timing, bar_seconds
+            buffer = np.empty(size)
+            self._stage(buffer, groups, windows)
+            return groups, None, buffer, stage_timing, bar_seconds
+
+        async with self._semaphore, worker.lock:
+            self.in_flight += 1
+            try:
+                started = time.perf_counter()
+                output = await self._run(index, _predict_job, prepare)
+                return self._observe(str(index), started, output)
+            finally:
+                self.in_flight -= 1
+                self.completed += 1
+
+    async def warm(self, length: int) -> List[float]:
+        """Start every worker and load the predictor in it ahead of the first prediction.
+
+        ``length`` is the expected window length. Returns seconds per worker.
+        """
+        if self.mode == "inline":
+            return [_warm_job(length)]
+        self._start()
+
+        async def warm_one(index):
+            async with self._workers[index].lock:
+                return await self._run(index, _warm_job, lambda worker: (length,))
+
+        return list(await asyncio.gather(*(warm_one(i) for i in range(len(self._workers)))))
+
+    async def export_state(self) -> dict:
+        """Collect trend_memory / confidence_history from the worker that owns each coin."""
+        if self.mode == "inline" or not self._workers:
+            return _export_state_job()
+        merged = {"trend_memory": {}, "confidence_history": {}}
+        for i, worker in enumerate(self._workers):
+            async with worker.lock:
+                state = await self._run(i, _export_state_job)
+            for name, memory in state.items():
+                merged[name].update(
+                    (coin, values) for coin, values in memory.items() if worker_for(coin, self.workers_count) == i
+                )
+        self._last_state = {name: dict(memory) for name, memory in merged.items()}
+        return merged
+
+    async def import_state(self, state: dict):
+        """Restore a snapshot into every worker (each keeps using only its pinned coins)."""
+        if self.mode == "inline":
+            _import_state_job(state)
+            return
+        self._start()
+        self._last_state = {name: dict(state.get(name, {})) for name in ("trend_memory", "confidence_history")}
+        for i, worker in enumerate(self._workers):
+            async with worker.lock:
+                await self._run(i, _import_state_job, lambda worker: (state,))
+
+    async def forget(self, coins: List[str]):
+        """Release per-coin predictor state on whichever worker owns each coin."""
+        if self.mode == "inline" or not self._workers:
+            _forget_job(coins)
+            return
+        by_worker: Dict[int, List[str]] = {}
+        for coin in coins:
+            by_worker.setdefault(worker_for(coin, self.workers_count), []).append(coin)
+            for memory in self._last_state.values():
+                memory.pop(coin, None)
+        for i, owned in by_worker.items():
+            async with self._workers[i].lock:
+                await self._run(i, _forget_job, lambda worker: (owned,))
+
+    def stats(self) -> dict:
+        return {
+            "mode": self.mode,
+            "workers": self.workers_count if self.mode != "inline" else 0,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "completed": self.completed,
+            "restarts": self.restarts,
+        }
+
+    def shutdown(self):
+        for worker in self._workers:
+            worker.executor.shutdown(wait=False, cancel_futures=True)
+            worker.release()
+        self._workers = []
@@ -0,0 +1,116 @@
+# price_store.py
+# Preallocated ring-buffer price history shared by the streamer and predictor.
+import time
+
+import numpy as np
+
+
+class PriceRing:
+    """Fixed-capacity float64 ring of prices and timestamps for one symbol.
+
+    Every value is written twice (at ``i`` and ``i + capacity``) so the most
+    recent ``n`` points are always one contiguous slice: ``window`` returns a
+    read-only NumPy view with no copy and no list conversion.
+    """
+
+    __slots__ = ("capacity", "size", "count", "_head", "_prices", "_timestamps")
+
+    def __init__(self, capacity):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.size = 0  # points currently held (<= capacity)
+        self.count = 0  # points ever appended
+        self._head = 0  # next write position in [0, capacity)
+        self._prices = np.zeros(2 * capacity, dtype=np.float64)
+        self._timestamps = np.zeros(2 * capacity, dtype=np.float64)
+
+    def append(self, price, timestamp=None):
+        i = self._head
+        cap = self.capacity
+        price = float(price)
+        timestamp = time.time() if timestamp is None else float(timestamp)
+        self._prices[i] = self._prices[i + cap] = price
+        self._timestamps[i] = self._timestamps[i + cap] = timestamp
+        self._head = i + 1 if i + 1 < cap else 0
+        if self.size < cap:
+            self.size += 1
+        self.count += 1
+
+    def _slice(self, buffer, n):
+        n = self.size if n is None else max(0, min(n, self.size))
+        end = self._head + self.capacity
+        view = buffer[end - n:end]
+        view.flags.writeable = False
+        return view
+
+    def window(self, n=None):
+        """Last ``n`` prices (oldest first) as a view; valid until the next append"""
+        return self._slice(self._prices, n)
+
+    def timestamps(self, n=None):
+        return self._slice(self._timestamps, n)
+
+    @property
+    def last_price(self):
+        return float(self._prices[self._head + self.capacity - 1]) if self.size else None
+
+    @property
+    def last_timestamp(self):
+        return float(self._timestamps[self._head + self.capacity - 1]) if self.size else None
+
+    def __len__(self):
+        return self.size
+
+
+class PriceHistoryStore:
+    """Per-symbol price rings with a dict-like read interface.
+
+    ``store[coin]`` and ``store.items()`` yield zero-copy window views, so
+    existing ``len(history)`` / ``history[-1]`` callers keep working.
+    """
+
+    def __init__(self, symbols=(), capacity=60):
+        self.capacity = capacity
+        self._rings = {}
+        for symbol in symbols:
+            self.add_symbol(symbol)
+
+    def add_symbol(self, symbol):
+        if symbol not in self._rings:
+            self._rings[symbol] = PriceRing(self.capacity)
+        return self._rings[symbol]
+
+    def remove_symbol(self, symbol):
+        self._rings.pop(symbol, None)
+
+    def ring(self, symbol):
+        return self._rings[symbol]
+
+    def append(self, symbol, price, timestamp=None):
+        self.add_symbol(symbol).append(price, timestamp)
+
+    def window(self, symbol, n=None):
+        return self._rings[symbol].window(n)
+
+    def timestamps(self, symbol, n=None):
+        return self._rings[symbol].timestamps(n)
+
+    def __getitem__(self, symbol):
+        return self._rings[symbol].window()
+
+    def __contains__(self, symbol):
+        return symbol in self._rings
+
+    def __iter__(self):
+        return iter(self._rings)
+
+    def __len__(self):
+        return len(self._rings)
+
+    def keys(self):
+        return self._rings.keys()
+
+    def items(self):
+        for symbol, ring in self._rings.items():
+            yield symbol, ring.window()
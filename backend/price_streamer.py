@@ -1,61 +1,239 @@
 # price_streamer.py
 import asyncio
-import json
-from typing import Dict, Any
-import httpx  # pip install httpx
+import time
+import numpy as np
+from datetime import datetime
+from typing import Any, Dict, Optional
+from .anomaly_scanner import AnomalyScanner
+from .binance_ingest import BinanceIngest
+from .broadcaster import broadcaster
+from .candles import CandleAggregator
+from .frames import Frame, alert_frame, price_snapshot
+from .indicator_engine import WINDOW
+from .ingest_budget import Cadence
+from .metrics import ingest_to_broadcast_seconds
+from .price_store import PriceHistoryStore
+from .snapshot_cache import SnapshotCache
+from .symbols import SymbolRegistry
+from .tick_events import tick_events
+from .tick_store import TICK_STORE_DIR, TickStore, records_to_rows
+from .trend_predictor_ai import forget, update_price
 
-connected_clients = set()
+# Tracked pairs (SYMBOLS env at startup, /admin/symbols at runtime)
+symbol_registry = SymbolRegistry.from_env()
 
-SYMBOLS = ["BTCUSDT", "ETHUSDT", "DOTUSDT", "ENAUSDT"]
+# Points of history kept per coin: the indicator window, so every predicted
+# window is the one the streamed indicator state covers
+HISTORY_CAPACITY = WINDOW
 
-# Shared price history: keep last 60 points per coin
-price_history: Dict[str, list[float]] = {s.replace("USDT", ""): [] for s in SYMBOLS}
+# Shared price history: ring buffer of the last HISTORY_CAPACITY points per coin,
+# allocated on the coin's first tick
+price_history = PriceHistoryStore(capacity=HISTORY_CAPACITY)
 
-async def fetch_prices() -> Dict[str, Any]:
-    """Fetch live prices for BTC, ETH, DOT, and ENA from Binance API."""
-    url = "https://api.binance.com/api/v3/ticker/price"
-    prices = {}
-    try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            for symbol in SYMBOLS:
-                resp = await client.get(url, params={"symbol": symbol})
-                resp.raise_for_status()
-                data = resp.json()
-                # Ensure price is converted to float
-                price_value = float(data["price"])
-                prices[symbol.replace("USDT", "")] = price_value
-        return prices
-    except Exception as e:
-        print(f"⚠️ Binance fetch error: {e}")
-        return {s.replace("USDT", ""): None for s in SYMBOLS}
+# OHLC bars per coin at every candles.TIMEFRAMES resolution, fed by the same ticks
+candles = CandleAggregator()
+
+# Append-only tick/candle files for warm restarts and backtests; opened by
+# open_tick_store() on the leader (None until then, or when TICK_STORE_DIR="")
+tick_store: Optional[TickStore] = None
+
+# Stored ticks replayed into the streaming indicators on warm start
+WARM_REPLAY_TICKS = 1000
+
+# Latest price / indicators / trend per coin, served on connect and by GET /snapshot
+snapshot_cache = SnapshotCache()
+
+def publish_alerts(alerts):
+    """Send anomaly alerts out as soon as the scan that raised them finishes."""
+    for alert in alerts:
+        print(f"🚨 {alert['coin']} {alert['kind']} ({alert['direction']}): "
+              f"{alert['move']:+.2%} over {alert['window']} ticks, last tick {alert['return']:+.2%}")
+        broadcaster.update("alerts", alert["coin"], alert)
+    broadcaster.publish(alert_frame(alerts, datetime.now().isoformat()))
+
+# Jump and pump/dump detection on every tick, alerts pushed straight to clients
+anomaly_scanner = AnomalyScanner(on_alerts=publish_alerts)
+
+# coin -> perf_counter of the oldest tick not yet carried by a price frame
+unbroadcast_since: Dict[str, float] = {}
+
+def record_tick(coin: str, price: float, timestamp: float = None):
+    """Append one tick to the history store and advance streaming indicators."""
+    if coin not in symbol_registry:
+        return  # in flight when the symbol was removed
+    symbol_registry.seen(coin)
+    price_history.append(coin, price, timestamp)
+    timestamp = price_history.ring(coin).last_timestamp
+    closed = candles.update(coin, price, timestamp)
+    if tick_store is not None:
+        tick_store.append_tick(coin, price, timestamp)
+        for timeframe, bar in closed:
+            tick_store.append_candle(coin, timeframe, bar)
+    unbroadcast_since.setdefault(coin, time.perf_counter())
+    update_price(coin, price)
+    anomaly_scanner.push(coin, price, timestamp)
+    # Wake the trend loop for this coin only
+    tick_events.notify(coin)
+    sequence = tick_events.sequence[coin]
+    snapshot_cache.on_tick(coin, price, timestamp, sequence)
+    # Followers mirror price_history, candles and the snapshot cache from the raw ticks
+    broadcaster.forward({"kind": "tick", "coin": coin, "price": price, "timestamp": timestamp, "sequence": sequence})
+
+def open_tick_store() -> Optional[TickStore]:
+    """Open the tick store once, on first use; None when persistence is disabled."""
+    global tick_store
+    if tick_store is None and TICK_STORE_DIR:
+        tick_store = TickStore(TICK_STORE_DIR)
+    return tick_store
+
+def warm_start() -> int:
+    """Reload recent ticks and candles from the tick store; returns ticks loaded."""
+    if tick_store is None:
+        return 0
+    loaded = 0
+    for coin in symbol_registry.coins:
+        ticks = tick_store.recent_ticks(coin, max(HISTORY_CAPACITY, WARM_REPLAY_TICKS))
+        if len(ticks) == 0:
+            continue
+        timestamps, prices = ticks["timestamp"].tolist(), ticks["price"].tolist()
+        # Leader-only state is rebuilt from scratch, so a worker promoted twice doesn't fold ticks twice
+        forget(coin)
+        anomaly_scanner.forget(coin)
+        for price in prices:
+            update_price(coin, price)
+        # Prime the rolling return statistics; alerts on replayed ticks are stale
+        anomaly_scanner.prime(coin, prices)
+
+        # A promoted follower already mirrors the ring and candles: only add the ticks it missed
+        mirrored = price_history.ring(coin).last_timestamp if coin in price_history else None
+        if mirrored is not None:
+            missed = tick_store.ticks_since(coin, mirrored)
+            for timestamp, price in zip(missed["timestamp"].tolist(), missed["price"].tolist()):
+                if timestamp > mirrored:
+                    price_history.append(coin, price, timestamp)
+                    candles.update(coin, price, timestamp)
+        else:
+            for timestamp, price in zip(timestamps[-HISTORY_CAPACITY:], prices[-HISTORY_CAPACITY:]):
+                price_history.append(coin, price, timestamp)
+            load_candles(coin, timestamps[-1])
+
+        loaded += len(prices)
+        tick_events.notify(coin)
+        snapshot_cache.on_tick(coin, prices[-1], timestamps[-1], tick_events.sequence[coin])
+    return loaded
+
+def load_candles(coin: str, last: float):
+    """Reload a coin's closed bars from the tick store and rebuild each forming bar from its ticks."""
+    for timeframe, series in candles.add_symbol(coin).items():
+        closed = records_to_rows(tick_store.recent_candles(coin, timeframe, series.capacity))
+        series.load(closed)
+        # The forming bar was never written: rebuild it from its ticks
+        start = closed[-1][0] + series.seconds if len(closed) else last - last % series.seconds
+        forming = tick_store.ticks_since(coin, start)
+        for timestamp, price in zip(forming["timestamp"].tolist(), forming["price"].tolist()):
+            series.update(price, timestamp)
+
+def release_symbol(coin: str):
+    """Free every piece of in-process state held for a coin."""
+    price_history.remove_symbol(coin)
+    candles.remove_symbol(coin)
+    unbroadcast_since.pop(coin, None)
+    tick_events.forget(coin)
+    snapshot_cache.forget(coin)
+    anomaly_scanner.forget(coin)
+    broadcaster.forget(coin)
+    forget(coin)
+
+def bus_snapshot():
+    """Leader state a newly joined follower needs; every event is idempotent."""
+    events = []
+    for coin in price_history:
+        ring = price_history.ring(coin)
+        events.append({
+            "kind": "history",
+            "coin": coin,
+            "timestamps": ring.timestamps().tolist(),
+            "prices": ring.window().tolist(),
+            "sequence": tick_events.sequence.get(coin),
+        })
+    for coin in candles:
+        bars = {tf: candles.series(coin, tf).bars().tolist() for tf in candles.timeframes}
+        events.append({"kind": "candles", "coin": coin, "bars": bars})
+    for stream, symbols in broadcaster.latest.items():
+        for symbol, fields in symbols.items():
+            entry = snapshot_cache.entries.get(symbol, {})
+            sequence = entry.get("trend_sequence" if stream == "trends" else "indicators_sequence")
+            events.append({"kind": "update", "stream": stream, "symbol": symbol, "fields": fields, "sequence": sequence})
+    return events
+
+def apply_event(event):
+    """Follower side: mirror one leader event into local state and clients."""
+    kind = event.get("kind")
+    if kind == "tick":
+        price_history.append(event["coin"], event["price"], event["timestamp"])
+        candles.update(event["coin"], event["price"], event["timestamp"])
+        snapshot_cache.on_tick(event["coin"], event["price"], event["timestamp"], event.get("sequence"))
+    elif kind == "publish":
+        broadcaster.publish(Frame(event["payload"]), event.get("droppable", False))
+    elif kind == "update":
+        broadcaster.update(event["stream"], event["symbol"], event["fields"])
+        snapshot_cache.on_stream(event["stream"], event["symbol"], event["fields"], event.get("sequence"))
+    elif kind == "history":
+        price_history.remove_symbol(event["coin"])
+        ring = price_history.add_symbol(event["coin"])
+        for timestamp, price in zip(event["timestamps"], event["prices"]):
+            ring.append(price, timestamp)
+        if event["prices"]:
+            snapshot_cache.on_tick(event["coin"], event["prices"][-1], event["timestamps"][-1], event.get("sequence"))
+    elif kind == "forget":
+        release_symbol(event["coin"])
+    elif kind == "candles":
+        candles.remove_symbol(event["coin"])
+        series = candles.add_symbol(event["coin"])
+        for timeframe, rows in event["bars"].items():
+            if timeframe in series and rows:
+                series[timeframe].load(np.asarray(rows, dtype=np.float64))
+
+# Binance feed (combined WebSocket stream, pooled bulk REST as fallback)
+ingest = BinanceIngest(symbol_registry.symbols, record_tick, low_priority=symbol_registry.low_priority)
+
+def on_symbols_changed(added, removed):
+    ingest.set_symbols(symbol_registry.symbols, symbol_registry.low_priority)
+    for coin in removed:
+        release_symbol(coin)
+
+symbol_registry.listeners.append(on_symbols_changed)
+
+def latest_prices() -> Dict[str, Any]:
+    """Most recent price per coin (None until the first tick arrives)."""
+    return {coin: price_history.ring(coin).last_price for coin in price_history}
 
 async def broadcast_prices():
     """Broadcast live Binance prices to all connected WebSocket clients."""
+    ingest_task = asyncio.create_task(ingest.run())
+    # Frames go out on a steady one-second beat, however long building them took
+    cadence = Cadence(1.0, "prices")
     try:
         while True:
-            prices = await fetch_prices()
-            if prices:
-                # update price history - ensure all values are floats
-                for coin, price in prices.items():
-                    if price is not None:
-                        hist = price_history[coin]
-                        hist.append(float(price))  # Explicitly convert to float
-                        if len(hist) > 60:
-                            hist.pop(0)
-
-                message = json.dumps(prices)
-                # send to all clients
-                for client in list(connected_clients):
-                    try:
-                        await client.send_text(message)
-                    except Exception as e:
-                        print("Removing dead client:", e)
-                        connected_clients.discard(client)
-
-            await asyncio.sleep(1)  # every second
+            prices = latest_prices()
+            for coin, price in prices.items():
+                if price is not None:
+                    broadcaster.update("prices", coin, {"price": price})
+                    broadcaster.update("candles", coin, candles.latest(coin))
+            if any(price is not None for price in prices.values()):
+                # Queue for every client; slow clients only keep the newest price frame
+                broadcaster.publish(price_snapshot(prices, datetime.now().isoformat()), droppable=True)
+                now = time.perf_counter()
+                for arrived in unbroadcast_since.values():
+                    ingest_to_broadcast_seconds.labels("prices").observe(now - arrived)
+                unbroadcast_since.clear()
+
+            await cadence.wait()
     except asyncio.CancelledError:
         print("🛑 broadcast_prices task cancelled, exiting cleanly")
         raise
     except Exception as e:
         print("Unexpected error in broadcast_prices:", e)
-        raise
\ No newline at end of file
+        raise
+    finally:
+        ingest_task.cancel()
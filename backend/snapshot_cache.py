@@ -0,0 +1,83 @@
+# snapshot_cache.py
+# Latest per-symbol state (price, indicators, trend), versioned by tick sequence.
+#
+# Served to /ws clients on connect and over GET /snapshot with ETags, so a
+# new dashboard or a polling consumer costs a dictionary lookup, not a
+# recomputation. Each symbol's ETag is derived from its tick sequence number
+# and the sequences its trend and indicators were computed at, so it is the
+# same on every worker that mirrors the leader.
+import zlib
+from typing import Dict, Optional, Tuple
+
+from .frames import Frame
+
+
+class SnapshotCache:
+    def __init__(self):
+        self.entries: Dict[str, dict] = {}
+        self._etags: Dict[str, str] = {}
+        self._all: Optional[Tuple[dict, str]] = None  # (payload, etag), rebuilt lazily
+        self._frame: Optional[Frame] = None
+
+    def _entry(self, coin: str) -> dict:
+        entry = self.entries.get(coin)
+        if entry is None:
+            entry = self.entries[coin] = {
+                "coin": coin, "sequence": 0, "price": None, "timestamp": None,
+                "trend": None, "trend_sequence": None, "indicators": None, "indicators_sequence": None,
+            }
+        return entry
+
+    def _changed(self, coin: str):
+        entry = self.entries[coin]
+        self._etags[coin] = f'"{coin}-{entry["sequence"]}-{entry["trend_sequence"]}-{entry["indicators_sequence"]}"'
+        self._all = None
+        self._frame = None
+
+    def on_tick(self, coin: str, price: float, timestamp: float, sequence: Optional[int]):
+        entry = self._entry(coin)
+        entry["price"] = price
+        entry["timestamp"] = timestamp
+        entry["sequence"] = entry["sequence"] + 1 if sequence is None else sequence
+        self._changed(coin)
+
+    def on_stream(self, stream: str, coin: str, fields: dict, sequence: Optional[int] = None):
+        """Mirror a broadcaster stream update ("trends" / "indicators").
+
+        ``sequence`` is the tick sequence of the window the fields were
+        computed from; ticks that arrived while they were computed are newer.
+        """
+        if stream == "trends":
+            entry = self._entry(coin)
+            entry["trend"] = fields
+            entry["trend_sequence"] = entry["sequence"] if sequence is None else sequence
+        elif stream == "indicators":
+            entry = self._entry(coin)
+            entry["indicators"] = fields
+            entry["indicators_sequence"] = entry["sequence"] if sequence is None else sequence
+        else:
+            return
+        self._changed(coin)
+
+    def forget(self, coin: str):
+        if self.entries.pop(coin, None) is not None:
+            self._etags.pop(coin, None)
+            self._all = None
+            self._frame = None
+
+    def get(self, coin: str) -> Tuple[Optional[dict], Optional[str]]:
+        return self.entries.get(coin), self._etags.get(coin)
+
+    def all(self) -> Tuple[dict, str]:
+        """Every symbol's entry and one ETag covering all of them."""
+        if self._all is None:
+            combined = ",".join(self._etags[coin] for coin in sorted(self._etags))
+            self._all = (dict(self.entries), f'"all-{zlib.crc32(combined.encode()):08x}-{len(self._etags)}"')
+        return self._all
+
+    def frame(self) -> Frame:
+        """The on-connect snapshot frame, encoded at most once per version and format."""
+        if self._frame is None:
+            entries, etag = self.all()
+            self._frame = Frame({"type": "snapshot", "version": etag.strip('"'), "symbols": entries})
+        return self._frame
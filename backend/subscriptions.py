@@ -0,0 +1,120 @@
+# subscriptions.py
+# Per-client subscription state for the /ws delta protocol.
+#
+# Client -> server:
+#   {"action": "subscribe", "symbols": ["BTC", "ETH"], "streams": ["prices", "trends"]}
+#   {"action": "unsubscribe", "symbols": ["ETH"]}
+# "symbols" defaults to "*" (every symbol) and "streams" to all of STREAMS.
+# "*" has no exclusions: to drop one symbol, unsubscribe "*" and subscribe
+# to the ones to keep. Malformed messages are answered with an error frame.
+#
+# Server -> client (only the fields that changed since this client's last frame):
+#   {"type": "delta", "timestamp": ..., "prices": {"BTC": {"price": 61000.5}}, "trends": {...}}
+# "candles" deltas carry the forming bar per timeframe: {"BTC": {"1m": [time, o, h, l, c]}}
+# "alerts" deltas carry the symbol's latest anomaly alert as it is raised.
+from typing import Dict, Optional, Set
+
+from .confidence import confidence_level
+
+STREAMS = ("prices", "trends", "indicators", "candles", "alerts")
+ALL_SYMBOLS = "*"
+
+
+def trend_key(fields):
+    """Trend updates are only sent when the trend or its confidence bucket changes."""
+    return fields.get("trend"), confidence_level(fields.get("confidence", 0.0))
+
+
+# Optional per-stream gate: a frame is sent only when the key changes
+STREAM_KEYS = {"trends": trend_key}
+
+
+class SubscriptionError(ValueError):
+    pass
+
+
+class Subscription:
+    """What one client watches, and what it has already been sent."""
+
+    def __init__(self):
+        self.streams: Dict[str, Set[str]] = {}
+        self.sent: Dict[tuple, dict] = {}
+
+    def apply(self, message) -> Set[tuple]:
+        """Apply a subscribe/unsubscribe message.
+
+        Returns the (stream, symbol) pairs that were added, so the caller can
+        push their current state; symbol may be ALL_SYMBOLS.
+        """
+        if not isinstance(message, dict):
+            raise SubscriptionError("Expected a JSON object")
+        action = message.get("action")
+        symbols = self._names(message.get("symbols", [ALL_SYMBOLS]), "symbols")
+        streams = self._names(message.get("streams", list(STREAMS)), "streams")
+        unknown = [s for s in streams if s not in STREAMS]
+        if unknown:
+            raise SubscriptionError(f"Unknown streams: {', '.join(unknown)}")
+        symbols = {s.upper() if s != ALL_SYMBOLS else s for s in symbols}
+
+        added = set()
+        if action == "subscribe":
+            for stream in streams:
+                watched = self.streams.setdefault(stream, set())
+                added.update((stream, symbol) for symbol in symbols - watched)
+                watched.update(symbols)
+        elif action == "unsubscribe":
+            if ALL_SYMBOLS not in symbols:
+                # "*" has no exclusions: dropping one symbol from it would silently do nothing
+                wildcard = [stream for stream in streams if ALL_SYMBOLS in self.streams.get(stream, ())]
+                if wildcard:
+                    raise SubscriptionError(
+                        f"Subscribed to all symbols on {', '.join(wildcard)}: unsubscribe \"*\" "
+                        "and subscribe to the symbols to keep"
+                    )
+            for stream in streams:
+                watched = self.streams.get(stream, set())
+                if ALL_SYMBOLS in symbols:
+                    watched.clear()
+                else:
+                    watched.difference_update(symbols)
+                if not watched:
+                    self.streams.pop(stream, None)
+            # Forget what was sent so a later re-subscribe starts from a full frame
+            for key in list(self.sent):
+                if key[0] in streams and (ALL_SYMBOLS in symbols or key[1] in symbols):
+                    del self.sent[key]
+        else:
+            raise SubscriptionError(f"Unknown action: {action!r}")
+        return added
+
+    @staticmethod
+    def _names(value, field: str):
+        """A string or a list of strings, as a list."""
+        if isinstance(value, str):
+            return [value]
+        if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+            raise SubscriptionError(f'"{field}" must be a string or a list of strings')
+        return value
+
+    def wants(self, stream: str, symbol: str) -> bool:
+        watched = self.streams.get(stream)
+        return bool(watched) and (symbol in watched or ALL_SYMBOLS in watched)
+
+    def delta(self, stream: str, symbol: str, fields: dict) -> Optional[dict]:
+        """Changed fields since the last frame sent for (stream, symbol), or None."""
+        key = (stream, symbol)
+        previous = self.sent.get(key)
+        gate = STREAM_KEYS.get(stream)
+        if previous is not None and gate is not None and gate(previous) == gate(fields):
+            return None
+        if previous is None:
+            changed = dict(fields)
+        else:
+            changed = {k: v for k, v in fields.items() if previous.get(k) != v}
+        if not changed:
+            return None
+        self.sent[key] = dict(fields)
+        return changed
+
+    def describe(self) -> dict:
+        return {stream: sorted(symbols) for stream, symbols in self.streams.items()}
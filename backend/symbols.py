@@ -0,0 +1,122 @@
+# symbols.py
+# Runtime symbol universe: which Binance pairs are ingested and predicted.
+#
+#   SYMBOLS=BTCUSDT,ETHUSDT,SOLUSDT uvicorn backend.main:app       (initial set)
+#   POST /admin/symbols {"symbols": ["ADA", "XRPUSDT"]}     (add at runtime)
+#   POST /admin/symbols {"symbols": ["PEPE"], "low_priority": true}
+#   DELETE /admin/symbols/ADA                               (remove at runtime)
+#
+# Per-symbol state (price ring, candles, indicators, trend memory) is not
+# allocated here: it appears on the first tick and is released when the
+# symbol is removed or has been idle for IDLE_TIMEOUT seconds. Low-priority
+# symbols are the first the REST ingest slows down under rate-limit pressure.
+import os
+import re
+import time
+from typing import Callable, Dict, Iterable, List, Set
+
+QUOTE = "USDT"
+DEFAULT_SYMBOLS = os.environ.get("SYMBOLS", "BTCUSDT,ETHUSDT,DOTUSDT,ENAUSDT")
+# Coins among SYMBOLS that are polled less often when the exchange budget runs low
+LOW_PRIORITY_SYMBOLS = os.environ.get("LOW_PRIORITY_SYMBOLS", "")
+
+# Seconds without a tick before a symbol's in-memory state is evicted
+IDLE_TIMEOUT = float(os.environ.get("SYMBOL_IDLE_TIMEOUT", "300"))
+
+_VALID = re.compile(r"^[A-Z0-9]{2,20}$")
+
+ChangeListener = Callable[[List[str], List[str]], None]  # (added coins, removed coins)
+
+
+def normalize(symbol: str) -> str:
+    """``"btc"`` / ``"BTCUSDT"`` -> ``"BTCUSDT"``"""
+    symbol = str(symbol).strip().upper()
+    if not symbol.endswith(QUOTE):
+        symbol += QUOTE
+    if symbol == QUOTE or not _VALID.match(symbol):
+        raise ValueError(f"Invalid symbol: {symbol!r}")
+    return symbol
+
+
+def coin_of(symbol: str) -> str:
+    return symbol[:-len(QUOTE)] if symbol.endswith(QUOTE) else symbol
+
+
+class SymbolRegistry:
+    """The tracked pairs, keyed by coin, with change listeners."""
+
+    def __init__(self, symbols: Iterable[str] = (), low_priority: Iterable[str] = ()):
+        self._symbols: Dict[str, str] = {}  # coin -> exchange symbol
+        self._low_priority: Set[str] = {coin_of(normalize(s)) for s in low_priority}
+        self.last_tick: Dict[str, float] = {}  # coin -> monotonic time of its latest tick
+        self.listeners: List[ChangeListener] = []
+        for symbol in symbols:
+            symbol = normalize(symbol)
+            self._symbols[coin_of(symbol)] = symbol
+
+    @classmethod
+    def from_env(cls, value: str = DEFAULT_SYMBOLS, low_priority: str = LOW_PRIORITY_SYMBOLS) -> "SymbolRegistry":
+        return cls((s for s in value.split(",") if s.strip()), (s for s in low_priority.split(",") if s.strip()))
+
+    @property
+    def symbols(self) -> List[str]:
+        return list(self._symbols.values())
+
+    @property
+    def coins(self) -> List[str]:
+        return list(self._symbols)
+
+    @property
+    def low_priority(self) -> List[str]:
+        """Exchange symbols of the tracked low-priority coins."""
+        return [symbol for coin, symbol in self._symbols.items() if coin in self._low_priority]
+
+    def _notify(self, added, removed):
+        if added or removed:
+            for listener in self.listeners:
+                listener(added, removed)
+
+    def add(self, symbols: Iterable[str], low_priority: bool = False) -> List[str]:
+        """Track new pairs; returns the coins actually added."""
+        added = []
+        for symbol in map(normalize, symbols):
+            coin = coin_of(symbol)
+            if coin not in self._symbols:
+                self._symbols[coin] = symbol
+                if low_priority:
+                    self._low_priority.add(coin)
+                added.append(coin)
+        self._notify(added, [])
+        return added
+
+    def remove(self, coins: Iterable[str]) -> List[str]:
+        """Stop tracking coins (``"ADA"`` or ``"ADAUSDT"``); returns the coins removed."""
+        removed = []
+        for coin in coins:
+            coin = coin_of(str(coin).strip().upper())
+            if self._symbols.pop(coin, None) is not None:
+                self.last_tick.pop(coin, None)
+                self._low_priority.discard(coin)
+                removed.append(coin)
+        self._notify([], removed)
+        return removed
+
+    def seen(self, coin: str):
+        self.last_tick[coin] = time.monotonic()
+
+    def idle(self, timeout: float = IDLE_TIMEOUT) -> List[str]:
+        """Coins with state whose last tick is older than ``timeout``; they are forgotten."""
+        cutoff = time.monotonic() - timeout
+        stale = [coin for coin, seen in self.last_tick.items() if seen < cutoff]
+        for coin in stale:
+            del self.last_tick[coin]
+        return stale
+
+    def __contains__(self, coin: str) -> bool:
+        return coin in self._symbols
+
+    def __iter__(self):
+        return iter(self._symbols)
+
+    def __len__(self):
+        return len(self._symbols)
@@ -0,0 +1,10 @@
+# conftest.py
+# Shared test setup: the backend is imported as the ``backend`` package from
+# the repository root, with the tick store off so no test writes data files.
+import os
+import sys
+
+os.environ.setdefault("TICK_STORE_DIR", "")
+os.environ.setdefault("PREDICTION_EXECUTOR", "inline")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
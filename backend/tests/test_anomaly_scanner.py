@@ -0,0 +1,114 @@
+# test_anomaly_scanner.py
+import time
+
+import numpy as np
+import pytest
+
+from backend.anomaly_scanner import AnomalyScanner
+
+STATE = ("last", "variance", "count", "total", "squares")
+
+
+def walk(n, seed=0, sd=0.001):
+    rng = np.random.default_rng(seed)
+    return 100.0 * np.exp(np.cumsum(rng.normal(0, sd, n)))
+
+
+def row(scanner, coin):
+    """One symbol's state, with its return ring unrolled oldest first (the ring's rotation may differ)."""
+    slot = scanner._slots[coin]
+    state = {name: getattr(scanner, name)[slot].copy() for name in STATE}
+    head = int(scanner.head[slot])
+    ring = scanner.returns[slot]
+    state["ring"] = np.roll(ring, -head) if state["count"] >= scanner.window else ring[:head].copy()
+    return state
+
+
+def scan_each(scanner, coin, prices, start=0.0):
+    alerts = []
+    for i, price in enumerate(prices):
+        alerts += scanner.scan([coin], [price], [start + i])
+    return alerts
+
+
+@pytest.mark.parametrize("ticks", [1, 2, 20, 60, 61, 150])
+def test_prime_matches_scanning_tick_by_tick(ticks):
+    prices = walk(ticks + 40)
+    primed, scanned = AnomalyScanner(), AnomalyScanner()
+    # Part of the history already streamed, the rest primed on top of it
+    scan_each(primed, "BTC", prices[:40])
+    primed.prime("BTC", prices[40:])
+    scan_each(scanned, "BTC", prices)
+    for name, value in row(primed, "BTC").items():
+        assert np.allclose(value, row(scanned, "BTC")[name]), name
+    # ...and both keep agreeing as live ticks stream in
+    live = walk(70, seed=3) * prices[-1] / 100.0
+    scan_each(primed, "BTC", live)
+    scan_each(scanned, "BTC", live)
+    for name, value in row(primed, "BTC").items():
+        assert np.allclose(value, row(scanned, "BTC")[name]), name
+
+
+def test_prime_is_one_pass_per_coin():
+    scanner = AnomalyScanner()
+    prices = walk(1000)
+    started = time.perf_counter()
+    for i in range(50):
+        scanner.prime(f"C{i}", prices)
+    assert time.perf_counter() - started < 0.5
+
+
+def test_jump_alerts_once_per_cooldown():
+    scanner = AnomalyScanner(cooldown=30)
+    prices = walk(100)
+    prices[80:] *= 1.03
+    alerts = scan_each(scanner, "BTC", prices)
+    assert [(a["coin"], a["kind"], a["direction"], a["timestamp"]) for a in alerts] == [("BTC", "jump", "up", 80.0)]
+
+
+def test_steady_pump_and_dump():
+    scanner = AnomalyScanner()
+    up = walk(100, seed=1) * np.exp(np.r_[np.zeros(50), np.arange(1, 51) * 0.003])
+    down = walk(100, seed=2) * np.exp(np.r_[np.zeros(50), np.arange(1, 51) * -0.003])
+    alerts = []
+    for i in range(100):
+        alerts += scanner.scan(["UP", "DOWN"], [up[i], down[i]], [i, i])
+    kinds = {(a["coin"], a["kind"]) for a in alerts}
+    assert ("UP", "pump") in kinds and ("DOWN", "dump") in kinds
+    assert ("UP", "dump") not in kinds and ("DOWN", "pump") not in kinds
+
+
+def test_no_alerts_on_a_calm_tape_or_before_warmup():
+    scanner = AnomalyScanner()
+    prices = walk(500, sd=0.0005)
+    assert scan_each(scanner, "BTC", prices) == []
+    fresh = AnomalyScanner(warmup=30)
+    assert scan_each(fresh, "ETH", [100.0] * 10 + [200.0]) == []
+
+
+def test_repeated_coins_in_one_batch_are_applied_in_order():
+    batched, single = AnomalyScanner(), AnomalyScanner()
+    prices = walk(30)
+    batched.scan(["BTC"] * 30 + ["ETH"], list(prices) + [5.0], list(range(31)))
+    scan_each(single, "BTC", prices)
+    for name, value in row(batched, "BTC").items():
+        assert np.allclose(value, row(single, "BTC")[name]), name
+
+
+def test_forget_frees_and_resets_the_row():
+    scanner = AnomalyScanner(capacity=2)
+    for coin in ("A", "B", "C"):  # grows past the initial capacity
+        scan_each(scanner, coin, walk(5))
+    scanner.forget("A")
+    assert scanner.stats()["symbols"] == 2
+    scan_each(scanner, "D", [1.0])
+    assert row(scanner, "D")["count"] == 0 and row(scanner, "D")["last"] == 1.0
+
+
+def test_flush_batches_pending_ticks_and_reports_alerts():
+    seen = []
+    scanner = AnomalyScanner(on_alerts=seen.extend)
+    for i, price in enumerate(walk(60)):
+        scanner.push("BTC", price, i)  # no running loop: each push scans at once
+    scanner.push("BTC", 200.0, 60)
+    assert [a["kind"] for a in seen] == ["jump"]
@@ -0,0 +1,42 @@
+# test_bench_suite.py
+# Smoke runs of the benchmark suites at toy sizes, so they keep working as the code changes.
+import json
+
+import pytest
+
+from backend.benchmarks import bench_suite
+
+
+@pytest.fixture
+def tiny(monkeypatch):
+    monkeypatch.setattr(bench_suite, "WINDOWS", [30, 60])
+    monkeypatch.setattr(bench_suite, "SYMBOL_COUNTS", [4])
+    monkeypatch.setattr(bench_suite, "CLIENT_COUNTS", [2])
+    monkeypatch.setattr(bench_suite, "BACKTEST_TICKS", 500)
+    real = bench_suite.time_call
+    monkeypatch.setattr(bench_suite, "time_call", lambda fn, min_time=0.05, repeat=5: real(fn, 0.001, 1))
+
+
+@pytest.mark.parametrize("suite", ["indicators", "predict", "anomaly", "backtest"])
+def test_suite_reports_metrics(tiny, suite):
+    results = {}
+    bench_suite.SUITES[suite](results, None)
+    assert results
+    for name, entry in results.items():
+        assert name.startswith(f"{suite}.") or suite == "indicators"
+        assert entry["value"] > 0 and entry["better"] in ("lower", "higher")
+
+
+def test_compare_flags_regressions(tmp_path, capsys):
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps({"results": {
+        "predict.batch.n4": {"value": 100.0, "unit": "symbols/s", "better": "higher"},
+        "anomaly.scan_us.n4": {"value": 10.0, "unit": "us/scan", "better": "lower"},
+    }}))
+    results = {}
+    bench_suite.metric(results, "predict.batch.n4", 50.0, "symbols/s", "higher")
+    bench_suite.metric(results, "anomaly.scan_us.n4", 9.0, "us/scan")
+    bench_suite.compare(results, str(baseline))
+    lines = {line.split()[0]: line for line in capsys.readouterr().out.splitlines() if line.strip()}
+    assert lines["predict.batch.n4"].endswith("!")
+    assert not lines["anomaly.scan_us.n4"].endswith("!")
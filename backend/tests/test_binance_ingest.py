@@ -0,0 +1,89 @@
+# test_binance_ingest.py
+# Combined-stream parsing and live (un)subscription, including frames from
+# fake_binance's /stream endpoint.
+import asyncio
+import json
+
+from fastapi.testclient import TestClient
+
+from backend import fake_binance
+from backend.binance_ingest import BinanceIngest
+
+
+def make_ingest(symbols=("BTCUSDT", "ETHUSDT")):
+    ticks = []
+    ingest = BinanceIngest(symbols, lambda coin, price, timestamp: ticks.append((coin, price, timestamp)),
+                           ws_url="ws://fake/")
+    return ingest, ticks
+
+
+class FakeSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, message):
+        self.sent.append(json.loads(message))
+
+
+def test_handle_message_reads_combined_and_bare_frames():
+    ingest, ticks = make_ingest()
+    combined = {"stream": "btcusdt@miniTicker", "data": {"e": "24hrMiniTicker", "E": 1_700_000_000_000,
+                                                          "s": "BTCUSDT", "c": "65000.5"}}
+    assert ingest.handle_message(json.dumps(combined))
+    assert ingest.handle_message(json.dumps({"s": "ETHUSDT", "c": "3000", "E": 1_700_000_001_000}))
+    assert ticks == [("BTC", 65000.5, 1_700_000_000.0), ("ETH", 3000.0, 1_700_000_001.0)]
+
+
+def test_handle_message_skips_other_frames():
+    ingest, ticks = make_ingest()
+    assert not ingest.handle_message(json.dumps({"result": None, "id": 1}))  # (un)subscribe answer
+    assert not ingest.handle_message(json.dumps({"data": {"s": "DOGEUSDT", "c": "0.1"}}))  # untracked
+    assert not ingest.handle_message(json.dumps({"data": {"s": "BTCUSDT"}}))  # no price
+    assert ticks == []
+
+
+def test_stream_url_lists_every_symbol():
+    ingest, _ = make_ingest()
+    assert ingest.stream_url == "ws://fake/stream?streams=btcusdt@miniTicker/ethusdt@miniTicker"
+
+
+def test_set_symbols_resubscribes_a_live_stream():
+    async def main():
+        ingest, ticks = make_ingest()
+        ingest._ws = socket = FakeSocket()
+        ingest.set_symbols(["BTCUSDT", "SOLUSDT", "ADAUSDT"], low_priority=["ADAUSDT"])
+        await asyncio.sleep(0)
+        assert socket.sent == [
+            {"method": "SUBSCRIBE", "params": ["adausdt@miniTicker", "solusdt@miniTicker"], "id": 1},
+            {"method": "UNSUBSCRIBE", "params": ["ethusdt@miniTicker"], "id": 2},
+        ]
+        assert ingest.low_priority == {"ADAUSDT"}
+        # Ticks for the dropped pair that were already in flight are ignored
+        assert not ingest.handle_message(json.dumps({"s": "ETHUSDT", "c": "3000"}))
+        assert ingest.handle_message(json.dumps({"s": "SOLUSDT", "c": "150"}))
+        assert [coin for coin, _, _ in ticks] == ["SOL"]
+
+    asyncio.run(main())
+
+
+def test_set_symbols_without_a_stream_only_updates_the_list():
+    ingest, _ = make_ingest()
+    ingest.set_symbols(["SOLUSDT"])
+    assert ingest.symbols == ["SOLUSDT"] and ingest.stats()["symbols"] == 1
+
+
+def test_fake_exchange_stream_frames_parse(monkeypatch):
+    monkeypatch.setattr(fake_binance, "TICK_INTERVAL", 0.01)
+    ingest, ticks = make_ingest()
+    client = TestClient(fake_binance.app)
+    with client.websocket_connect("/stream?streams=btcusdt@miniTicker") as ws:
+        assert ingest.handle_message(ws.receive_text())
+        ws.send_text(json.dumps({"method": "SUBSCRIBE", "params": ["ethusdt@miniTicker"], "id": 7}))
+        coins = set()
+        while len(coins) < 2:
+            raw = ws.receive_text()
+            if json.loads(raw).get("id") == 7:
+                continue
+            assert ingest.handle_message(raw)
+            coins.add(ticks[-1][0])
+    assert coins == {"BTC", "ETH"} and all(price > 0 for _, price, _ in ticks)
@@ -0,0 +1,166 @@
+# test_broadcaster.py
+# Per-client queues: publishing never waits on a socket, slow clients skip
+# stale prices, and stuck or dead clients are evicted.
+import asyncio
+import json
+import time
+
+from backend.broadcaster import Broadcaster
+from backend.frames import Frame
+
+
+class FakeWebSocket:
+    """Records sent frames; ``gate`` (when cleared) stalls every send."""
+
+    def __init__(self, fail=False):
+        self.sent = []
+        self.fail = fail
+        self.closed = False
+        self.gate = asyncio.Event()
+        self.gate.set()
+
+    async def send_text(self, text):
+        await self.gate.wait()
+        if self.fail:
+            raise ConnectionError("socket gone")
+        self.sent.append(json.loads(text))
+
+    async def send_bytes(self, data):
+        self.sent.append(data)
+
+    async def close(self):
+        self.closed = True
+
+
+async def settle(turns=5):
+    for _ in range(turns):
+        await asyncio.sleep(0)
+
+
+async def disconnect(broadcaster):
+    """What the /ws handler does when a client leaves; it must not wait on the writer."""
+    started = time.perf_counter()
+    for websocket in list(broadcaster.connections):
+        await asyncio.wait_for(broadcaster.unregister(websocket), 1.0)
+    assert time.perf_counter() - started < 0.5
+
+
+def test_publish_reaches_every_client():
+    async def main():
+        broadcaster = Broadcaster(set())
+        sockets = [FakeWebSocket() for _ in range(3)]
+        for ws in sockets:
+            broadcaster.register(ws)
+        frame = Frame({"type": "trends", "n": 1})
+        assert broadcaster.publish(frame) == 3
+        await settle()
+        assert [ws.sent for ws in sockets] == [[{"type": "trends", "n": 1}]] * 3
+        assert len(frame._encoded) == 1  # serialized once for all three
+        await disconnect(broadcaster)
+
+    asyncio.run(main())
+
+
+def test_slow_client_gets_only_the_newest_price():
+    async def main():
+        broadcaster = Broadcaster(set())
+        slow, fast = FakeWebSocket(), FakeWebSocket()
+        broadcaster.register(slow)
+        broadcaster.register(fast)
+        slow.gate.clear()
+        broadcaster.publish(Frame({"type": "prices", "n": 0}), droppable=True)
+        await settle()  # the slow client's writer is now stuck on frame 0
+        for n in range(1, 5):
+            broadcaster.publish(Frame({"type": "prices", "n": n}), droppable=True)
+            await settle()
+        slow.gate.set()
+        await settle()
+        assert [frame["n"] for frame in fast.sent] == [0, 1, 2, 3, 4]
+        assert [frame["n"] for frame in slow.sent] == [0, 4]
+        assert broadcaster.connections[slow].dropped == 3
+        await disconnect(broadcaster)
+
+    asyncio.run(main())
+
+
+def test_client_with_a_full_queue_is_evicted():
+    async def main():
+        clients = set()
+        broadcaster = Broadcaster(clients, max_queue=3)
+        stuck = FakeWebSocket()
+        broadcaster.register(stuck)
+        stuck.gate.clear()
+        delivered = [broadcaster.publish(Frame({"n": n})) for n in range(6)]
+        await settle()
+        assert delivered == [1, 1, 1, 0, 0, 0]
+        assert stuck not in clients and len(broadcaster) == 0 and stuck.closed
+
+    asyncio.run(main())
+
+
+def test_dead_client_is_evicted_and_others_keep_receiving():
+    async def main():
+        broadcaster = Broadcaster(set())
+        dead, alive = FakeWebSocket(fail=True), FakeWebSocket()
+        broadcaster.register(dead)
+        broadcaster.register(alive)
+        broadcaster.publish(Frame({"n": 1}))
+        await settle()
+        assert dead not in broadcaster.connections and dead.closed
+        assert broadcaster.publish(Frame({"n": 2})) == 1
+        await settle()
+        assert [frame["n"] for frame in alive.sent] == [1, 2]
+        await disconnect(broadcaster)
+
+    asyncio.run(main())
+
+
+def test_subscribers_get_deltas_instead_of_snapshots():
+    async def main():
+        broadcaster = Broadcaster(set())
+        plain, subscriber = FakeWebSocket(), FakeWebSocket()
+        broadcaster.register(plain)
+        broadcaster.register(subscriber).subscribe({"action": "subscribe", "streams": ["prices"], "symbols": ["BTC"]})
+        broadcaster.update("prices", "BTC", {"price": 100.0})
+        broadcaster.update("prices", "ETH", {"price": 5.0})
+        assert broadcaster.publish(Frame({"type": "prices"}), droppable=True) == 1
+        await settle()
+        assert plain.sent == [{"type": "prices"}]
+        kinds = [frame["type"] for frame in subscriber.sent]
+        assert kinds == ["subscribed", "delta"]
+        assert subscriber.sent[1]["prices"] == {"BTC": {"price": 100.0}}
+        await disconnect(broadcaster)
+
+    asyncio.run(main())
+
+
+def test_unregister_and_relay():
+    async def main():
+        relayed = []
+        broadcaster = Broadcaster(set())
+        broadcaster.relay = relayed.append
+        ws = FakeWebSocket()
+        broadcaster.register(ws)
+        await broadcaster.unregister(ws)
+        assert broadcaster.publish(Frame({"n": 1}), droppable=True) == 0
+        broadcaster.update("trends", "BTC", {"trend": "bullish"})
+        broadcaster.forget("BTC")
+        assert [event["kind"] for event in relayed] == ["publish", "update", "forget"]
+        assert broadcaster.latest == {"trends": {}}
+
+    asyncio.run(main())
+
+
+def test_unregister_never_hangs_on_a_send_in_flight():
+    async def main():
+        # Leave at any point of a send: the writer must stop even if the cancel is swallowed
+        for turns in range(8):
+            broadcaster = Broadcaster(set())
+            ws = FakeWebSocket()
+            broadcaster.register(ws)
+            broadcaster.publish(Frame({"n": turns}))
+            await settle(turns)
+            await disconnect(broadcaster)
+            assert len(broadcaster) == 0
+
+    asyncio.run(main())
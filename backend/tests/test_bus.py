@@ -0,0 +1,203 @@
+# test_bus.py
+# Leader election and event delivery on the bus backends, and a promoted
+# follower's warm start from the tick store.
+import asyncio
+import os
+import sys
+
+import pytest
+
+from backend import price_streamer
+from backend.bus import MemoryBus, RedisBus, SocketBus, make_bus
+from backend.candles import CandleAggregator
+from backend.price_store import PriceHistoryStore
+from backend.symbols import SymbolRegistry
+from backend.tick_store import TickStore
+
+
+async def noop():
+    pass
+
+
+async def start_workers(url, n, received, leaders):
+    """``n`` buses campaigning on ``url``; returns (buses, tasks)."""
+    buses = [SocketBus(url, retry=0.05) for _ in range(n)]
+    tasks = []
+    for bus, inbox in zip(buses, received):
+        async def on_leader(bus=bus):
+            leaders.append(bus)
+        tasks.append(asyncio.create_task(bus.run(inbox.append, on_leader, noop)))
+    return buses, tasks
+
+
+async def stop(tasks):
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def test_memory_bus_always_leads_and_replays_snapshot():
+    bus = MemoryBus()
+    bus.snapshot = lambda: [{"kind": "history", "coin": "BTC"}]
+    received = []
+    bus.listen(received.append)
+    bus.send({"kind": "tick", "coin": "BTC"})
+    assert [event["kind"] for event in received] == ["history", "tick"]
+
+
+def test_make_bus_schemes():
+    assert isinstance(make_bus("memory://"), MemoryBus)
+    assert isinstance(make_bus("unix:///tmp/cryptic-test.sock"), SocketBus)
+    assert isinstance(make_bus("tcp://127.0.0.1:7070"), SocketBus)
+    with pytest.raises(ValueError):
+        make_bus("amqp://localhost")
+
+
+def test_redis_bus_without_the_package(monkeypatch):
+    monkeypatch.setitem(sys.modules, "redis", None)
+    monkeypatch.setitem(sys.modules, "redis.asyncio", None)
+    with pytest.raises(RuntimeError):
+        make_bus("redis://localhost:6379/0")
+
+
+def test_unix_bus_elects_one_leader_and_fails_over(tmp_path):
+    url = f"unix://{tmp_path / 'bus.sock'}"
+    received = [[] for _ in range(4)]
+    leaders = []
+
+    async def main():
+        buses, tasks = await start_workers(url, 4, received, leaders)
+        try:
+            await asyncio.sleep(0.3)
+            assert len(leaders) == 1
+            leader = leaders[0]
+            assert sum(bus.is_leader for bus in buses) == 1
+            assert len(leader.followers) == 3
+
+            leader.send({"kind": "tick", "coin": "BTC", "price": 1.0})
+            await asyncio.sleep(0.1)
+            for bus, inbox in zip(buses, received):
+                assert inbox == ([] if bus is leader else [{"kind": "tick", "coin": "BTC", "price": 1.0}])
+
+            # The leader goes away: exactly one follower takes over and the rest follow it
+            index = buses.index(leader)
+            await stop([tasks[index]])
+            await asyncio.sleep(0.5)
+            assert len(leaders) == 2 and leaders[1] is not leader
+            assert len(leaders[1].followers) == 2
+        finally:
+            await stop(tasks)
+
+    asyncio.run(main())
+
+
+def test_unix_bus_replaces_stale_socket_file(tmp_path):
+    path = tmp_path / "bus.sock"
+    path.write_text("")  # left behind by a crashed leader: nothing listens on it
+    leaders = []
+
+    async def main():
+        _, tasks = await start_workers(f"unix://{path}", 1, [[]], leaders)
+        await asyncio.sleep(0.2)
+        await stop(tasks)
+
+    asyncio.run(main())
+    assert len(leaders) == 1
+
+
+def test_unix_bus_keeps_a_live_socket_while_the_lock_is_held(tmp_path):
+    url = f"unix://{tmp_path / 'bus.sock'}"
+    bus, other = SocketBus(url), SocketBus(url)
+
+    async def main():
+        bus.server = await bus._bind()
+        try:
+            # A follower whose connect failed must not unlink the leader's socket
+            with pytest.raises(OSError):
+                await other._bind()
+            assert os.path.exists(bus.path)
+            reader, writer = await other._connect()
+            writer.close()
+        finally:
+            bus.server.close()
+            bus._release_lock()
+
+    asyncio.run(main())
+
+
+@pytest.mark.skipif(not os.environ.get("TEST_REDIS_URL"), reason="set TEST_REDIS_URL to run against Redis")
+def test_redis_bus_elects_one_leader():
+    pytest.importorskip("redis")
+    url = os.environ["TEST_REDIS_URL"]
+    prefix = f"cryptic-test-{os.getpid()}"
+    leaders = []
+    received = [[], []]
+
+    async def main():
+        buses = [RedisBus(url, prefix=prefix, lease=1.0) for _ in range(2)]
+        tasks = []
+        for bus, inbox in zip(buses, received):
+            async def on_leader(bus=bus):
+                leaders.append(bus)
+            tasks.append(asyncio.create_task(bus.run(inbox.append, on_leader, noop)))
+        try:
+            await asyncio.sleep(0.5)
+            assert len(leaders) == 1
+            leaders[0].send({"kind": "tick", "coin": "BTC"})
+            await asyncio.sleep(0.5)
+            follower = 1 - buses.index(leaders[0])
+            assert {"kind": "tick", "coin": "BTC"} in received[follower]
+        finally:
+            await stop(tasks)
+            await buses[0].redis.delete(f"{prefix}:leader")
+
+    asyncio.run(main())
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """A tick store holding 100 ticks of one coin, with fresh in-memory state around it."""
+    registry = SymbolRegistry(["BTCUSDT"])
+    coin = registry.coins[0]
+    tick_store = TickStore(str(tmp_path))
+    ticks = [(1_700_000_000.0 + 7 * i, 100.0 + (i % 13)) for i in range(100)]
+    recorded = CandleAggregator()
+    for timestamp, price in ticks:
+        tick_store.append_tick(coin, price, timestamp)
+        for timeframe, bar in recorded.update(coin, price, timestamp):
+            tick_store.append_candle(coin, timeframe, bar)
+    tick_store.flush()
+    monkeypatch.setattr(price_streamer, "symbol_registry", registry)
+    monkeypatch.setattr(price_streamer, "tick_store", tick_store)
+    monkeypatch.setattr(price_streamer, "price_history", PriceHistoryStore(capacity=price_streamer.HISTORY_CAPACITY))
+    monkeypatch.setattr(price_streamer, "candles", CandleAggregator())
+    yield coin, ticks, recorded
+    tick_store.close()
+
+
+def assert_state(coin, ticks, recorded):
+    ring = price_streamer.price_history.ring(coin)
+    expected = ticks[-price_streamer.HISTORY_CAPACITY:]
+    assert ring.timestamps().tolist() == [timestamp for timestamp, _ in expected]
+    assert ring.window().tolist() == [price for _, price in expected]
+    for timeframe in recorded.timeframes:
+        assert (price_streamer.candles.series(coin, timeframe).bars() == recorded.series(coin, timeframe).bars()).all()
+
+
+def test_warm_start_from_cold(store):
+    coin, ticks, recorded = store
+    assert price_streamer.warm_start() == len(ticks)
+    assert_state(coin, ticks, recorded)
+
+
+def test_warm_start_after_takeover_adds_only_missed_ticks(store):
+    coin, ticks, recorded = store
+    # The follower mirrored all but the last few ticks before the leader died
+    for timestamp, price in ticks[:90]:
+        price_streamer.price_history.append(coin, price, timestamp)
+        price_streamer.candles.update(coin, price, timestamp)
+    price_streamer.warm_start()
+    assert_state(coin, ticks, recorded)
+    # A second promotion changes nothing
+    price_streamer.warm_start()
+    assert_state(coin, ticks, recorded)
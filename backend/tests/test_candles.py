@@ -0,0 +1,59 @@
+# test_candles.py
+import numpy as np
+import pytest
+
+from backend.candles import CLOSE, HIGH, LOW, OPEN, TICKS, TIME, CandleAggregator, CandleSeries, format_duration, timeframe_seconds
+
+
+def test_timeframe_names():
+    assert timeframe_seconds("15m") == 900.0 and timeframe_seconds("1h") == 3600.0
+    assert format_duration(900) == "15m" and format_duration(86400) == "24h" and format_duration(90) == "90s"
+    with pytest.raises(ValueError):
+        timeframe_seconds("5w")
+
+
+def test_ticks_fold_into_ohlc_bars():
+    series = CandleSeries(60, capacity=4)
+    assert series.update(10.0, 0.0)
+    for price, ts in ((12.0, 10.0), (9.0, 20.0), (11.0, 59.0)):
+        assert not series.update(price, ts)
+    assert series.update(20.0, 61.0)
+    first, forming = series.bars()
+    assert first.tolist() == [0.0, 10.0, 12.0, 9.0, 11.0, 4.0]
+    assert forming[[TIME, OPEN, CLOSE, TICKS]].tolist() == [60.0, 20.0, 20.0, 1.0]
+    assert not series.update(1.0, 30.0)  # late tick for a closed bar is ignored
+    assert series.bars()[0][LOW] == 9.0
+
+
+def test_series_keeps_only_the_newest_bars_contiguously():
+    series = CandleSeries(1, capacity=3)
+    for ts in range(10):
+        series.update(float(ts), float(ts))
+    assert len(series) == 3 and series.count == 10
+    assert series.closes().tolist() == [7.0, 8.0, 9.0]
+    assert series.bars(2)[:, TIME].tolist() == [8.0, 9.0]
+    assert not series.bars().flags.writeable
+
+
+def test_load_appends_only_newer_bars():
+    series = CandleSeries(60, capacity=3)
+    series.update(5.0, 60.0)
+    rows = np.array([[t, 1.0, 2.0, 0.5, 1.5, 3.0] for t in (0.0, 60.0, 120.0, 180.0)])
+    series.load(rows)
+    assert series.bars()[:, TIME].tolist() == [60.0, 120.0, 180.0]
+    assert series.bars()[0][CLOSE] == 5.0  # the live bar was kept
+    assert series.rows(1) == [[180.0, 1.0, 2.0, 0.5, 1.5]]
+
+
+def test_aggregator_reports_closed_bars_per_timeframe():
+    candles = CandleAggregator({"1m": 60.0, "5m": 300.0}, capacity=10)
+    assert candles.update("BTC", 100.0, 0.0) == []
+    candles.update("BTC", 105.0, 30.0)
+    closed = candles.update("BTC", 101.0, 60.0)
+    assert [(tf, bar[HIGH]) for tf, bar in closed] == [("1m", 105.0)]
+    assert candles.latest("BTC") == {"1m": [60.0, 101.0, 101.0, 101.0, 101.0], "5m": [0.0, 100.0, 105.0, 100.0, 101.0]}
+    assert candles.closes("BTC", "1m").tolist() == [105.0, 101.0]
+    assert candles.history(["5m"]) == {"5m": {"BTC": [[0.0, 100.0, 105.0, 100.0, 101.0]]}}
+    assert "BTC" in candles and list(candles) == ["BTC"]
+    candles.remove_symbol("BTC")
+    assert candles.latest("BTC") == {} and "BTC" not in candles
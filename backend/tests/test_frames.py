@@ -0,0 +1,45 @@
+# test_frames.py
+import json
+
+import pytest
+
+from backend import frames
+from backend.frames import JSON, MSGPACK, Frame, encode, negotiate, price_snapshot
+
+PAYLOAD = {"type": "prices", "timestamp": "2024-01-01T00:00:00", "prices": {"BTC": 65000.5, "ETH": 3000.25}}
+
+
+def test_frame_encodes_each_format_once(monkeypatch):
+    calls = []
+    real = frames.encode
+    monkeypatch.setattr(frames, "encode", lambda payload, fmt=JSON: calls.append(fmt) or real(payload, fmt))
+    frame = Frame(PAYLOAD)
+    for _ in range(3):
+        assert json.loads(frame.encoded(JSON)) == PAYLOAD
+    assert calls == [JSON]
+
+
+def test_json_frames_are_text_and_compact():
+    data = encode(PAYLOAD)
+    assert isinstance(data, str) and ", " not in data and ": " not in data
+    assert json.loads(data) == PAYLOAD
+
+
+def test_json_without_orjson(monkeypatch):
+    monkeypatch.setattr(frames, "orjson", None)
+    assert encode(PAYLOAD) == json.dumps(PAYLOAD, separators=(",", ":"))
+
+
+def test_msgpack_frames_are_binary():
+    msgpack = pytest.importorskip("msgpack")
+    data = price_snapshot(PAYLOAD["prices"], PAYLOAD["timestamp"]).encoded(MSGPACK)
+    assert isinstance(data, bytes)
+    assert msgpack.unpackb(data, raw=False) == PAYLOAD
+
+
+def test_negotiate_falls_back_to_json(monkeypatch):
+    assert negotiate(None) == JSON
+    assert negotiate("XML") == JSON
+    monkeypatch.setattr(frames, "msgpack", None)
+    assert frames.available_formats() == [JSON]
+    assert negotiate("msgpack") == JSON
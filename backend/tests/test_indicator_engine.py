@@ -0,0 +1,81 @@
+# test_indicator_engine.py
+# The streaming indicators against the predictor's array-based methods.
+import numpy as np
+import pytest
+
+from backend import batch_indicators, indicator_engine
+from backend.indicator_engine import IndicatorState, RollingWindow
+from backend.trend_predictor_ai import AdvancedTrendPredictor
+
+
+def random_walk(length, seed=0, scale=0.01):
+    rng = np.random.default_rng(seed)
+    return 100.0 * np.exp(np.cumsum(rng.normal(0, scale, length)))
+
+
+@pytest.mark.parametrize("window", [1, 5, 20])
+def test_rolling_window_tracks_mean_and_variance(window):
+    values = random_walk(300, seed=window)
+    rolling = RollingWindow(window)
+    for i, value in enumerate(values):
+        rolling.push(value)
+        tail = values[max(0, i + 1 - window):i + 1]
+        assert len(rolling) == len(tail)
+        assert rolling.mean == pytest.approx(tail.mean(), rel=1e-12)
+        assert rolling.variance == pytest.approx(tail.var(), rel=1e-7, abs=1e-12)
+
+
+def test_rolling_window_resyncs(monkeypatch):
+    monkeypatch.setattr(indicator_engine, "RESYNC_INTERVAL", 7)
+    rolling = RollingWindow(4)
+    for value in [1e9, 1.0, 2.0, 3.0, 4.0, 5.0, 6.0]:
+        rolling.push(value)
+    # The huge value left the window; the resync re-summed the rest exactly
+    assert rolling.mean == 4.5
+    assert rolling.variance == 1.25
+
+
+def test_oscillators_wait_for_enough_prices():
+    state = IndicatorState()
+    for price in range(1, 15):
+        state.update(float(price))
+    assert state.rsi() == 50 and state.macd() == (0.0, 0.0, 0.0)
+    state.update(15.0)
+    assert state.rsi() == 100
+    for price in range(16, 27):
+        state.update(float(price))
+    assert state.macd()[0] > 0
+
+
+def test_oscillators_follow_the_window_as_it_slides():
+    prices = random_walk(200, seed=5)
+    state = IndicatorState(window=60)
+    for i, price in enumerate(prices):
+        state.update(price)
+        if i % 7 == 0 or i == len(prices) - 1:
+            window = prices[max(0, i - 59):i + 1][None]
+            line, signal, histogram = batch_indicators.macd(window)
+            assert state.rsi() == pytest.approx(batch_indicators.rsi(window)[0], abs=1e-9)
+            assert state.macd() == pytest.approx((line[0], signal[0], histogram[0]), abs=1e-12)
+
+
+def test_indicator_state_matches_the_array_methods():
+    predictor = AdvancedTrendPredictor(cache_size=0)
+    prices = random_walk(60, seed=3)
+    state = IndicatorState.from_prices(prices)
+
+    assert state.bollinger_bands() == pytest.approx(predictor.calculate_bollinger_bands(prices))
+    assert state.support_resistance() == pytest.approx(predictor.calculate_support_resistance(prices))
+    assert state.market_regime() == predictor.market_regime_detection(prices)
+    assert state.ml_features() == pytest.approx(predictor.machine_learning_features(prices).tolist(), abs=1e-12)
+    assert state.rsi() == pytest.approx(predictor.calculate_rsi(prices))
+    assert state.macd() == pytest.approx(predictor.calculate_macd(prices))
+    assert state.last_price == prices[-1] and state.lag(30) == prices[-30]
+
+
+def test_indicator_state_before_enough_prices():
+    state = IndicatorState.from_prices([100.0, 101.0])
+    assert state.bollinger_bands() == (101.0, 101.0, 101.0, 0.0)
+    assert state.market_regime() == "unknown"
+    assert state.ml_features() == [0.0] * 10
+    assert state.snapshot()["regime"] == "unknown"
@@ -0,0 +1,185 @@
+# test_ingest_budget.py
+# BinanceIngest's rate-limit budget, cadence and shedding against fake_binance,
+# served in-process through httpx's ASGI transport.
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from backend import binance_ingest, fake_binance
+from backend.binance_ingest import BinanceIngest
+from backend.ingest_budget import Cadence, RateLimited, WeightBudget
+
+SYMBOLS = ["BTCUSDT", "ETHUSDT", "DOTUSDT", "ENAUSDT"]
+
+
+@pytest.fixture
+def exchange(monkeypatch):
+    """The fake exchange with a fresh weight meter and no injected faults."""
+    monkeypatch.setattr(fake_binance, "meter", {"minute": 0, "used": 0, "retry_until": 0.0})
+    monkeypatch.setattr(fake_binance, "LATENCY", 0.0)
+    monkeypatch.setattr(fake_binance, "ERROR_RATE", 0.0)
+    monkeypatch.setattr(fake_binance, "WEIGHT_LIMIT", 6000)
+    return fake_binance
+
+
+def make_ingest(symbols=SYMBOLS, budget=None, **kwargs):
+    ticks = []
+    ingest = BinanceIngest(symbols, lambda coin, price, timestamp: ticks.append(coin),
+                           rest_url="http://fake", budget=budget or WeightBudget(limit=6000), **kwargs)
+    ingest._client = httpx.AsyncClient(transport=httpx.ASGITransport(app=fake_binance.app), base_url="http://fake")
+    return ingest, ticks
+
+
+def test_bulk_poll_tracks_the_exchange_weight(exchange):
+    async def run():
+        ingest, ticks = make_ingest()
+        await ingest.poll_once()
+        await ingest.poll_once()
+        await ingest.close()
+        return ingest, ticks
+
+    ingest, ticks = asyncio.run(run())
+    assert sorted(ticks) == sorted(["BTC", "ETH", "DOT", "ENA"] * 2)
+    assert ingest.budget.used == exchange.meter["used"] == 8
+
+
+def test_429_backs_off_without_touching_the_exchange(exchange, monkeypatch):
+    monkeypatch.setattr(exchange, "WEIGHT_LIMIT", 8)
+
+    async def run():
+        ingest, _ = make_ingest()
+        await ingest.poll_once()
+        await ingest.poll_once()
+        with pytest.raises(RateLimited) as limited:
+            await ingest.poll_once()  # 12 > 8: the exchange answers 429
+        sent = exchange.meter["used"]
+        with pytest.raises(RateLimited):
+            await ingest.poll_once()  # still inside Retry-After: never sent
+        await ingest.close()
+        return ingest, limited.value, sent
+
+    ingest, limited, sent = asyncio.run(run())
+    assert limited.retry_after > 0
+    assert ingest.budget.pressure() == 1.0
+    assert exchange.meter["used"] == sent  # no request during the back-off, so no 418
+
+
+def test_requests_inside_retry_after_are_banned_by_the_fake(exchange, monkeypatch):
+    monkeypatch.setattr(exchange, "ERROR_RATE", 1.0)
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=exchange.app), base_url="http://fake") as client:
+            first = await client.get("/api/v3/ticker/price", params={"symbol": "BTCUSDT"})
+            second = await client.get("/api/v3/ticker/price", params={"symbol": "BTCUSDT"})
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first.status_code == 429 and first.headers["retry-after"] == str(exchange.RETRY_AFTER)
+    assert first.headers["x-mbx-used-weight-1m"] == "2"
+    assert second.status_code == 418
+
+
+def test_own_budget_refuses_before_the_exchange_does(exchange):
+    async def run():
+        ingest, _ = make_ingest(budget=WeightBudget(limit=16, share=0.5))  # 8 allowed: two bulk polls
+        await ingest.poll_once()
+        await ingest.poll_once()
+        with pytest.raises(RateLimited):
+            await ingest.poll_once()
+        await ingest.close()
+
+    asyncio.run(run())
+    assert exchange.meter["used"] == 8
+
+
+def test_low_priority_symbols_are_shed_under_pressure(exchange):
+    budget = WeightBudget(limit=100, share=1.0)
+    ingest, _ = make_ingest(budget=budget, low_priority=["DOTUSDT", "ENAUSDT"])
+
+    budget.used = 10
+    assert ingest.due_symbols() == SYMBOLS
+    assert ingest.stretch() == 1.0
+
+    budget.used = 60
+    cycles = [ingest.due_symbols() for _ in range(binance_ingest.LOW_PRIORITY_EVERY)]
+    assert sum(len(due) == 4 for due in cycles) == 1  # every Nth cycle polls everything
+    assert all(due == ["BTCUSDT", "ETHUSDT"] for due in cycles if len(due) != 4)
+    assert 1.0 < ingest.stretch() < binance_ingest.MAX_STRETCH
+
+    budget.used = 95
+    assert all(ingest.due_symbols() == ["BTCUSDT", "ETHUSDT"] for _ in range(10))
+    assert ingest.stretch() == pytest.approx(1.0 + 0.9 * (binance_ingest.MAX_STRETCH - 1.0))
+
+
+def test_shedding_with_the_weight_reported_by_the_exchange(exchange):
+    async def run():
+        # 20 allowed: from the 3rd poll on (12 used) the budget is past SHED_PRESSURE
+        ingest, ticks = make_ingest(budget=WeightBudget(limit=40, share=0.5), low_priority=["ENAUSDT"])
+        for _ in range(4):
+            await ingest.poll_once()
+        await ingest.close()
+        return ticks
+
+    ticks = asyncio.run(run())
+    assert ticks.count("BTC") == 4
+    assert ticks.count("ENA") < 4
+
+
+def test_one_bad_symbol_keeps_the_other_prices(exchange):
+    async def run():
+        ingest, _ = make_ingest(symbols=["BTCUSDT", "BAD-", "ETHUSDT"])
+        first = await ingest.fetch_prices()
+        used = exchange.meter["used"]
+        second = await ingest.fetch_prices()
+        await ingest.close()
+        return ingest, first, second, exchange.meter["used"] - used
+
+    ingest, first, second, weight = asyncio.run(run())
+    assert set(first) == set(second) == {"BTC", "ETH"}
+    assert ingest.stats()["rejected"] == ["BAD-"]
+    assert weight == 4  # the rejected pair no longer breaks the bulk request
+
+
+def test_rest_cadence_absorbs_latency(exchange, monkeypatch):
+    monkeypatch.setattr(exchange, "LATENCY", 0.1)
+
+    async def run():
+        ingest, ticks = make_ingest(symbols=["BTCUSDT"], poll_interval=0.2)
+        await ingest.run_rest(until=time.monotonic() + 1.0)
+        await ingest.close()
+        return ticks
+
+    # A sleep of poll_interval after each fetch would manage ~4 polls in a second
+    assert len(asyncio.run(run())) >= 5
+
+
+def test_rest_loop_sits_out_retry_after(exchange, monkeypatch):
+    monkeypatch.setattr(exchange, "ERROR_RATE", 1.0)
+
+    async def run():
+        ingest, ticks = make_ingest(poll_interval=0.05)
+        started = time.monotonic()
+        await ingest.run_rest(until=started + 0.5)
+        await ingest.close()
+        return ticks, time.monotonic() - started
+
+    ticks, elapsed = asyncio.run(run())
+    assert ticks == []
+    assert exchange.meter["used"] == 4  # one request, then silence until the deadline
+    assert elapsed >= 0.45
+
+
+def test_cadence_skips_overrun_slots():
+    async def run():
+        cadence = Cadence(0.05, "test")
+        started = time.monotonic()
+        await cadence.wait()
+        time.sleep(0.17)  # work overruns three slots
+        await cadence.wait()
+        return cadence.missed, time.monotonic() - started
+
+    missed, elapsed = asyncio.run(run())
+    assert missed == 3
+    assert elapsed == pytest.approx(0.25, abs=0.04)
@@ -0,0 +1,23 @@
+# test_loop_monitor.py
+import asyncio
+import time
+
+from backend.loop_monitor import LoopLagMonitor
+
+
+def test_blocking_the_loop_shows_up_as_lag():
+    async def main():
+        monitor = LoopLagMonitor(interval=0.01, window=50)
+        assert monitor.stats()["max_ms"] == 0.0 and monitor.last == 0.0
+        task = asyncio.create_task(monitor.run())
+        await asyncio.sleep(0.05)
+        time.sleep(0.1)  # a synchronous call hogging the loop
+        await asyncio.sleep(0.03)
+        task.cancel()
+        return monitor
+
+    monitor = asyncio.run(main())
+    stats = monitor.stats()
+    assert stats["max_ms"] >= 50.0
+    assert stats["p50_ms"] <= stats["p99_ms"] <= stats["max_ms"]
+    assert len(monitor.samples) >= 3
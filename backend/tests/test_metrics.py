@@ -0,0 +1,59 @@
+# test_metrics.py
+import json
+
+from backend.binance_ingest import BinanceIngest
+from backend.metrics import Registry, ingest_stage_seconds, set_stage_timing, stage_timer
+
+
+def test_render_counters_gauges_and_histograms():
+    registry = Registry()
+    requests = registry.counter("requests_total", "Requests", ("route",))
+    depth = registry.gauge("depth", "Queue depth")
+    latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    requests.labels('a"b').inc(2)
+    depth.set_function(lambda: 7)
+    latency.observe(0.05)
+    latency.observe(5.0)
+
+    lines = registry.render().splitlines()
+    assert "# TYPE requests_total counter" in lines
+    assert 'requests_total{route="a\\"b"} 2' in lines
+    assert "depth 7" in lines
+    assert 'latency_seconds_bucket{le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{le="+Inf"} 2' in lines
+    assert "latency_seconds_count 2" in lines
+
+
+def test_stage_timer_is_a_no_op_until_switched_on():
+    histogram = Registry().histogram("stage_seconds", "Stages", ("stage",))
+    set_stage_timing("unit_test", False)
+    with stage_timer(histogram, "unit_test", "work"):
+        pass
+    assert not histogram._children
+
+    set_stage_timing("unit_test", True)
+    try:
+        with stage_timer(histogram, "unit_test", "work"):
+            pass
+    finally:
+        set_stage_timing("unit_test", False)
+    assert histogram.labels("work").count == 1
+
+
+def test_ingest_stages_are_timed_when_enabled():
+    ticks = []
+    ingest = BinanceIngest(["BTCUSDT"], lambda *tick: ticks.append(tick))
+    frame = json.dumps({"stream": "btcusdt@miniTicker", "data": {"s": "BTCUSDT", "c": "1.5", "E": 1}})
+    before = {stage: ingest_stage_seconds.labels(stage).count for stage in ("parse", "dispatch")}
+
+    ingest.handle_message(frame)
+    assert ingest_stage_seconds.labels("parse").count == before["parse"]
+
+    set_stage_timing("binance_ingest", True)
+    try:
+        ingest.handle_message(frame)
+    finally:
+        set_stage_timing("binance_ingest", False)
+    assert ingest_stage_seconds.labels("parse").count == before["parse"] + 1
+    assert ingest_stage_seconds.labels("dispatch").count == before["dispatch"] + 1
+    assert [price for _, price, _ in ticks] == [1.5, 1.5]
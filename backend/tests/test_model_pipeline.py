@@ -0,0 +1,88 @@
+# test_model_pipeline.py
+import numpy as np
+import pytest
+
+from backend import batch_indicators
+from backend.model_pipeline import LinearModel, ModelStage, Pipeline, Stage, load_model_stage
+from backend.trend_predictor_ai import AdvancedTrendPredictor
+
+
+def random_walks(n, window, seed=0):
+    rng = np.random.default_rng(seed)
+    return 100.0 * np.exp(np.cumsum(rng.normal(0, 0.002, size=(n, window)), axis=1))
+
+
+class Double(Stage):
+    name = "double"
+    cacheable = True
+    outputs = ("doubled",)
+
+    def __init__(self):
+        self.rows = 0
+
+    def run(self, batch):
+        self.rows += len(batch)
+        batch["doubled"] = batch.prices[:, -1] * 2
+
+
+def test_stage_cache_is_off_by_default():
+    assert Pipeline([Double()]).cache is None
+    assert AdvancedTrendPredictor().pipeline.cache is None
+
+
+def test_stage_cache_reuses_rows_for_repeated_windows():
+    stage = Double()
+    pipeline = Pipeline([stage], cache_size=8)
+    prices = random_walks(3, 10)
+    first = pipeline.run(prices, ["A", "B", "C"])["doubled"]
+    again = pipeline.run(prices[[2, 0]], ["C", "A"])["doubled"]
+    assert stage.rows == 3
+    assert np.array_equal(again, first[[2, 0]])
+    assert pipeline.cache.stats() == {"rows": 3, "hits": 2, "misses": 3}
+
+
+def test_cached_and_uncached_predictions_agree():
+    windows = random_walks(20, 60)
+    coins = [f"C{i}" for i in range(20)]
+    plain = AdvancedTrendPredictor(model_path="", cache_size=0)
+    cached = AdvancedTrendPredictor(model_path="", cache_size=64)
+    for _ in range(2):
+        assert plain.predict_trends_batch(windows, coins) == cached.predict_trends_batch(windows, coins)
+    assert cached.pipeline.cache.hits == 20
+
+
+def test_insert_and_remove_stages():
+    pipeline = AdvancedTrendPredictor(model_path="").pipeline
+    names = [s.name for s in pipeline.stages]
+    assert names == ["features", "scoring", "confidence", "safeguards"]
+    model = ModelStage(LinearModel("linear", np.zeros(10), 0.0, np.zeros(10), np.ones(10)))
+    pipeline.insert(model, before="confidence")
+    assert [s.name for s in pipeline.stages] == ["features", "scoring", "model", "confidence", "safeguards"]
+    assert pipeline.stage("model") is model
+    pipeline.remove("model")
+    assert [s.name for s in pipeline.stages] == names
+
+
+def test_linear_model_round_trip_and_signal(tmp_path):
+    n = len(batch_indicators.ML_FEATURE_NAMES)
+    model = LinearModel("logistic", np.arange(n) / n, 0.1, np.zeros(n), np.ones(n),
+                        batch_indicators.ML_FEATURE_NAMES, {"window": 60})
+    path = str(tmp_path / "model.json")
+    model.save(path)
+    loaded = LinearModel.load(path)
+    features = np.random.default_rng(1).normal(size=(5, n))
+    assert np.allclose(loaded.signal(features), model.signal(features))
+    assert np.all(np.abs(model.signal(features)) <= 1.0)
+    assert loaded.meta == {"window": 60}
+
+    stage = load_model_stage(path)
+    assert isinstance(stage, ModelStage)
+    assert load_model_stage(str(tmp_path / "missing.json")) is None
+    assert load_model_stage("") is None
+
+
+def test_linear_model_rejects_bad_specs():
+    with pytest.raises(ValueError):
+        LinearModel("forest", [1.0], 0.0, [0.0], [1.0])
+    with pytest.raises(ValueError):
+        LinearModel("linear", [1.0, 2.0], 0.0, [0.0], [1.0])
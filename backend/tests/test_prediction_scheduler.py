@@ -0,0 +1,120 @@
+# test_prediction_scheduler.py
+# Every executor mode must return what predict_trends_batch returns in-process.
+import asyncio
+
+import numpy as np
+import pytest
+
+from backend.prediction_scheduler import PredictionScheduler, worker_for
+from backend.trend_predictor_ai import AdvancedTrendPredictor
+
+
+def make_windows(prefix, lengths=(60, 60, 40, 60, 40)):
+    rng = np.random.default_rng(len(prefix))
+    return {
+        f"{prefix}{i}": 100.0 * np.exp(np.cumsum(rng.normal(0.001, 0.01, length)))
+        for i, length in enumerate(lengths)
+    }
+
+
+def assert_same(results, expected):
+    """Rows may be batched differently, so confidences agree to float rounding only."""
+    assert results.keys() == expected.keys()
+    for coin, (trend, explanation, confidence) in expected.items():
+        assert results[coin][:2] == (trend, explanation)
+        assert results[coin][2] == pytest.approx(confidence, abs=1e-12)
+
+
+def expected(windows):
+    """First predictions for fresh coins, one batch per window length."""
+    predictor = AdvancedTrendPredictor()
+    results = {}
+    for length in sorted({len(w) for w in windows.values()}):
+        coins = [coin for coin, window in windows.items() if len(window) == length]
+        rows = np.stack([windows[coin] for coin in coins])
+        results.update(zip(coins, predictor.predict_trends_batch(rows, coins)))
+    return results
+
+
+@pytest.mark.parametrize("mode", ["inline", "thread", "process"])
+def test_scheduler_matches_the_in_process_batch(mode):
+    windows = make_windows(f"SCHED{mode.upper()}")
+
+    async def main():
+        scheduler = PredictionScheduler(mode=mode, workers=2)
+        try:
+            return await scheduler.predict(windows), scheduler.stats()
+        finally:
+            scheduler.shutdown()
+
+    results, stats = asyncio.run(main())
+    assert_same(results, expected(windows))
+    assert stats["in_flight"] == 0 and stats["mode"] == mode
+
+
+def test_coins_are_pinned_to_one_worker():
+    assert [worker_for("BTC", 4) for _ in range(3)] == [worker_for("BTC", 4)] * 3
+    assert {worker_for(f"C{i}", 3) for i in range(100)} == {0, 1, 2}
+
+
+def test_windows_are_snapshotted_before_predicting():
+    window = np.linspace(100.0, 110.0, 60)
+    view = window[:]
+
+    async def main():
+        scheduler = PredictionScheduler(mode="thread", workers=1)
+        try:
+            pending = asyncio.ensure_future(scheduler.predict({"SNAPSHOTTED": view}))
+            await asyncio.sleep(0)
+            window[:] = 0.0  # ingest overwrote the ring while the job was queued
+            return await pending
+        finally:
+            scheduler.shutdown()
+
+    results = asyncio.run(main())
+    assert_same(results, expected({"SNAPSHOTTED": np.linspace(100.0, 110.0, 60)}))
+
+
+def test_state_round_trips_through_the_owning_worker():
+    windows = make_windows("STATE", lengths=(60, 60, 60))
+
+    async def main():
+        scheduler = PredictionScheduler(mode="thread", workers=2)
+        try:
+            await scheduler.predict(windows)
+            state = await scheduler.export_state()
+            await scheduler.forget(list(windows))
+            forgotten = await scheduler.export_state()
+            await scheduler.import_state(state)
+            return state, forgotten, await scheduler.export_state()
+        finally:
+            scheduler.shutdown()
+
+    state, forgotten, restored = asyncio.run(main())
+    assert all(coin in state["confidence_history"] for coin in windows)
+    assert not any(coin in forgotten["confidence_history"] for coin in windows)
+    assert {coin: restored["confidence_history"][coin] for coin in windows} == \
+        {coin: state["confidence_history"][coin] for coin in windows}
+
+
+def test_a_dead_worker_is_replaced_with_its_state():
+    windows = make_windows("RESTART", lengths=(60, 60))
+
+    async def main():
+        scheduler = PredictionScheduler(mode="process", workers=1)
+        try:
+            await scheduler.predict(windows)
+            before = await scheduler.export_state()
+            for process in list(scheduler._workers[0].executor._processes.values()):
+                process.kill()
+                process.join()
+            results = await scheduler.predict(windows)
+            return before, results, await scheduler.export_state(), scheduler.stats()
+        finally:
+            scheduler.shutdown()
+
+    before, results, after, stats = asyncio.run(main())
+    assert results.keys() == windows.keys() and stats["restarts"] == 1
+    for coin in windows:
+        # The replacement picked up the exported history and kept extending it
+        assert after["confidence_history"][coin][:-1] == before["confidence_history"][coin]
@@ -0,0 +1,52 @@
+# test_price_store.py
+import numpy as np
+import pytest
+
+from backend.price_store import PriceHistoryStore, PriceRing
+
+
+def test_ring_window_is_oldest_first_across_wraps():
+    ring = PriceRing(4)
+    assert len(ring) == 0 and ring.last_price is None and ring.last_timestamp is None
+    for i in range(1, 11):
+        ring.append(i, 100 + i)
+        held = list(range(max(1, i - 3), i + 1))
+        assert ring.window().tolist() == held
+        assert ring.timestamps().tolist() == [100 + p for p in held]
+    assert ring.size == 4 and ring.count == 10
+    assert ring.window(2).tolist() == [9, 10]
+    assert ring.window(0).tolist() == []
+    assert ring.window(99).tolist() == [7, 8, 9, 10]
+    assert ring.last_price == 10 and ring.last_timestamp == 110
+
+
+def test_ring_window_is_a_read_only_view():
+    ring = PriceRing(3)
+    for price in (1.0, 2.0, 3.0):
+        ring.append(price, 0.0)
+    window = ring.window()
+    assert not window.flags.writeable and not window.flags.owndata
+    with pytest.raises(ValueError):
+        window[0] = 5.0
+
+
+def test_ring_rejects_zero_capacity():
+    with pytest.raises(ValueError):
+        PriceRing(0)
+
+
+def test_history_store_is_dict_like():
+    store = PriceHistoryStore(["BTC"], capacity=3)
+    assert "BTC" in store and len(store["BTC"]) == 0
+    for price in (1.0, 2.0, 3.0, 4.0):
+        store.append("ETH", price, price)
+    assert list(store) == ["BTC", "ETH"] and len(store) == 2
+    assert store["ETH"].tolist() == [2.0, 3.0, 4.0]
+    assert store.window("ETH", 1).tolist() == [4.0]
+    assert store.timestamps("ETH").tolist() == [2.0, 3.0, 4.0]
+    assert {coin: window.tolist() for coin, window in store.items()} == {"BTC": [], "ETH": [2.0, 3.0, 4.0]}
+    assert store.add_symbol("ETH") is store.ring("ETH")
+    store.remove_symbol("ETH")
+    store.remove_symbol("ETH")
+    assert "ETH" not in store and list(store.keys()) == ["BTC"]
+    assert isinstance(store["BTC"], np.ndarray)
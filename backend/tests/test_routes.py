@@ -0,0 +1,36 @@
+# test_routes.py
+# Every REST endpoint is registered on the router and answers on a fresh app.
+from fastapi.testclient import TestClient
+
+from backend.main import create_app, router, snapshot_cache
+
+EXPECTED = {
+    "/symbols", "/admin/symbols", "/admin/symbols/{coin}", "/health", "/metrics", "/alerts",
+    "/snapshot", "/snapshot/{coin}", "/candles/{coin}", "/history/{coin}", "/ws",
+}
+
+
+def test_every_endpoint_is_routed():
+    assert EXPECTED <= {route.path for route in router.routes}
+
+
+def test_snapshot_endpoints_serve_the_cache_with_etags():
+    # No ``with``: the startup event (ingest, workers) does not run
+    client = TestClient(create_app())
+    snapshot_cache.on_tick("ZZZ", 1.5, 1000.0, 1)
+    try:
+        response = client.get("/snapshot")
+        assert response.status_code == 200
+        assert response.json()["symbols"]["ZZZ"]["price"] == 1.5
+        etag = response.headers["etag"]
+        assert client.get("/snapshot", headers={"If-None-Match": etag}).status_code == 304
+
+        assert client.get("/snapshot/zzz").json()["coin"] == "ZZZ"
+        assert client.get("/snapshot/NOPE").status_code == 404
+    finally:
+        snapshot_cache.forget("ZZZ")
+
+
+def test_alerts_endpoint_lists_latest_alert_per_coin():
+    client = TestClient(create_app())
+    assert client.get("/alerts").json() == {"alerts": []}
@@ -0,0 +1,51 @@
+# test_snapshot_cache.py
+from backend.snapshot_cache import SnapshotCache
+
+
+def test_etags_follow_tick_trend_and_indicator_sequences():
+    cache = SnapshotCache()
+    cache.on_tick("BTC", 100.0, 1.0, 7)
+    entry, etag = cache.get("BTC")
+    assert entry["price"] == 100.0 and etag == '"BTC-7-None-None"'
+    cache.on_stream("trends", "BTC", {"trend": "bullish"})
+    cache.on_stream("indicators", "BTC", {"rsi": 55.0})
+    cache.on_stream("prices", "BTC", {"price": 1.0})  # not mirrored
+    entry, etag = cache.get("BTC")
+    assert etag == '"BTC-7-7-7"' and entry["trend"] == {"trend": "bullish"}
+    cache.on_tick("BTC", 101.0, 2.0, None)
+    assert cache.get("BTC")[1] == '"BTC-8-7-7"'
+    assert cache.get("NOPE") == (None, None)
+
+
+def test_results_keep_the_sequence_they_were_computed_at():
+    cache = SnapshotCache()
+    cache.on_tick("BTC", 100.0, 1.0, 10)
+    cache.on_tick("BTC", 101.0, 2.0, 12)  # ticks landed while the trend was predicted
+    cache.on_stream("trends", "BTC", {"trend": "bullish"}, sequence=10)
+    cache.on_stream("indicators", "BTC", {"rsi": 55.0}, sequence=10)
+    assert cache.get("BTC")[1] == '"BTC-12-10-10"'
+
+
+def test_combined_etag_is_stable_and_changes_with_any_symbol():
+    a, b = SnapshotCache(), SnapshotCache()
+    for cache, order in ((a, ("BTC", "ETH")), (b, ("ETH", "BTC"))):
+        for coin in order:
+            cache.on_tick(coin, 1.0, 1.0, 3)
+    assert a.all()[1] == b.all()[1]  # same on every mirroring worker
+    before = a.all()[1]
+    a.on_tick("ETH", 2.0, 2.0, 4)
+    assert a.all()[1] != before
+    a.forget("ETH")
+    a.forget("ETH")
+    assert list(a.all()[0]) == ["BTC"]
+
+
+def test_frame_is_rebuilt_only_after_a_change():
+    cache = SnapshotCache()
+    cache.on_tick("BTC", 100.0, 1.0, 1)
+    frame = cache.frame()
+    assert cache.frame() is frame
+    assert frame.payload["type"] == "snapshot" and list(frame.payload["symbols"]) == ["BTC"]
+    assert frame.payload["version"] == cache.all()[1].strip('"')
+    cache.on_stream("trends", "BTC", {"trend": "bearish"})
+    assert cache.frame() is not frame
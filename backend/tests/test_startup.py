@@ -0,0 +1,64 @@
+# test_startup.py
+# Importing the backend must stay cheap: no app, predictor or network client until used.
+import json
+import os
+import subprocess
+import sys
+
+from backend.benchmarks import bench_startup
+
+ROOT = bench_startup.ROOT
+
+
+def run_python(code, *args, tick_store_dir=""):
+    env = dict(os.environ, TICK_STORE_DIR=tick_store_dir, PREDICTION_EXECUTOR="inline")
+    return subprocess.check_output([sys.executable, *args, "-c", code] if code else [sys.executable, *args],
+                                   cwd=ROOT, env=env, text=True)
+
+
+def test_importing_main_builds_nothing_heavy():
+    code = """
+import json, sys
+import backend.main as main, backend.trend_predictor_ai as ai
+print(json.dumps({
+    "app": main._app is not None,
+    "predictor": ai._predictor is not None,
+    "modules": [m for m in ("httpx", "websockets", "redis") if m in sys.modules],
+}))
+"""
+    loaded = json.loads(run_python(code).splitlines()[-1])
+    assert loaded == {"app": False, "predictor": False, "modules": []}
+
+
+def test_importing_main_opens_no_tick_store(tmp_path):
+    directory = tmp_path / "store"
+    code = "import backend.main, backend.price_streamer as ps; print(ps.tick_store is None)"
+    assert run_python(code, tick_store_dir=str(directory)).splitlines()[-1] == "True"
+    assert not directory.exists()
+
+
+def test_tick_store_is_opened_once_on_first_use(tmp_path, monkeypatch):
+    from backend import price_streamer
+    monkeypatch.setattr(price_streamer, "tick_store", None)
+    monkeypatch.setattr(price_streamer, "TICK_STORE_DIR", "")
+    assert price_streamer.open_tick_store() is None
+    monkeypatch.setattr(price_streamer, "TICK_STORE_DIR", str(tmp_path))
+    store = price_streamer.open_tick_store()
+    assert store is price_streamer.open_tick_store() is price_streamer.tick_store
+    assert os.path.isdir(store.tick_dir)
+    store.close()
+
+
+def test_app_is_built_once_and_the_factory_builds_fresh_ones():
+    from backend import main
+    assert main.app is main.app
+    assert main.create_app() is not main.create_app()
+
+
+def test_scripts_run_as_modules_and_as_files():
+    assert "usage" in run_python(None, "-m", "backend.backtest", "--help").lower()
+    assert "usage" in run_python(None, os.path.join("backend", "train_model.py"), "--help").lower()
+
+
+def test_startup_probe_reports_seconds():
+    assert 0 <= bench_startup.probe(bench_startup.PROBES["import.candles"]) < 10
@@ -0,0 +1,71 @@
+# test_subscriptions.py
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.main import create_app
+from backend.subscriptions import ALL_SYMBOLS, STREAMS, Subscription, SubscriptionError
+
+
+def test_subscribe_defaults_to_every_stream_and_symbol():
+    subscription = Subscription()
+    added = subscription.apply({"action": "subscribe"})
+    assert added == {(stream, ALL_SYMBOLS) for stream in STREAMS}
+    assert subscription.wants("prices", "BTC") and subscription.wants("alerts", "ETH")
+
+
+def test_subscribe_and_unsubscribe_named_symbols():
+    subscription = Subscription()
+    subscription.apply({"action": "subscribe", "symbols": ["btc", "ETH"], "streams": "prices"})
+    assert subscription.describe() == {"prices": ["BTC", "ETH"]}
+    subscription.apply({"action": "unsubscribe", "symbols": "eth", "streams": ["prices"]})
+    assert subscription.wants("prices", "BTC") and not subscription.wants("prices", "ETH")
+    subscription.apply({"action": "unsubscribe", "symbols": ["BTC"]})
+    assert subscription.describe() == {}
+
+
+def test_unsubscribing_one_symbol_under_the_wildcard_is_rejected():
+    subscription = Subscription()
+    subscription.apply({"action": "subscribe", "streams": ["prices"]})
+    with pytest.raises(SubscriptionError):
+        subscription.apply({"action": "unsubscribe", "symbols": ["ETH"]})
+    assert subscription.wants("prices", "ETH")
+    subscription.apply({"action": "unsubscribe", "symbols": "*"})
+    subscription.apply({"action": "subscribe", "symbols": ["BTC"], "streams": ["prices"]})
+    assert not subscription.wants("prices", "ETH")
+
+
+@pytest.mark.parametrize("message", [
+    [],
+    {"action": "subscribe", "symbols": 5},
+    {"action": "subscribe", "symbols": [5]},
+    {"action": "subscribe", "streams": {"prices": 1}},
+    {"action": "subscribe", "streams": ["volume"]},
+    {"action": "resubscribe"},
+])
+def test_malformed_messages_raise_subscription_errors(message):
+    with pytest.raises(SubscriptionError):
+        Subscription().apply(message)
+
+
+def test_deltas_carry_changed_fields_and_trends_are_gated():
+    subscription = Subscription()
+    assert subscription.delta("prices", "BTC", {"price": 1.0}) == {"price": 1.0}
+    assert subscription.delta("prices", "BTC", {"price": 1.0}) is None
+    assert subscription.delta("prices", "BTC", {"price": 2.0}) == {"price": 2.0}
+
+    subscription.delta("trends", "BTC", {"trend": "bullish", "confidence": 0.5})
+    # Same trend, same confidence bucket: not sent
+    assert subscription.delta("trends", "BTC", {"trend": "bullish", "confidence": 0.55}) is None
+    assert subscription.delta("trends", "BTC", {"trend": "bullish", "confidence": 0.7}) == {"confidence": 0.7}
+
+
+def test_ws_answers_bad_messages_without_disconnecting():
+    client = TestClient(create_app())
+    with client.websocket_connect("/ws?candles=0&snapshot=0") as ws:
+        for bad in ({"action": "subscribe", "symbols": 5}, "not json"):
+            ws.send_text(bad if isinstance(bad, str) else json.dumps(bad))
+            assert ws.receive_json()["type"] == "error"
+        ws.send_text(json.dumps({"action": "subscribe", "symbols": ["BTC"], "streams": ["prices"]}))
+        assert ws.receive_json() == {"type": "subscribed", "streams": {"prices": ["BTC"]}}
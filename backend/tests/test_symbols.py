@@ -0,0 +1,46 @@
+# test_symbols.py
+import time
+
+import pytest
+
+from backend.symbols import SymbolRegistry, coin_of, normalize
+
+
+def test_normalize_and_coin_of():
+    assert normalize(" btc ") == "BTCUSDT" and normalize("ETHUSDT") == "ETHUSDT"
+    assert coin_of("BTCUSDT") == "BTC" and coin_of("BTC") == "BTC"
+    for bad in ("", "b-t-c", "X" * 30):
+        with pytest.raises(ValueError):
+            normalize(bad)
+
+
+def test_add_and_remove_notify_listeners():
+    registry = SymbolRegistry.from_env("BTCUSDT, ETH", "")
+    changes = []
+    registry.listeners.append(lambda added, removed: changes.append((added, removed)))
+    assert registry.add(["ada", "BTC"]) == ["ADA"]
+    assert registry.add(["BTC"]) == []  # no-op changes are not broadcast
+    assert registry.remove(["adausdt", "DOGE"]) == ["ADA"]
+    assert changes == [(["ADA"], []), ([], ["ADA"])]
+    assert registry.symbols == ["BTCUSDT", "ETHUSDT"] and registry.coins == ["BTC", "ETH"]
+    assert "BTC" in registry and len(registry) == 2
+
+
+def test_low_priority_coins_are_tracked_until_removed():
+    registry = SymbolRegistry.from_env("BTCUSDT,PEPEUSDT", "PEPE")
+    registry.add(["SHIB"], low_priority=True)
+    assert registry.low_priority == ["PEPEUSDT", "SHIBUSDT"]
+    registry.remove(["SHIB"])
+    registry.add(["SHIB"])
+    assert registry.low_priority == ["PEPEUSDT"]
+
+
+def test_idle_returns_each_stale_coin_once():
+    registry = SymbolRegistry(["BTC", "ETH"])
+    registry.seen("BTC")
+    registry.seen("ETH")
+    registry.last_tick["ETH"] = time.monotonic() - 100.0
+    assert registry.idle(timeout=50.0) == ["ETH"]
+    assert registry.idle(timeout=50.0) == []
+    registry.remove(["BTC"])
+    assert registry.last_tick == {}
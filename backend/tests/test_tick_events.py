@@ -0,0 +1,52 @@
+# test_tick_events.py
+import asyncio
+import time
+
+from backend.tick_events import TickEvents
+
+
+def test_ticks_coalesce_per_symbol():
+    events = TickEvents()
+    for coin in ("BTC", "BTC", "ETH", "BTC"):
+        events.notify(coin)
+    assert events.sequence == {"BTC": 3, "ETH": 1}
+    ready, wait = events.due(min_interval=1.0)
+    assert sorted(ready) == ["BTC", "ETH"] and wait is None
+    assert events.due(1.0) == ([], None)  # nothing new since
+
+
+def test_due_holds_symbols_until_their_interval_elapses():
+    events = TickEvents()
+    events.notify("BTC")
+    events.notify("ETH")
+    events.ran(["BTC"])
+    events.last_run["ETH"] = time.monotonic() - 10.0
+    ready, wait = events.due(min_interval=2.0)
+    assert ready == ["ETH"]
+    assert 0 < wait <= 2.0
+    assert list(events.pending) == ["BTC"]
+
+
+def test_wait_wakes_on_a_tick_or_times_out():
+    async def main():
+        events = TickEvents()
+        started = time.monotonic()
+        await events.wait(timeout=0.05)
+        assert time.monotonic() - started >= 0.04
+
+        asyncio.get_running_loop().call_later(0.01, events.notify, "BTC")
+        started = time.monotonic()
+        await events.wait(timeout=5.0)
+        assert time.monotonic() - started < 1.0
+        assert "BTC" in events.pending
+
+    asyncio.run(main())
+
+
+def test_forget_drops_all_per_coin_state():
+    events = TickEvents()
+    events.notify("BTC")
+    events.ran(["BTC"])
+    events.forget("BTC")
+    events.forget("BTC")
+    assert events.pending == {} and events.sequence == {} and events.last_run == {}
@@ -0,0 +1,65 @@
+# test_tick_store.py
+import os
+
+import numpy as np
+
+from backend.tick_files import TICK_DTYPE
+from backend.tick_store import TickStore, records_to_rows
+
+
+def test_appends_are_buffered_until_flush(tmp_path):
+    store = TickStore(str(tmp_path))
+    for i in range(5):
+        store.append_tick("BTC", 100.0 + i, float(i))
+    assert len(store.ticks("BTC")) == 0
+    assert store.flush() == 5 and store.flush() == 0
+    assert store.ticks("BTC")["price"].tolist() == [100.0, 101.0, 102.0, 103.0, 104.0]
+    store.append_tick("BTC", 105.0, 5.0)
+    store.close()
+    assert store.written == 6 and store.symbols() == ["BTC"]
+
+
+def test_tick_reads_slice_by_count_and_time(tmp_path):
+    store = TickStore(str(tmp_path))
+    for i in range(10):
+        store.append_tick("ETH", float(i), float(i))
+    store.close()
+    assert store.recent_ticks("ETH", 3)["timestamp"].tolist() == [7.0, 8.0, 9.0]
+    assert store.ticks_since("ETH", 7.5)["timestamp"].tolist() == [8.0, 9.0]
+    assert store.query("ETH", start=2.0, end=5.0)["price"].tolist() == [2.0, 3.0, 4.0, 5.0]
+    assert store.query("ETH", start=2.0, end=5.0, limit=2)["price"].tolist() == [4.0, 5.0]
+    assert len(store.recent_ticks("MISSING", 3)) == 0
+
+
+def test_candles_round_trip_and_query(tmp_path):
+    store = TickStore(str(tmp_path))
+    bars = [(t, 1.0, 2.0, 0.5, 1.5, 4.0) for t in (0.0, 60.0, 120.0)]
+    for bar in bars:
+        store.append_candle("BTC", "1m", bar)
+    store.close()
+    assert records_to_rows(store.recent_candles("BTC", "1m", 2)).tolist() == [list(b) for b in bars[1:]]
+    assert store.query("BTC", "1m", start=60.0, end=60.0)["time"].tolist() == [60.0]
+
+
+def test_torn_trailing_record_is_ignored(tmp_path):
+    store = TickStore(str(tmp_path))
+    store.append_tick("SOL", 20.0, 1.0)
+    store.close()
+    with open(store.tick_path("SOL"), "ab") as f:
+        f.write(b"\0" * (TICK_DTYPE.itemsize // 2))
+    assert store.ticks("SOL")["price"].tolist() == [20.0]
+
+
+def test_state_snapshot_round_trips(tmp_path):
+    store = TickStore(str(tmp_path))
+    assert store.load_state() is None
+    store.save_state({"trend_memory": {"BTC": ["bullish"]}})
+    state = store.load_state()
+    assert state["trend_memory"] == {"BTC": ["bullish"]} and "saved_at" in state
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+
+def test_records_to_rows_is_a_float_view():
+    records = np.zeros(2, dtype=TICK_DTYPE)
+    records["price"] = (1.0, 2.0)
+    assert records_to_rows(records).tolist() == [[0.0, 1.0], [0.0, 2.0]]
@@ -0,0 +1,58 @@
+# test_train_model.py
+import numpy as np
+import pytest
+
+from backend import batch_indicators, train_model
+from backend.model_pipeline import LinearModel, load_model_stage
+from backend.tick_files import append_ticks
+
+
+def write_ticks(path, n=800, seed=0):
+    rng = np.random.default_rng(seed)
+    prices = 100.0 * np.exp(np.cumsum(rng.normal(0, 0.003, n)))
+    append_ticks(str(path), [(np.arange(n, dtype=np.float64), prices)])
+    return prices
+
+
+def test_dataset_windows_match_the_live_features():
+    prices = 100.0 * np.exp(np.cumsum(np.random.default_rng(2).normal(0, 0.003, 200)))
+    features, forward = train_model.build_dataset(prices, window=60, horizon=10, stride=7)
+    assert features.shape == (len(range(0, 200 - 60 - 10 + 1, 7)), len(batch_indicators.ML_FEATURE_NAMES))
+    assert forward[0] == pytest.approx(prices[69] / prices[59] - 1.0)
+    assert features[1] == pytest.approx(train_model.window_features(prices[7:67][None])[0], abs=1e-12)
+    assert len(train_model.build_dataset(prices[:50], window=60, horizon=10)[0]) == 0
+
+
+def test_fits_recover_a_known_direction():
+    rng = np.random.default_rng(3)
+    x = rng.normal(size=(2000, 3))
+    y = x @ np.array([2.0, -1.0, 0.0]) + 0.5
+    weights, bias = train_model.fit_linear(x, y, l2=0.0)
+    assert np.allclose(weights, [2.0, -1.0, 0.0]) and bias == pytest.approx(0.5)
+    weights, _ = train_model.fit_logistic(x, (y > 0).astype(np.float64))
+    assert weights[0] > 0 > weights[1]
+
+
+@pytest.mark.parametrize("kind", ["logistic", "linear"])
+def test_main_writes_a_loadable_model(tmp_path, kind, capsys):
+    paths = [tmp_path / "BTC.ticks", tmp_path / "ETH.ticks"]
+    for seed, path in enumerate(paths):
+        write_ticks(path, seed=seed)
+    out = tmp_path / "model.json"
+    train_model.main([*map(str, paths), "--type", kind, "--horizon", "20", "--stride", "5", "--out", str(out)])
+    model = LinearModel.load(str(out))
+    assert model.kind == kind and model.meta["symbols"] == ["BTC", "ETH"]
+    reports = model.meta["reports"]
+    assert reports["train"]["samples"] > reports["validation"]["samples"] > 0
+    assert ("log_loss" in reports["validation"]) == (kind == "logistic")
+    assert load_model_stage(str(out)) is not None
+    assert f"Wrote {kind} model" in capsys.readouterr().out
+
+
+def test_too_few_ticks_is_an_error(tmp_path):
+    path = tmp_path / "TINY.ticks"
+    write_ticks(path, n=50)
+    with pytest.raises(ValueError):
+        train_model.train([str(path)])
+    with pytest.raises(SystemExit):
+        train_model.main([str(path), "--window", "10"])
@@ -0,0 +1,118 @@
+# test_trend_loop.py
+# The trend loop publishes trends and indicators of the very windows it predicted.
+import asyncio
+
+import numpy as np
+import pytest
+
+from backend import main, price_streamer
+from backend.indicator_engine import IndicatorState
+from backend.tick_events import TickEvents
+from backend.trend_predictor_ai import forget, update_price
+
+
+def random_walk(length, seed=0):
+    rng = np.random.default_rng(seed)
+    return 100.0 * np.exp(np.cumsum(rng.normal(0, 0.01, length)))
+
+
+def assert_same_indicators(snapshot, expected):
+    assert snapshot.keys() == expected.keys() and snapshot["regime"] == expected["regime"]
+    for key, value in expected.items():
+        if key != "regime":
+            assert snapshot[key] == pytest.approx(value, abs=1e-9), key
+
+
+def test_candle_trends_publish_indicators_of_the_closes(monkeypatch):
+    monkeypatch.setattr(main, "TREND_TIMEFRAME", "1m")
+    windows = {"LOOPA": random_walk(240, 1), "LOOPB": random_walk(240, 2), "LOOPC": random_walk(45, 3)}
+    indicators = main.window_indicators(windows)
+    assert indicators.keys() == windows.keys()
+    for coin, closes in windows.items():
+        assert_same_indicators(indicators[coin], IndicatorState.from_prices(closes, len(closes)).snapshot())
+
+
+def test_tick_trends_publish_the_streamed_state_of_the_window(monkeypatch):
+    monkeypatch.setattr(main, "TREND_TIMEFRAME", "tick")
+    prices = random_walk(300, 4)
+    for price in prices:
+        update_price("LOOPTICK", price)
+    try:
+        indicators = main.window_indicators({"LOOPTICK": prices[-main.HISTORY_CAPACITY:]})
+        expected = IndicatorState.from_prices(prices[-main.HISTORY_CAPACITY:]).snapshot()
+        assert_same_indicators(indicators["LOOPTICK"], expected)
+    finally:
+        forget("LOOPTICK")
+
+
+class SlowScheduler:
+    """Lets ticks land while a prediction is awaited, like a busy worker."""
+
+    def __init__(self, during):
+        self.during = during
+        self.done = asyncio.Event()
+
+    async def predict(self, windows, bar_seconds=1.0):
+        self.during()
+        await asyncio.sleep(0)
+        self.done.set()
+        return {coin: ("bullish", "test", 0.5) for coin in windows}
+
+
+def run_one_cycle(monkeypatch, coin, ticks_before, ticks_during):
+    """Run broadcast_trends until one prediction lands; returns the trend loop's events."""
+    events = TickEvents()
+    monkeypatch.setattr(main, "tick_events", events)
+    monkeypatch.setattr(main, "TREND_DEBOUNCE", 0.0)
+    monkeypatch.setattr(main, "TREND_TIMEFRAME", "tick")
+
+    def tick(price):
+        main.price_history.append(coin, price, None)
+        events.notify(coin)
+        main.snapshot_cache.on_tick(coin, price, 0.0, events.sequence[coin])
+
+    async def cycle():
+        scheduler = SlowScheduler(lambda: [tick(p) for p in ticks_during])
+        monkeypatch.setattr(main, "scheduler", scheduler)
+        for price in ticks_before:
+            tick(price)
+        task = asyncio.create_task(main.broadcast_trends())
+        await asyncio.wait_for(scheduler.done.wait(), 5.0)
+        for _ in range(5):
+            await asyncio.sleep(0)
+        task.cancel()
+
+    asyncio.run(cycle())
+    return events
+
+
+def test_results_are_stamped_with_the_predicted_windows_sequence(monkeypatch):
+    coin = "LOOPSEQ"
+    try:
+        run_one_cycle(monkeypatch, coin, random_walk(30, 5).tolist(), [101.0, 102.0])
+        entry, etag = main.snapshot_cache.get(coin)
+        assert entry["sequence"] == 32
+        assert entry["trend_sequence"] == 30  # the ticks that landed mid-prediction are not credited
+        assert etag == f'"{coin}-32-30-None"'  # no streamed indicator state for this coin
+    finally:
+        main.release_symbol(coin)
+
+
+def test_followers_mirror_the_leaders_sequences():
+    coin = "LOOPFOLLOW"
+    try:
+        main.apply_event({"kind": "tick", "coin": coin, "price": 1.0, "timestamp": 1.0, "sequence": 5})
+        main.apply_event({"kind": "update", "stream": "trends", "symbol": coin,
+                          "fields": {"trend": "bearish"}, "sequence": 3})
+        assert main.snapshot_cache.get(coin)[1] == f'"{coin}-5-3-None"'
+    finally:
+        main.release_symbol(coin)
+
+
+def test_releasing_a_symbol_drops_its_last_run(monkeypatch):
+    coin = "LOOPEVICT"
+    events = run_one_cycle(monkeypatch, coin, random_walk(30, 6).tolist(), [])
+    monkeypatch.setattr(price_streamer, "tick_events", events)
+    assert coin in events.last_run
+    main.release_symbol(coin)
+    assert coin not in events.last_run
@@ -0,0 +1,125 @@
+# test_trend_predictor.py
+# The single-symbol (streamed state) and batch prediction paths must agree.
+import numpy as np
+import pytest
+
+from backend import batch_indicators
+from backend.indicator_engine import WINDOW, IndicatorState
+from backend.trend_predictor_ai import AdvancedTrendPredictor
+
+COINS = ["BTC", "ETH", "SOL", "DOGE"]
+
+
+def random_walks(n, length, seed=0, scale=0.01):
+    rng = np.random.default_rng(seed)
+    return 100.0 * np.exp(np.cumsum(rng.normal(0, scale, size=(n, length)), axis=1))
+
+
+@pytest.mark.parametrize("length", [20, WINDOW, 500])
+def test_streamed_single_path_matches_batch(length):
+    histories = random_walks(len(COINS), length)
+    single = AdvancedTrendPredictor(cache_size=0)
+    batch = AdvancedTrendPredictor(cache_size=0)
+    for coin, history in zip(COINS, histories):
+        for price in history:
+            single.update_price(coin, price)
+
+    windows = histories[:, -WINDOW:]
+    expected = batch.predict_trends_batch(windows, COINS)
+    for coin, window, (trend, explanation, confidence) in zip(COINS, windows, expected):
+        got = single.predict_trend(window, coin)
+        assert got[0] == trend
+        assert got[1] == explanation
+        assert got[2] == pytest.approx(confidence, abs=1e-9)
+
+
+def test_indicator_snapshot_is_the_window_value():
+    history = random_walks(1, 500, seed=1)[0]
+    predictor = AdvancedTrendPredictor(cache_size=0)
+    for price in history:
+        predictor.update_price("BTC", price)
+    snapshot = predictor.indicator_snapshot("BTC")
+    window = history[-WINDOW:][None]
+    line, signal, histogram = batch_indicators.macd(window)
+    assert snapshot["rsi"] == pytest.approx(batch_indicators.rsi(window)[0], abs=1e-9)
+    assert snapshot["macd"] == pytest.approx(line[0], abs=1e-12)
+    assert snapshot["macd_signal"] == pytest.approx(signal[0], abs=1e-12)
+    assert snapshot["macd_histogram"] == pytest.approx(histogram[0], abs=1e-12)
+    assert predictor.indicator_snapshot("ETH") is None
+
+
+def wilder_rsi(prices, period=14):
+    """Reference Wilder RSI: simple-mean seed, then (period - 1) / period smoothing."""
+    deltas = np.diff(prices).tolist()
+    if len(deltas) < period:
+        return 50.0
+    gain = sum(max(d, 0.0) for d in deltas[:period]) / period
+    loss = sum(max(-d, 0.0) for d in deltas[:period]) / period
+    for d in deltas[period:]:
+        gain = (gain * (period - 1) + max(d, 0.0)) / period
+        loss = (loss * (period - 1) + max(-d, 0.0)) / period
+    return 100 * gain / (gain + loss) if gain + loss > 0 else 50.0
+
+
+def ema(values, span):
+    """Reference EMA(adjust=False) seeded with the first value."""
+    alpha, out = 2.0 / (span + 1.0), [values[0]]
+    for value in values[1:]:
+        out.append(out[-1] + alpha * (value - out[-1]))
+    return out
+
+
+def reference_macd(prices):
+    if len(prices) < 26:
+        return 0.0, 0.0, 0.0
+    line = [fast - slow for fast, slow in zip(ema(prices.tolist(), 12), ema(prices.tolist(), 26))]
+    signal = ema(line, 9)[-1]
+    return line[-1], signal, line[-1] - signal
+
+
+def test_batch_oscillators_match_the_replayed_recursions():
+    predictor = AdvancedTrendPredictor(cache_size=0)
+    prices = random_walks(50, WINDOW, seed=2)
+    prices[0] = 5.0  # flat
+    prices[1] = np.arange(1.0, WINDOW + 1)  # only gains
+    rsi = batch_indicators.rsi(prices)
+    macd = np.column_stack(batch_indicators.macd(prices))
+    for row, value, lines in zip(prices, rsi, macd):
+        assert value == pytest.approx(wilder_rsi(row), abs=1e-9)
+        assert lines == pytest.approx(reference_macd(row), abs=1e-9)
+        assert predictor.calculate_rsi(row) == pytest.approx(value, abs=1e-9)
+        assert predictor.calculate_macd(row) == pytest.approx(tuple(lines), abs=1e-12)
+    assert rsi[0] == 50 and rsi[1] == 100
+    for length in (14, 15, 25, 26, 100):
+        row = prices[2, :length] if length <= WINDOW else random_walks(1, length)[0]
+        assert batch_indicators.rsi(row[None])[0] == pytest.approx(wilder_rsi(row), abs=1e-9)
+        assert np.column_stack(batch_indicators.macd(row[None]))[0] == pytest.approx(reference_macd(row), abs=1e-9)
+
+
+def test_indicator_state_is_reused_only_for_its_own_window():
+    history = random_walks(1, 200, seed=3)[0]
+    predictor = AdvancedTrendPredictor(cache_size=0)
+    for price in history:
+        predictor.update_price("BTC", price)
+    streamed = predictor.indicator_states["BTC"]
+    assert predictor.get_indicator_state("BTC", history[-WINDOW:]) is streamed
+
+    # A longer window (e.g. a backtest or candle series) is replayed over its own length
+    rebuilt = predictor.get_indicator_state("BTC", history[-100:])
+    assert rebuilt is not streamed and rebuilt.window == 100
+    assert rebuilt.rsi() == pytest.approx(batch_indicators.rsi(history[-100:][None])[0])
+
+
+def test_streamed_history_is_the_indicator_window():
+    from backend.price_streamer import HISTORY_CAPACITY, price_history
+    assert HISTORY_CAPACITY == WINDOW and price_history.capacity == WINDOW
+
+
+def test_indicator_state_before_the_window_fills():
+    state = IndicatorState()
+    assert state.rsi() == 50 and state.macd() == (0.0, 0.0, 0.0)
+    prices = random_walks(1, 30, seed=4)[0]
+    for price in prices:
+        state.update(price)
+    assert state.matches(prices) and not state.matches(prices[-20:])
+    assert state.rsi() == pytest.approx(batch_indicators.rsi(prices[None])[0])
@@ -0,0 +1,66 @@
+# tick_events.py
+# Per-symbol "new tick" notifications that drive trend recomputation.
+import asyncio
+import math
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class TickEvents:
+    """Coalesces new-tick notifications into a set of pending symbols.
+
+    Ingest calls ``notify(coin)`` for every tick; the trend loop waits for
+    activity and takes the symbols whose minimum recompute interval elapsed.
+    Symbols without new data are never pending, so they cost nothing.
+    """
+
+    def __init__(self):
+        self.pending: Dict[str, float] = {}  # coin -> monotonic time of first unprocessed tick
+        self.sequence: Dict[str, int] = {}  # coin -> ticks seen so far
+        self.last_run: Dict[str, float] = {}  # coin -> monotonic time of its latest trend run
+        self._event = asyncio.Event()
+
+    def notify(self, coin: str):
+        self.sequence[coin] = self.sequence.get(coin, 0) + 1
+        self.pending.setdefault(coin, time.monotonic())
+        self._event.set()
+
+    def forget(self, coin: str):
+        self.pending.pop(coin, None)
+        self.sequence.pop(coin, None)
+        self.last_run.pop(coin, None)
+
+    async def wait(self, timeout: Optional[float] = None):
+        """Block until a tick arrives (or ``timeout`` seconds pass)."""
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._event.clear()
+
+    def ran(self, coins: Iterable[str]):
+        """Record that the trend loop just ran for ``coins``."""
+        now = time.monotonic()
+        for coin in coins:
+            self.last_run[coin] = now
+
+    def due(self, min_interval: float) -> Tuple[List[str], Optional[float]]:
+        """Pop pending coins whose interval since their last run elapsed.
+
+        Returns (ready coins, seconds until the next pending coin is due or None).
+        """
+        now = time.monotonic()
+        ready, wait = [], None
+        for coin in self.pending:
+            remaining = self.last_run.get(coin, -math.inf) + min_interval - now
+            if remaining <= 0:
+                ready.append(coin)
+            else:
+                wait = remaining if wait is None else min(wait, remaining)
+        for coin in ready:
+            del self.pending[coin]
+        return ready, wait
+
+
+# Process-wide tick notifications, fed by price_streamer.record_tick
+tick_events = TickEvents()
@@ -0,0 +1,98 @@
+# tick_files.py
+# Recorded tick files: chunked CSV reading and a raw memory-mapped binary format.
+#
+# Binary ".ticks" files are headerless little-endian records of TICK_DTYPE
+# (timestamp seconds, price), so they can be appended to and memory-mapped
+# directly with no parsing step.
+import csv
+import os
+from itertools import islice
+from typing import Iterable, Iterator, Tuple
+
+import numpy as np
+
+TICK_DTYPE = np.dtype([("timestamp", "<f8"), ("price", "<f8")])
+TICKS_SUFFIX = ".ticks"
+DEFAULT_CHUNK = 1 << 16
+
+Chunk = Tuple[np.ndarray, np.ndarray]  # (timestamps, prices)
+
+
+def symbol_from_path(path: str) -> str:
+    """``data/BTC.csv`` -> ``BTC``"""
+    return os.path.splitext(os.path.basename(path))[0].upper()
+
+
+def open_ticks(path: str) -> np.ndarray:
+    """Memory-map a .ticks file (read-only, nothing is loaded up front)."""
+    if os.path.getsize(path) == 0:
+        return np.zeros(0, dtype=TICK_DTYPE)
+    return np.memmap(path, dtype=TICK_DTYPE, mode="r")
+
+
+def _is_number(value: str) -> bool:
+    try:
+        float(value)
+        return True
+    except ValueError:
+        return False
+
+
+def read_csv_chunks(path: str, chunk_size: int = DEFAULT_CHUNK) -> Iterator[Chunk]:
+    """Stream ``timestamp,price`` (or bare ``price``) rows in float64 chunks.
+
+    A header row is skipped if present; the price is the last column.
+    """
+    with open(path, newline="") as f:
+        rows = csv.reader(f)
+        first = next(rows, None)
+        if first is None:
+            return
+        pending = [] if not _is_number(first[-1]) else [first]
+        index = 0
+        while True:
+            batch = pending + list(islice(rows, chunk_size - len(pending)))
+            pending = []
+            if not batch:
+                return
+            prices = np.array([row[-1] for row in batch], dtype=np.float64)
+            if len(batch[0]) > 1:
+                timestamps = np.array([row[0] for row in batch], dtype=np.float64)
+            else:
+                timestamps = np.arange(index, index + len(batch), dtype=np.float64)
+            index += len(batch)
+            yield timestamps, prices
+
+
+def read_ticks_chunks(path: str, chunk_size: int = DEFAULT_CHUNK) -> Iterator[Chunk]:
+    ticks = open_ticks(path)
+    for start in range(0, len(ticks), chunk_size):
+        block = ticks[start:start + chunk_size]
+        yield block["timestamp"], block["price"]
+
+
+def read_chunks(path: str, chunk_size: int = DEFAULT_CHUNK) -> Iterator[Chunk]:
+    """Chunks from a .ticks or CSV file, chosen by extension."""
+    if path.endswith(TICKS_SUFFIX):
+        return read_ticks_chunks(path, chunk_size)
+    return read_csv_chunks(path, chunk_size)
+
+
+def append_ticks(path: str, chunks: Iterable[Chunk]) -> int:
+    """Append (timestamps, prices) chunks to a .ticks file; returns ticks written."""
+    written = 0
+    with open(path, "ab") as f:
+        for timestamps, prices in chunks:
+            records = np.empty(len(prices), dtype=TICK_DTYPE)
+            records["timestamp"] = timestamps
+            records["price"] = prices
+            records.tofile(f)
+            written += len(records)
+    return written
+
+
+def convert_to_ticks(src: str, dst: str, chunk_size: int = DEFAULT_CHUNK) -> int:
+    """Convert a CSV tick file into the binary format (overwrites ``dst``)."""
+    if os.path.exists(dst):
+        os.remove(dst)
+    return append_ticks(dst, read_csv_chunks(src, chunk_size))
@@ -0,0 +1,145 @@
+# tick_store.py
+# Append-only on-disk tick and candle store with predictor state snapshots.
+#
+#   <TICK_STORE_DIR>/ticks/BTC.ticks          TICK_DTYPE records (tick_files format)
+#   <TICK_STORE_DIR>/candles/BTC_1m.candles   CANDLE_DTYPE records, closed bars only
+#   <TICK_STORE_DIR>/predictor_state.json     trend_memory / confidence_history
+#
+# Files are raw fixed-size records, so reads are a memory map plus a slice
+# (no parsing) and the tick files can be passed straight to backtest.py.
+import json
+import os
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .candles import COLUMNS
+from .tick_files import TICK_DTYPE, TICKS_SUFFIX
+
+# "" disables persistence
+TICK_STORE_DIR = os.environ.get(
+    "TICK_STORE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+)
+
+CANDLE_DTYPE = np.dtype([(name, "<f8") for name in COLUMNS])
+CANDLES_SUFFIX = ".candles"
+STATE_FILE = "predictor_state.json"
+
+
+def _open_records(path: str, dtype: np.dtype) -> np.ndarray:
+    """Read-only memory map of whole records (a torn trailing write is ignored)."""
+    count = os.path.getsize(path) // dtype.itemsize if os.path.exists(path) else 0
+    if count == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", shape=(count,))
+
+
+class TickStore:
+    """Buffered appends to per-symbol record files; memory-mapped reads.
+
+    ``append_tick`` / ``append_candle`` only buffer; ``flush`` (called
+    periodically by the app) writes everything buffered in one write per file.
+    """
+
+    def __init__(self, directory: str = TICK_STORE_DIR):
+        self.directory = directory
+        self.tick_dir = os.path.join(directory, "ticks")
+        self.candle_dir = os.path.join(directory, "candles")
+        os.makedirs(self.tick_dir, exist_ok=True)
+        os.makedirs(self.candle_dir, exist_ok=True)
+        self._pending: Dict[str, List[tuple]] = {}  # path -> buffered records
+        self._files = {}  # path -> open append handle
+        self.written = 0
+
+    def tick_path(self, coin: str) -> str:
+        return os.path.join(self.tick_dir, coin + TICKS_SUFFIX)
+
+    def candle_path(self, coin: str, timeframe: str) -> str:
+        return os.path.join(self.candle_dir, f"{coin}_{timeframe}{CANDLES_SUFFIX}")
+
+    def append_tick(self, coin: str, price: float, timestamp: float):
+        self._pending.setdefault(self.tick_path(coin), []).append((timestamp, price))
+
+    def append_candle(self, coin: str, timeframe: str, bar):
+        self._pending.setdefault(self.candle_path(coin, timeframe), []).append(tuple(bar))
+
+    def flush(self) -> int:
+        """Write all buffered records; returns the number written."""
+        written = 0
+        pending, self._pending = self._pending, {}
+        for path, records in pending.items():
+            dtype = TICK_DTYPE if path.endswith(TICKS_SUFFIX) else CANDLE_DTYPE
+            f = self._files.get(path)
+            if f is None:
+                f = self._files[path] = open(path, "ab")
+            np.array(records, dtype=dtype).tofile(f)
+            f.flush()
+            written += len(records)
+        self.written += written
+        return written
+
+    def close(self):
+        self.flush()
+        for f in self._files.values():
+            f.close()
+        self._files = {}
+
+    def symbols(self) -> List[str]:
+        return sorted(
+            name[:-len(TICKS_SUFFIX)] for name in os.listdir(self.tick_dir) if name.endswith(TICKS_SUFFIX)
+        )
+
+    def ticks(self, coin: str) -> np.ndarray:
+        """Every flushed tick for ``coin`` as a read-only memory map."""
+        return _open_records(self.tick_path(coin), TICK_DTYPE)
+
+    def candles(self, coin: str, timeframe: str) -> np.ndarray:
+        return _open_records(self.candle_path(coin, timeframe), CANDLE_DTYPE)
+
+    def recent_ticks(self, coin: str, n: int) -> np.ndarray:
+        ticks = self.ticks(coin)
+        return ticks[max(0, len(ticks) - n):]
+
+    def ticks_since(self, coin: str, start: float) -> np.ndarray:
+        """Ticks with timestamp >= ``start`` (files are appended in time order)."""
+        ticks = self.ticks(coin)
+        return ticks[np.searchsorted(ticks["timestamp"], start):]
+
+    def query(self, coin: str, timeframe: str = "tick", start: Optional[float] = None,
+              end: Optional[float] = None, limit: int = 1000) -> np.ndarray:
+        """Up to the last ``limit`` ticks (or closed ``timeframe`` bars) in [start, end]."""
+        if timeframe == "tick":
+            records = self.ticks(coin)
+            times = records["timestamp"]
+        else:
+            records = self.candles(coin, timeframe)
+            times = records["time"]
+        lo = 0 if start is None else np.searchsorted(times, start)
+        hi = len(records) if end is None else np.searchsorted(times, end, side="right")
+        return records[max(lo, hi - limit):hi]
+
+    def recent_candles(self, coin: str, timeframe: str, n: int) -> np.ndarray:
+        candles = self.candles(coin, timeframe)
+        return candles[max(0, len(candles) - n):]
+
+    def save_state(self, state: dict):
+        """Atomically replace the predictor state snapshot."""
+        path = os.path.join(self.directory, STATE_FILE)
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"saved_at": time.time(), **state}, f)
+        os.replace(tmp, path)
+
+    def load_state(self) -> Optional[dict]:
+        path = os.path.join(self.directory, STATE_FILE)
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+
+def records_to_rows(records: np.ndarray) -> np.ndarray:
+    """Structured tick/candle records -> a plain (n, fields) float64 array."""
+    return records.view(np.float64).reshape(len(records), len(records.dtype.names))
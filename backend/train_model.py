@@ -0,0 +1,178 @@
+# train_model.py
+# Offline training of the model pipeline stage on recorded ticks.
+#
+#   python backend/train_model.py backend/data/ticks/*.ticks --horizon 60 --stride 5 --out backend/data/model.json
+#   MODEL_PATH=backend/data/model.json uvicorn backend.main:app
+#
+# Every ``stride`` ticks a ``window``-tick price window (the same window the
+# live service predicts on) is turned into the 10 ML features with the batch
+# indicators; the label is the sign (logistic) or size (linear) of the return
+# ``horizon`` ticks later. The last ``--validation`` share of each file is
+# held out, so the reported scores are out-of-sample in time.
+import argparse
+import os
+import sys
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend import batch_indicators  # noqa: E402
+from backend.indicator_engine import WINDOW  # noqa: E402
+from backend.model_pipeline import MODEL_TYPES, LinearModel  # noqa: E402
+from backend.tick_files import read_chunks, symbol_from_path  # noqa: E402
+
+# Windows turned into features per vectorized call
+FEATURE_BATCH = 8192
+
+
+def load_prices(path):
+    chunks = [prices for _, prices in read_chunks(path)]
+    return np.concatenate(chunks) if chunks else np.zeros(0)
+
+
+def window_features(windows):
+    """(N, window) prices -> (N, 10) ML features, exactly as the feature stage computes them"""
+    rsi = batch_indicators.rsi(windows)
+    macd, _, histogram = batch_indicators.macd(windows)
+    return batch_indicators.ml_features(windows, rsi, macd, histogram)
+
+
+def build_dataset(prices, window=WINDOW, horizon=60, stride=1):
+    """(features, forward returns) for every stride-th window with a known outcome"""
+    if len(prices) < window + horizon:
+        return np.zeros((0, len(batch_indicators.ML_FEATURE_NAMES))), np.zeros(0)
+    windows = sliding_window_view(prices, window)[:len(prices) - window - horizon + 1:stride]
+    ends = np.arange(len(windows)) * stride + window - 1
+    forward = prices[ends + horizon] / prices[ends] - 1.0
+    features = np.concatenate([
+        window_features(np.ascontiguousarray(windows[i:i + FEATURE_BATCH]))
+        for i in range(0, len(windows), FEATURE_BATCH)
+    ])
+    keep = np.isfinite(features).all(axis=1) & np.isfinite(forward)
+    return features[keep], forward[keep]
+
+
+def standardize(features):
+    mean = features.mean(axis=0)
+    scale = features.std(axis=0)
+    scale[scale == 0] = 1.0
+    return mean, scale
+
+
+def fit_logistic(x, y, l2=1.0, iterations=50):
+    """L2-regularized logistic regression by Newton's method; returns (weights, bias)"""
+    n, d = x.shape
+    design = np.column_stack([x, np.ones(n)])
+    penalty = np.full(d + 1, l2)
+    penalty[-1] = 0.0  # the bias is not regularized
+    beta = np.zeros(d + 1)
+    for _ in range(iterations):
+        p = 1.0 / (1.0 + np.exp(-np.clip(design @ beta, -30, 30)))
+        gradient = design.T @ (p - y) + penalty * beta
+        hessian = (design * (p * (1 - p))[:, None]).T @ design + np.diag(penalty)
+        step = np.linalg.solve(hessian, gradient)
+        beta -= step
+        if np.abs(step).max() < 1e-8:
+            break
+    return beta[:-1], beta[-1]
+
+
+def fit_linear(x, y, l2=1.0):
+    """Ridge regression; returns (weights, bias)"""
+    n, d = x.shape
+    design = np.column_stack([x, np.ones(n)])
+    penalty = np.full(d + 1, l2)
+    penalty[-1] = 0.0
+    beta = np.linalg.solve(design.T @ design + np.diag(penalty), design.T @ y)
+    return beta[:-1], beta[-1]
+
+
+def evaluate(model, features, forward):
+    """Directional hit rate (and log loss for logistic models) on held-out windows"""
+    if len(features) == 0:
+        return {"samples": 0}
+    signal = model.signal(features)
+    up = forward > 0
+    report = {
+        "samples": int(len(features)),
+        "up_share": float(up.mean()),
+        "hit_rate": float(((signal > 0) == up).mean()),
+    }
+    if model.kind == "logistic":
+        p = np.clip((signal + 1) / 2, 1e-12, 1 - 1e-12)
+        report["log_loss"] = float(-(up * np.log(p) + (~up) * np.log(1 - p)).mean())
+    return report
+
+
+def train(paths, kind="logistic", window=WINDOW, horizon=60, stride=1, validation=0.2, l2=1.0):
+    """Fit one model on every file; returns (model, {"train": report, "validation": report})"""
+    train_x, train_y, test_x, test_y = [], [], [], []
+    for path in paths:
+        features, forward = build_dataset(load_prices(path), window, horizon, stride)
+        split = int(len(features) * (1 - validation))
+        train_x.append(features[:split])
+        train_y.append(forward[:split])
+        test_x.append(features[split:])
+        test_y.append(forward[split:])
+        print(f"{symbol_from_path(path):>8}: {len(features)} windows")
+
+    x, forward = np.concatenate(train_x), np.concatenate(train_y)
+    if len(x) == 0:
+        raise ValueError("Not enough ticks for one window plus the horizon")
+    mean, scale = standardize(x)
+    z = (x - mean) / scale
+    if kind == "logistic":
+        weights, bias = fit_logistic(z, (forward > 0).astype(np.float64), l2)
+        target_scale = None
+    else:
+        # Forward returns in units of their standard deviation, so the signal is roughly [-1, 1]
+        target_scale = float(forward.std()) or 1.0
+        weights, bias = fit_linear(z, forward / target_scale, l2)
+
+    model = LinearModel(kind, weights, bias, mean, scale, batch_indicators.ML_FEATURE_NAMES, {
+        "window": window,
+        "horizon": horizon,
+        "stride": stride,
+        "l2": l2,
+        "target_scale": target_scale,
+        "symbols": [symbol_from_path(path) for path in paths],
+    })
+    reports = {
+        "train": evaluate(model, x, forward),
+        "validation": evaluate(model, np.concatenate(test_x), np.concatenate(test_y)),
+    }
+    model.meta["reports"] = reports
+    return model, reports
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train the predictor's model stage on recorded ticks")
+    parser.add_argument("paths", nargs="+", help="CSV (timestamp,price) or .ticks files, one symbol per file")
+    parser.add_argument("--type", dest="kind", choices=MODEL_TYPES, default="logistic")
+    parser.add_argument("--window", type=int, default=WINDOW, help="price window length (as in production)")
+    parser.add_argument("--horizon", type=int, default=60, help="forward-return horizon in ticks")
+    parser.add_argument("--stride", type=int, default=1, help="sample a window every N ticks")
+    parser.add_argument("--validation", type=float, default=0.2, help="held-out share at the end of each file")
+    parser.add_argument("--l2", type=float, default=1.0, help="L2 regularization strength")
+    parser.add_argument("--out", default="model.json", help="model file for MODEL_PATH")
+    args = parser.parse_args(argv)
+
+    if args.window < 30:
+        parser.error("--window must be at least 30 (the ML features need 30 prices)")
+    model, reports = train(args.paths, args.kind, args.window, args.horizon, args.stride, args.validation, args.l2)
+    model.save(args.out)
+
+    for name, report in reports.items():
+        if not report["samples"]:
+            print(f"{name:>10}: no samples")
+            continue
+        loss = f"  log loss {report['log_loss']:.4f}" if "log_loss" in report else ""
+        print(f"{name:>10}: {report['samples']} windows  up {report['up_share']:.2%}  "
+              f"hit rate {report['hit_rate']:.2%}{loss}")
+    print(f"Wrote {args.kind} model to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
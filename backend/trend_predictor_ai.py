@@ -1,51 +1,259 @@
 import numpy as np
-from collections import deque
-import warnings
-warnings.filterwarnings('ignore')
+from collections import defaultdict, deque
+from functools import partial
+import math
+
+from . import batch_indicators
+from .candles import format_duration
+from .confidence import confidence_level
+from .indicator_engine import WINDOW, IndicatorState
+from .metrics import StageTimer, stage_timing_enabled
+from .model_pipeline import MODEL_PATH, PIPELINE_CACHE_SIZE, Pipeline, Stage, load_model_stage
+
+# Per-coin trend / confidence memory length
+MEMORY_LENGTH = 20
+
+# Bars looked back for the "change" explanation (24 bars of 1h = a real 24h change)
+CHANGE_LOOKBACK = 24
+
+def as_price_array(prices):
+    """Return prices as a float64 array, without copying ring-buffer views"""
+    if isinstance(prices, np.ndarray) and prices.dtype == np.float64:
+        return prices
+    clean_prices = []
+    for p in prices:
+        try:
+            clean_prices.append(float(p))
+        except (ValueError, TypeError):
+            continue
+    return np.array(clean_prices, dtype=np.float64)
+
+class FeatureStage(Stage):
+    """Indicators and the ML feature matrix for every row"""
+
+    name = "features"
+    cacheable = True
+    outputs = ("rsi", "macd", "signal", "histogram", "upper_bb", "lower_bb", "bb_width",
+               "returns", "support", "resistance", "regime", "ml_features")
+
+    def run(self, batch):
+        prices = batch.prices
+        batch["rsi"] = batch_indicators.rsi(prices)
+        batch["macd"], batch["signal"], batch["histogram"] = batch_indicators.macd(prices)
+        batch["upper_bb"], _, batch["lower_bb"], batch["bb_width"] = batch_indicators.bollinger_bands(prices)
+        batch["returns"] = batch_indicators.log_returns(prices)
+        batch["support"], batch["resistance"] = batch_indicators.support_resistance(prices)
+        batch["regime"] = batch_indicators.market_regime(batch["returns"], prices.shape[1])
+        batch["ml_features"] = batch_indicators.ml_features(
+            prices, batch["rsi"], batch["macd"], batch["histogram"]
+        )
+
+class ScoringStage(Stage):
+    """Crypto-optimized ensemble score and base confidence"""
+
+    name = "scoring"
+
+    def run(self, batch):
+        current_price = batch.prices[:, -1]
+        rsi, macd, signal, histogram = batch["rsi"], batch["macd"], batch["signal"], batch["histogram"]
+        score = np.zeros(len(batch))
+
+        # RSI with crypto thresholds
+        overbought = rsi > 75
+        oversold = rsi < 25
+        score += np.where(overbought, -0.25, np.where(oversold, 0.25, (50 - rsi) / 200))
+        batch.note(overbought, lambda i: f"RSI overbought ({rsi[i]:.1f})")
+        batch.note(oversold, lambda i: f"RSI oversold ({rsi[i]:.1f})")
+
+        # MACD with momentum weighting
+        bullish = (macd > signal) & (histogram > 0)
+        bearish = (macd < signal) & (histogram < 0)
+        score += np.where(bullish, 0.3, np.where(bearish, -0.3, 0.0))
+        batch.note(bullish, "MACD bullish momentum")
+        batch.note(bearish, "MACD bearish momentum")
+
+        # Bollinger Bands for crypto volatility
+        upper_bb, lower_bb = batch["upper_bb"], batch["lower_bb"]
+        band = upper_bb - lower_bb
+        with np.errstate(divide="ignore", invalid="ignore"):
+            bb_position = np.where(band > 0, (current_price - lower_bb) / band, 0.5)
+        near_lower = bb_position < 0.2
+        near_upper = bb_position > 0.8
+        score += np.where(near_lower, 0.2, np.where(near_upper, -0.2, 0.0))
+        batch.note(near_lower, "Near lower Bollinger Band")
+        batch.note(near_upper, "Near upper Bollinger Band")
+
+        # Support/Resistance Analysis
+        near_support = (current_price - batch["support"]) / current_price < 0.02
+        near_resistance = ~near_support & ((batch["resistance"] - current_price) / current_price < 0.02)
+        score += np.where(near_support, 0.15, np.where(near_resistance, -0.15, 0.0))
+        batch.note(near_support, "Near strong support level")
+        batch.note(near_resistance, "Near strong resistance level")
+
+        # Market Regime
+        trending = batch["regime"] == "trending"
+        high_volatility = batch["regime"] == "high_volatility"
+        score += np.where(trending, 0.1, np.where(high_volatility, -0.1, 0.0))
+        batch.note(trending, "Strong trending market")
+        batch.note(high_volatility, "High volatility - cautious")
+
+        # Calculate BASE confidence (before crypto adjustments)
+        base_confidence = np.minimum(np.abs(rsi - 50) / 50 * 0.25, 0.25)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            macd_weight = np.minimum(np.abs(histogram) / current_price * 80 * 0.3, 0.3)
+        base_confidence += np.where(current_price != 0, macd_weight, 0.0)
+        base_confidence += np.minimum(batch["bb_width"] / 15 * 0.2, 0.2)
+        base_confidence += np.where(trending, 0.1, np.where(high_volatility, -0.05, 0.0))
+
+        # ML Features Contribution (reduced weight for crypto)
+        ml_trend = batch["ml_features"][:, :4].mean(axis=1)
+        score += ml_trend * 0.3
+        base_confidence += np.minimum(np.abs(ml_trend) * 0.15, 0.15)
+
+        batch["score"] = score
+        batch["base_confidence"] = base_confidence
+
+class ConfidenceStage(Stage):
+    """Crypto-specific uncertainty: volatility, pump/dump and market regime"""
+
+    name = "confidence"
+
+    def run(self, batch):
+        prices, returns = batch.prices, batch["returns"]
+        current_price = prices[:, -1]
+
+        # Volatility over the last 50 prices
+        volatility = returns[:, -49:].std(axis=1) * np.sqrt(365)
+        confidence = batch["base_confidence"] * np.select(
+            [volatility > 1.2, volatility > 0.8, volatility > 0.4], [0.5, 0.7, 0.85], 1.0
+        )
+
+        # Pump/dump patterns
+        recent = returns[:, -9:]
+        pump_dump = (recent.max(axis=1) > 0.15) | (recent.min(axis=1) < -0.15)
+        confidence = np.where(pump_dump, confidence * 0.4, confidence)
+        for _ in np.flatnonzero(pump_dump):
+            print(f"⚠️ Pump/dump pattern detected - confidence reduced")
+
+        # Crypto market regimes
+        total_return = (current_price - prices[:, -30]) / prices[:, -30]
+        regime_volatility = returns[:, -29:].std(axis=1) * np.sqrt(365)
+        bull = (total_return > 0.2) & (regime_volatility < 0.8)
+        bear = ~bull & (total_return < -0.2)
+        choppy = ~bull & ~bear & (np.abs(total_return) < 0.1) & (regime_volatility > 0.9)
+        confidence = np.where(bull, np.minimum(confidence * 1.1, 0.8), confidence)
+        confidence = np.where(bear, confidence * 0.7, confidence)
+        confidence = np.where(choppy, confidence * 0.6, confidence)
+        batch["confidence"] = np.clip(confidence, 0.05, 0.85)
+
+class SafeguardStage(Stage):
+    """Caps, recent-move penalty and the per-coin confidence history"""
+
+    name = "safeguards"
+
+    def __init__(self, apply_history):
+        self.apply_history = apply_history  # (confidence, coin) -> confidence, applied in order
+
+    def run(self, batch):
+        prices = batch.prices
+        confidence = np.clip(batch["confidence"], 0.05, 0.85)
+        recent_move = np.abs((prices[:, -1] - prices[:, -3]) / prices[:, -3])
+        confidence = np.where(recent_move > 0.1, confidence * 0.8, confidence)
+        batch["confidence"] = np.array([
+            self.apply_history(float(c), coin) for c, coin in zip(confidence, batch.coins)
+        ])
 
 class AdvancedTrendPredictor:
-    def __init__(self):
-        self.price_memory = {coin: deque(maxlen=100) for coin in ["BTC", "ETH", "DOT", "ENA"]}
-        self.trend_memory = {coin: deque(maxlen=20) for coin in ["BTC", "ETH", "DOT", "ENA"]}
-        self.confidence_history = {coin: deque(maxlen=20) for coin in ["BTC", "ETH", "DOT", "ENA"]}
-        
+    def __init__(self, model_path=MODEL_PATH, cache_size=PIPELINE_CACHE_SIZE):
+        # Allocated on a coin's first prediction, so any symbol can be predicted
+        self.trend_memory = defaultdict(partial(deque, maxlen=MEMORY_LENGTH))
+        self.confidence_history = defaultdict(partial(deque, maxlen=MEMORY_LENGTH))
+        # Streaming indicator state, advanced one tick at a time by update_price
+        self.indicator_states = {}
+        # Per-stage seconds accumulated while METRICS_STAGE_TIMING covers this module
+        self.stage_times = {}
+        # Batch prediction stages; the trained model (if any) runs before confidence adjustment
+        self.pipeline = Pipeline([
+            FeatureStage(), ScoringStage(), ConfidenceStage(), SafeguardStage(self.apply_confidence_history),
+        ], cache_size)
+        model = load_model_stage(model_path)
+        if model is not None:
+            self.pipeline.insert(model, before="confidence")
+
+    def take_stage_times(self):
+        """Return and reset the accumulated per-stage prediction timings"""
+        times, self.stage_times = self.stage_times, {}
+        return times
+
+    def _record_stages(self, timer):
+        for stage, seconds in timer.totals.items():
+            self.stage_times[stage] = self.stage_times.get(stage, 0.0) + seconds
+
+    def export_state(self, coins=None):
+        """trend_memory / confidence_history as plain lists (for snapshots)"""
+        coins = set(self.trend_memory) | set(self.confidence_history) if coins is None else coins
+        return {
+            "trend_memory": {c: list(self.trend_memory[c]) for c in coins if c in self.trend_memory},
+            "confidence_history": {
+                c: list(self.confidence_history[c]) for c in coins if c in self.confidence_history
+            },
+        }
+
+    def import_state(self, state):
+        """Restore a snapshot from export_state"""
+        for name in ("trend_memory", "confidence_history"):
+            memory = getattr(self, name)
+            for coin, values in state.get(name, {}).items():
+                memory[coin].clear()
+                memory[coin].extend(float(v) for v in values)
+
+    def forget(self, coin):
+        """Drop all per-coin state (symbol removed or idle)"""
+        self.trend_memory.pop(coin, None)
+        self.confidence_history.pop(coin, None)
+        self.indicator_states.pop(coin, None)
+
+    def update_price(self, coin, price):
+        """Feed a single new tick into the coin's streaming indicators (O(1))"""
+        state = self.indicator_states.get(coin)
+        if state is None:
+            state = self.indicator_states[coin] = IndicatorState()
+        state.update(price)
+
+    def get_indicator_state(self, coin, prices):
+        """Return indicator state in sync with ``prices``, rebuilding it if needed"""
+        state = self.indicator_states.get(coin)
+        if state is None or not state.matches(prices):
+            # Ticks were not streamed in (or the history diverged): replay the window
+            state = self.indicator_states[coin] = IndicatorState.from_prices(prices, max(len(prices), WINDOW))
+        return state
+
+    def indicator_snapshot(self, coin):
+        """Latest streamed indicator values for a coin, or None before any tick"""
+        state = self.indicator_states.get(coin)
+        return state.snapshot() if state is not None and state.count else None
+
     def calculate_rsi(self, prices, period=14):
         if len(prices) < period + 1:
             return 50  # Neutral RSI
-        
-        # Ensure all prices are floats
-        price_array = np.array([float(p) for p in prices])
-        deltas = np.diff(price_array)
-        gains = np.where(deltas > 0, deltas, 0)
-        losses = np.where(deltas < 0, -deltas, 0)
-        avg_gains = np.mean(gains[-period:])
-        avg_losses = np.mean(losses[-period:])
-        if avg_losses == 0:
-            return 100 if avg_gains > 0 else 50
-        rs = avg_gains / avg_losses
-        rsi = 100 - (100 / (1 + rs))
-        return rsi
+
+        # Wilder RSI replayed over the whole window, as in the batch pipeline
+        return float(batch_indicators.rsi(as_price_array(prices)[None], period)[0])
 
     def calculate_macd(self, prices):
         if len(prices) < 26:
             return 0, 0, 0
-        
-        # Ensure all prices are floats
-        price_array = np.array([float(p) for p in prices])
-        ema_12 = np.mean(price_array[-12:])
-        ema_26 = np.mean(price_array[-26:])
-        macd_line = ema_12 - ema_26
-        signal_line = np.mean(price_array[-9:])
-        histogram = macd_line - signal_line
-        return float(macd_line), float(signal_line), float(histogram)
+
+        # EMA(12) - EMA(26) with an EMA(9) signal line, as in the batch pipeline
+        line, signal, histogram = batch_indicators.macd(as_price_array(prices)[None])
+        return float(line[0]), float(signal[0]), float(histogram[0])
 
     def calculate_bollinger_bands(self, prices, period=20):
         if len(prices) < period:
             last_price = float(prices[-1]) if len(prices) > 0 else 0.0
             return last_price, last_price, last_price, 0.0
         
-        # Ensure all prices are floats
-        price_array = np.array([float(p) for p in prices[-period:]])
+        price_array = as_price_array(prices)[-period:]
         sma = float(np.mean(price_array))
         std = float(np.std(price_array))
         upper_band = sma + (std * 2)
@@ -58,19 +266,18 @@ class AdvancedTrendPredictor:
             current_price = float(prices[-1]) if len(prices) > 0 else 0.0
             return current_price, current_price
         
-        # Ensure all prices are floats
-        price_window = [float(p) for p in prices[-window:]]
-        support = min(price_window)
-        resistance = max(price_window)
+        price_window = as_price_array(prices)[-window:]
+        support = np.min(price_window)
+        resistance = np.max(price_window)
         return float(support), float(resistance)
 
     def calculate_volume_profile(self, prices, window=20):
         if len(prices) < window:
             return 0.5
         
-        # Ensure all prices are floats
-        price_array = np.array([float(p) for p in prices[-window:]])
-        volatility = np.std(price_array) / np.mean(price_array) * 100
+        price_array = as_price_array(prices)[-window:]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            volatility = np.std(price_array) / np.mean(price_array) * 100
         volume_score = min(volatility / 5.0, 1.0)
         return float(volume_score)
 
@@ -78,9 +285,9 @@ class AdvancedTrendPredictor:
         if len(prices) < 20:
             return "unknown"
         
-        # Ensure all prices are floats
-        price_array = np.array([float(p) for p in prices[-20:]])
-        returns = np.diff(np.log(price_array))
+        price_array = as_price_array(prices)[-20:]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            returns = np.diff(np.log(price_array))
         volatility = np.std(returns) * np.sqrt(365)
         up_moves = np.where(returns > 0, returns, 0)
         down_moves = np.where(returns < 0, -returns, 0)
@@ -97,8 +304,7 @@ class AdvancedTrendPredictor:
         if len(prices) < 30:
             return np.zeros(10)
         
-        # Ensure all prices are floats
-        price_array = np.array([float(p) for p in prices])
+        price_array = as_price_array(prices)
         
         features = []
         features.append(float((price_array[-1] - price_array[-5]) / price_array[-5]))
@@ -122,17 +328,14 @@ class AdvancedTrendPredictor:
         
         return np.array(features)
 
-    def detect_crypto_pump_dump(self, confidence, prices):
+    def detect_crypto_pump_dump(self, confidence, state):
         """Detect pump/dump patterns and reduce confidence"""
-        if len(prices) < 10:
+        if state.count < 10 or not state.recent_returns:
             return confidence
         
-        price_array = np.array([float(p) for p in prices[-10:]])
-        
         # Sudden price spikes/drops (common in crypto manipulation)
-        recent_returns = np.diff(np.log(price_array))
-        max_gain = np.max(recent_returns)
-        max_loss = np.min(recent_returns)
+        max_gain = max(state.recent_returns)
+        max_loss = min(state.recent_returns)
         
         # If extreme moves detected, reduce confidence significantly
         if max_gain > 0.15 or max_loss < -0.15:  # 15%+ moves in short period
@@ -141,16 +344,14 @@ class AdvancedTrendPredictor:
         
         return confidence
 
-    def adapt_to_crypto_regime(self, confidence, prices, coin):
+    def adapt_to_crypto_regime(self, confidence, state, coin):
         """Adapt confidence based on crypto market regime"""
-        if len(prices) < 30:
+        if state.count < 30:
             return confidence
         
-        price_array = np.array([float(p) for p in prices[-30:]])
-        
         # Crypto market regimes
-        total_return = (price_array[-1] - price_array[0]) / price_array[0]
-        volatility = np.std(np.diff(np.log(price_array))) * np.sqrt(365)
+        total_return = (state.last_price - state.lag(30)) / state.lag(30)
+        volatility = state.returns_29.std * math.sqrt(365)
         
         # Bull market - slightly higher confidence but capped
         if total_return > 0.2 and volatility < 0.8:  # Strong uptrend, moderate vol
@@ -166,16 +367,14 @@ class AdvancedTrendPredictor:
         
         return confidence
 
-    def apply_crypto_specific_uncertainty(self, confidence, prices, coin):
+    def apply_crypto_specific_uncertainty(self, confidence, state, coin):
         """Crypto-specific confidence adjustments"""
-        if len(prices) < 20:
+        if state.count < 20:
             return confidence * 0.3  # Much lower confidence for insufficient data
         
-        price_array = np.array([float(p) for p in prices[-50:]])  # Use more data for crypto
-        
-        # Crypto-specific volatility calculation (crypto is naturally more volatile)
-        returns = np.diff(np.log(price_array))
-        volatility = np.std(returns) * np.sqrt(365)  # Annualized volatility
+        # Crypto-specific volatility calculation over the last 50 prices
+        # (crypto is naturally more volatile)
+        volatility = state.returns_49.std * math.sqrt(365)  # Annualized volatility
         
         # Crypto volatility thresholds (higher than traditional markets)
         if volatility > 1.2:  # Extreme volatility (common in crypto)
@@ -186,12 +385,12 @@ class AdvancedTrendPredictor:
             confidence *= 0.85
         
         # Detect crypto-specific patterns
-        confidence = self.detect_crypto_pump_dump(confidence, prices)
-        confidence = self.adapt_to_crypto_regime(confidence, prices, coin)
+        confidence = self.detect_crypto_pump_dump(confidence, state)
+        confidence = self.adapt_to_crypto_regime(confidence, state, coin)
         
         return max(0.05, min(confidence, 0.85))  # Crypto cap at 85%
 
-    def crypto_confidence_safeguards(self, confidence, prices, coin):
+    def crypto_confidence_safeguards(self, confidence, state, coin):
         """Final safeguards for crypto confidence"""
         # Never exceed 85% for crypto
         confidence = min(confidence, 0.85)
@@ -200,18 +399,21 @@ class AdvancedTrendPredictor:
         confidence = max(confidence, 0.05)
         
         # Recent large moves reduce confidence further
-        if len(prices) >= 3:
-            recent_move = abs((prices[-1] - prices[-3]) / prices[-3])
+        if state.count >= 3:
+            recent_move = abs((state.last_price - state.lag(3)) / state.lag(3))
             if recent_move > 0.1:  # 10%+ move in 3 periods
                 confidence *= 0.8
         
-        # Track confidence history for Bayesian smoothing
+        return self.apply_confidence_history(confidence, coin)
+
+    def apply_confidence_history(self, confidence, coin):
+        """Track confidence history for Bayesian smoothing"""
         self.confidence_history[coin].append(confidence)
         
         # If we've been overconfident recently, reduce current confidence
         recent_confidences = list(self.confidence_history[coin])[-5:]
         if len(recent_confidences) >= 3:
-            avg_confidence = np.mean(recent_confidences)
+            avg_confidence = sum(recent_confidences) / len(recent_confidences)
             if avg_confidence > 0.7:
                 # We've been too confident, apply penalty
                 confidence *= 0.9
@@ -222,19 +424,21 @@ class AdvancedTrendPredictor:
         """Crypto-optimized prediction with realistic confidence"""
         if len(prices) < 30:
             return 0, 0.1, ["Insufficient data for crypto analysis"]
-        
+
+        timer = StageTimer(stage_timing_enabled("trend_predictor_ai"))
         try:
-            # Convert all prices to float
-            price_array = np.array([float(p) for p in prices])
-            current_price = float(price_array[-1])
+            # Indicators come from the O(1) streaming state, not the raw window
+            state = self.get_indicator_state(coin, prices)
+            current_price = state.last_price
         except (ValueError, TypeError) as e:
             print(f"Price conversion error: {e}")
             return 0, 0.1, ["Invalid price data"]
 
         # Calculate indicators
-        rsi = self.calculate_rsi(price_array)
-        macd, signal, histogram = self.calculate_macd(price_array)
-        upper_bb, middle_bb, lower_bb, bb_width = self.calculate_bollinger_bands(price_array)
+        rsi = state.rsi()
+        macd, signal, histogram = state.macd()
+        upper_bb, middle_bb, lower_bb, bb_width = state.bollinger_bands()
+        timer.mark("features")
         
         score = 0.0
         explanations = []
@@ -270,7 +474,7 @@ class AdvancedTrendPredictor:
             explanations.append("Near upper Bollinger Band")
         
         # Support/Resistance Analysis
-        support, resistance = self.calculate_support_resistance(price_array)
+        support, resistance = state.support_resistance()
         price_to_support = (current_price - support) / current_price
         price_to_resistance = (resistance - current_price) / current_price
         
@@ -282,7 +486,7 @@ class AdvancedTrendPredictor:
             explanations.append("Near strong resistance level")
         
         # Market Regime
-        market_regime = self.market_regime_detection(price_array)
+        market_regime = state.market_regime()
         if market_regime == "trending":
             score += 0.1
             explanations.append("Strong trending market")
@@ -303,42 +507,57 @@ class AdvancedTrendPredictor:
             base_confidence -= 0.05
         
         # ML Features Contribution (reduced weight for crypto)
-        ml_features = self.machine_learning_features(price_array)
+        ml_features = state.ml_features()
         if len(ml_features) >= 8:
-            ml_trend = np.mean(ml_features[:4])
+            ml_trend = sum(ml_features[:4]) / 4
             score += ml_trend * 0.3  # Reduced weight for crypto
             base_confidence += min(abs(ml_trend) * 0.15, 0.15)
+        timer.mark("scoring")
+
+        # Trained model stage, same as in the batch pipeline
+        model = self.pipeline.stage("model")
+        if model is not None:
+            scores, confidences, signal = model.adjust(
+                np.array([score]), np.array([base_confidence]), np.asarray(ml_features, dtype=np.float64)[None]
+            )
+            score, base_confidence = float(scores[0]), float(confidences[0])
+            note = model.describe(float(signal[0]))
+            if note:
+                explanations.append(note)
+            timer.mark("model")
         
         # Apply crypto-specific uncertainty
-        final_confidence = self.apply_crypto_specific_uncertainty(base_confidence, prices, coin)
+        final_confidence = self.apply_crypto_specific_uncertainty(base_confidence, state, coin)
+        timer.mark("confidence")
         
         # Final safeguards
-        final_confidence = self.crypto_confidence_safeguards(final_confidence, prices, coin)
+        final_confidence = self.crypto_confidence_safeguards(final_confidence, state, coin)
+        timer.mark("safeguards")
+        self._record_stages(timer)
         
         return score, final_confidence, explanations
 
-    def predict_trend(self, price_history, coin="BTC"):
-        # Filter and convert all prices to float
-        clean_prices = []
-        for p in price_history:
-            try:
-                clean_prices.append(float(p))
-            except (ValueError, TypeError):
-                continue
+    def predict_trend(self, price_history, coin="BTC", bar_seconds=1.0):
+        # Filter and convert all prices to float (ring-buffer views pass through)
+        clean_prices = as_price_array(price_history)
 
         if len(clean_prices) < 15:  # Higher minimum for crypto
             return "neutral", "Insufficient crypto data", 0.15
 
-        # Store in memory
-        self.price_memory[coin].extend(clean_prices)
-
         # Use crypto-optimized prediction
         score, confidence, explanations = self.crypto_ensemble_prediction(clean_prices, coin)
+        return self.finalize_trend(coin, score, confidence, explanations, clean_prices, bar_seconds)
+
+    def finalize_trend(self, coin, score, confidence, explanations, clean_prices, bar_seconds=1.0):
+        """Turn an ensemble score/confidence into (trend, explanation, confidence)
 
+        ``bar_seconds`` is the spacing of ``clean_prices`` (1 for raw ticks,
+        60 for 1m candles, ...) and only affects the change label.
+        """
         # Apply trend memory bias (reduced weight for crypto)
         if len(self.trend_memory[coin]) > 0:
             recent_trends = list(self.trend_memory[coin])[-5:]
-            trend_bias = np.mean(recent_trends)
+            trend_bias = sum(recent_trends) / len(recent_trends)
             score += trend_bias * 0.1  # Reduced influence for crypto
 
         # Determine trend with crypto-appropriate thresholds
@@ -356,32 +575,95 @@ class AdvancedTrendPredictor:
             self.trend_memory[coin].append(0.0)
 
         # Format confidence for display
-        confidence_level = "High" if confidence > 0.6 else "Medium" if confidence > 0.3 else "Low"
-        explanations.append(f"{confidence_level} confidence ({confidence:.1%})")
+        explanations.append(f"{confidence_level(confidence)} confidence ({confidence:.1%})")
 
-        # Add 24h price change
-        if len(clean_prices) > 24:
-            price_change_24h = (clean_prices[-1] - clean_prices[-min(24, len(clean_prices))]) / clean_prices[-min(24, len(clean_prices))] * 100
-            explanations.append(f"24h change: {price_change_24h:+.2f}%")
+        # Price change over the last CHANGE_LOOKBACK bars, labelled with the real span
+        if len(clean_prices) > CHANGE_LOOKBACK:
+            base = clean_prices[-CHANGE_LOOKBACK - 1]
+            price_change = (clean_prices[-1] - base) / base * 100
+            span = format_duration(CHANGE_LOOKBACK * bar_seconds)
+            explanations.append(f"{span} change: {price_change:+.2f}%")
             
             # Crypto volatility context
-            if abs(price_change_24h) > 15:
+            if abs(price_change) > 15:
                 explanations.append("High volatility - typical crypto movement")
 
         explanation = "; ".join(explanations)
         return trend, explanation, confidence
 
-# Global instance
-predictor = AdvancedTrendPredictor()
+    def batch_ensemble_prediction(self, price_matrix, coins):
+        """Vectorized crypto_ensemble_prediction for every row of ``price_matrix``.
+
+        Indicators are evaluated over the window (as if replayed from its first
+        price), so a row matches the single-symbol path for the same window.
+        """
+        n, length = price_matrix.shape
+        if length < 30:
+            return np.zeros(n), np.full(n, 0.1), [["Insufficient data for crypto analysis"] for _ in range(n)]
+
+        timer = StageTimer(stage_timing_enabled("trend_predictor_ai"))
+        # Zero prices in a window give inf/nan rows; they must not warn for every cycle
+        with np.errstate(divide="ignore", invalid="ignore"):
+            batch = self.pipeline.run(price_matrix, coins, timer)
+        self._record_stages(timer)
+        return batch["score"], batch["confidence"], batch.explanations
+
+    def predict_trends_batch(self, histories, coins, bar_seconds=1.0):
+        """Predict trends for N symbols at once from a 2D (N x T) price array.
+
+        Returns a list of (trend, explanation, confidence) tuples in ``coins`` order.
+        Confidence history and trend memory are applied row by row, so rows of
+        one coin (e.g. a backtest's successive windows) behave like one call each.
+        """
+        price_matrix = np.asarray(histories, dtype=np.float64)
+        if price_matrix.ndim != 2 or price_matrix.shape[0] != len(coins):
+            raise ValueError("histories must be a 2D array with one row per coin")
+
+        if price_matrix.shape[1] < 15:  # Higher minimum for crypto
+            return [("neutral", "Insufficient crypto data", 0.15) for _ in coins]
+
+        scores, confidences, explanations = self.batch_ensemble_prediction(price_matrix, coins)
+        return [
+            self.finalize_trend(coin, float(score), float(confidence), notes, row, bar_seconds)
+            for coin, score, confidence, notes, row in zip(
+                coins, scores, confidences, explanations, price_matrix
+            )
+        ]
+
+# Global instance, built on first use so importing this module stays cheap
+_predictor = None
+
+def get_predictor():
+    global _predictor
+    if _predictor is None:
+        _predictor = AdvancedTrendPredictor()
+    return _predictor
 
-def predict_trend(price_history, coin="BTC"):
+def __getattr__(name):
+    # ``from trend_predictor_ai import predictor`` keeps working
+    if name == "predictor":
+        return get_predictor()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def predict_trend(price_history, coin="BTC", bar_seconds=1.0):
     """Wrapper with cleaning to avoid str vs float errors"""
-    clean_prices = []
-    for p in price_history:
-        try:
-            clean_prices.append(float(p))
-        except (ValueError, TypeError):
-            continue
+    clean_prices = as_price_array(price_history)
     if len(clean_prices) < 10:
         return "neutral", "Insufficient valid data for prediction", 0.1
-    return predictor.predict_trend(clean_prices, coin)
\ No newline at end of file
+    return get_predictor().predict_trend(clean_prices, coin, bar_seconds)
+
+def predict_trends_batch(histories, coins, bar_seconds=1.0):
+    """Vectorized predict_trend for many coins sharing one window length"""
+    return get_predictor().predict_trends_batch(histories, coins, bar_seconds)
+
+def indicator_snapshot(coin):
+    """Latest streamed indicator values from the global predictor"""
+    return get_predictor().indicator_snapshot(coin)
+
+def update_price(coin, price):
+    """Stream one new tick into the global predictor's indicator state"""
+    get_predictor().update_price(coin, float(price))
+
+def forget(coin):
+    """Release the global predictor's state for a coin"""
+    get_predictor().forget(coin)